@@ -1,56 +1,71 @@
 # Standard library imports
 from datetime import datetime, timedelta
+import atexit
 import logging
+import math
 import os
+import re
 import uuid
 import sys
+import time
 from decimal import Decimal
 from typing import List, Dict, Tuple, Optional
 
+# Load environment variables before config reads them; skipped when there is no .env
+if os.path.exists('.env'):
+    from dotenv import load_dotenv
+    load_dotenv()
+
 # Third-party imports
-from decouple import config
-from dotenv import load_dotenv
-from flask import Flask, request, render_template, jsonify
-from fuzzywuzzy import fuzz
-from openai import OpenAI
+# openai and twilio.rest are imported on first use (see src/core/clients.py)
+from flask import Flask, Response, request, render_template, jsonify
 from twilio.twiml.messaging_response import MessagingResponse
-from twilio.rest import Client
-import httpx
 
 # Local/application imports
 from src.core.dialogue import DialogueManager
 from src.core.order import OrderProcessor, OrderQueue
 from src.core.payment import PaymentHandler
-from src.core.enums import OrderStage
+from src.core.enums import OrderStage, ReplyKind, ReplyMode
 from src.core.session import SessionManager
-from src.core.config import MENU, MODIFIERS
+from src.core.config import (
+    RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, LLM_TIMEOUT_MS, LLM_MAX_WORKERS,
+    SESSION_STORE_URL, SESSION_TIMEOUT, SESSION_SWEEP_INTERVAL, COMPLETED_ORDER_RETENTION,
+    MENU_FILE, MENU_RELOAD_INTERVAL, DEFAULT_MODIFIER_PRICE,
+    LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_DEBUG_SAMPLE_RATE, WORKER_SLOT,
+    TWILIO_API_BASE_URL, NOTIFY_WORKERS, NOTIFY_MAX_PENDING, NOTIFY_MAX_ATTEMPTS, NOTIFY_RATE_PER_SEC, NOTIFY_BURST,
+    ORDER_JOURNAL_PATH, ORDER_JOURNAL_DURABLE, ORDERS_API_TOKEN,
+    SMS_ASYNC, SMS_ASYNC_WORKERS, SMS_ASYNC_MAX_PENDING, SMS_ASYNC_DRAIN_TIMEOUT,
+    TWILIO_VALIDATE_SIGNATURE
+)
 from src.core.cart import ShoppingCart, CartItem
 from src.core.menu_handler import MenuHandler
 from src.core.state import CustomerContext, OrderContext
 from src.core.conversation_handler import ConversationHandler
+from src.core.response_cache import ResponseCache
+from src.core.response_policy import ResponsePolicy
+from src.core.prompts import PROMPTS
+from src.core.llm import LLMDeadline
+from src.core.session_store import PhoneSession, create_session_store
+from src.core.expiry import ExpiryIndex, SessionSweeper, deep_sizeof
+from src.core.menu_snapshot import MenuPublisher, MenuSnapshot, RenderedPage, render_page
+from src.core import llm_usage, metrics
+from src.core.journal import OrderJournal
+from src.core.kitchen import KitchenScheduler
+from src.core.order_index import OrderIndex
+from src.core.notifications import OrderNotifier, TokenBucket, TwilioSender
+from src.core.sms_dispatch import ReplyDispatcher
+from src.utils.log import configure_logging
 
 # Configuration Constants
 PORT = int(os.getenv('PORT', 10000))
 HOST = '0.0.0.0'
 
-# Configure logging
-os.makedirs('logs', exist_ok=True)
-log_filename = f"logs/coffee_shop_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging; records are written off the request thread
+configure_logging(LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_DEBUG_SAMPLE_RATE, WORKER_SLOT)
 
 logger = logging.getLogger(__name__)
 logger.info("=== Coffee Shop Application Starting ===")
 
-# Load environment variables
-load_dotenv()
-
 app = Flask(__name__)
 
 # Configuration
@@ -58,28 +73,123 @@ TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', '')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER', '')
 
-# Initialize services
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-dialogue_manager = DialogueManager(menu=MENU, modifiers=MODIFIERS)
-payment_handler = PaymentHandler()
-order_processor = OrderProcessor()
-session_manager = SessionManager()
-menu_handler = MenuHandler(menu=MENU, modifiers=MODIFIERS)
-conversation_handler = ConversationHandler(openai_client)
-
-# In-memory storage
-active_orders = {}
+# Initialize services; API clients are created on the first request that needs them
+llm_deadline = LLMDeadline(timeout_ms=LLM_TIMEOUT_MS, max_workers=LLM_MAX_WORKERS)
+
+# Menu snapshots are swapped in place when MENU_FILE changes or the worker gets SIGHUP
+menu_publisher = MenuPublisher.from_file(MENU_FILE)
+menu_publisher.watch(MENU_RELOAD_INTERVAL)
+menu_publisher.install_signal_handler()
+
+dialogue_manager = DialogueManager(deadline=llm_deadline, publisher=menu_publisher)
+# Orders other workers took are fed in from the shared journal before each payment
+kitchen = KitchenScheduler()
+payment_handler = PaymentHandler(scheduler=kitchen)
+
+# Every paid order is journaled before anything else hears about it
+order_journal = OrderJournal(ORDER_JOURNAL_PATH, durable=ORDER_JOURNAL_DURABLE)
+payment_handler.add_order_listener(order_journal.append)
+
+# Completed orders by id, phone and time for STATUS and /orders; orders taken by
+# other workers are read from the shared journal before each lookup (refresh_shared_orders)
+order_index = OrderIndex()
+payment_handler.add_order_listener(order_index.add)
+
+# Move each customer's LLM usage onto the order it led to
+payment_handler.add_order_listener(llm_usage.LEDGER.close_order)
+
+# Text customers when their order is ready; sent by background workers, never from the webhook
+order_notifier = None
+sms_dispatcher = None
+if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER:
+    twilio_sender = TwilioSender(
+        TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, base_url=TWILIO_API_BASE_URL,
+        max_connections=NOTIFY_WORKERS + (SMS_ASYNC_WORKERS if SMS_ASYNC else 0)
+    )
+    # One send rate for the account: ready texts and async replies share it
+    send_rate = TokenBucket(NOTIFY_RATE_PER_SEC, NOTIFY_BURST)
+    order_notifier = OrderNotifier(
+        twilio_sender,
+        workers=NOTIFY_WORKERS,
+        max_pending=NOTIFY_MAX_PENDING,
+        max_attempts=NOTIFY_MAX_ATTEMPTS,
+        rate_limiter=send_rate
+    )
+    payment_handler.add_order_listener(order_notifier.notify_ready)
+    order_notifier.start()
+    if SMS_ASYNC:
+        # Replies are sent in arrival order per phone; see src/core/sms_dispatch.py
+        sms_dispatcher = ReplyDispatcher(lambda phone, body: reply_to(phone, body), twilio_sender,
+                                         workers=SMS_ASYNC_WORKERS, max_pending=SMS_ASYNC_MAX_PENDING,
+                                         rate_limiter=send_rate)
+        sms_dispatcher.start()
+        # Twilio will not redeliver an acknowledged message, so answer the queue before exiting
+        atexit.register(sms_dispatcher.stop, SMS_ASYNC_DRAIN_TIMEOUT)
+else:
+    logger.warning("Twilio credentials not set; order-ready notifications are disabled")
+    if SMS_ASYNC:
+        logger.warning("SMS_ASYNC needs the Twilio credentials; answering /sms synchronously")
+order_processor = OrderProcessor(scheduler=kitchen)
+session_manager = SessionManager(timeout=timedelta(minutes=SESSION_TIMEOUT))
+menu_handler = MenuHandler(publisher=menu_publisher)
+response_cache = ResponseCache(max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+conversation_handler = ConversationHandler(cache=response_cache, deadline=llm_deadline)
+response_policy = ResponsePolicy.profile()
+
+# Timing histograms; with METRICS_DIR set, each worker shares its snapshot there
+metrics_exporter = metrics.MetricsExporter()
+metrics_exporter.start()
+
+# Per-phone conversation state; shared across workers unless the store is memory://
+session_store = create_session_store(SESSION_STORE_URL, ttl=SESSION_TIMEOUT * 60)
 completed_orders = {}
-customer_contexts = {}
+completed_order_expiry = ExpiryIndex()
+
+def restore_completed_orders(now: float) -> int:
+    """Reload orders still inside the retention window from the journal"""
+    cutoff = now - COMPLETED_ORDER_RETENTION * 60
+    restored = 0
+    for order in order_journal.replay(since=cutoff):
+        created = order.created_at.timestamp()
+        if created < cutoff:
+            continue
+        completed_orders.setdefault(order.phone_number, []).append(order)
+        completed_order_expiry.touch(order.phone_number, created + COMPLETED_ORDER_RETENTION * 60)
+        kitchen.restore(order)
+        order_index.add(order)
+        restored += 1
+    logger.info("Restored %d completed orders from %s", restored, ORDER_JOURNAL_PATH)
+    return restored
+
+restore_completed_orders(time.time())
+
+def purge_completed_orders(now: float) -> Tuple[int, int]:
+    """Forget completed orders for phones that have not ordered within the retention window"""
+    evicted = reclaimed = 0
+    for phone_number in completed_order_expiry.pop_expired(now):
+        orders = completed_orders.pop(phone_number, None)
+        if orders is not None:
+            evicted += 1
+            reclaimed += deep_sizeof(orders)
+    return evicted, reclaimed
+
+# Reclaim idle per-phone state in the background so memory stays flat
+session_sweeper = SessionSweeper(interval=SESSION_SWEEP_INTERVAL)
+session_sweeper.register('sessions', session_store.purge_expired, lambda: len(session_store))
+session_sweeper.register('session_manager', session_manager.purge_expired, lambda: len(session_manager.sessions))
+session_sweeper.register('completed_orders', purge_completed_orders, lambda: len(completed_orders))
+session_sweeper.register('order_index', lambda now: (order_index.purge(now - COMPLETED_ORDER_RETENTION * 60), 0),
+                         lambda: len(order_index))
+session_sweeper.start()
 
 def get_menu_message():
-    """Generate the menu message"""
-    message = "Welcome to Coffee S50! Order by number or name:\n\n"
-    for key, item in MENU.items():
-        message += f"{key}. {item['item']} (${item['price']:.2f})\n"
-        message += f"   {item['description']}\n"
-    return message
+    """Get the menu message for the current menu"""
+    return menu_publisher.current.menu_message
+
+def modifier_prompt(item: Dict, modifier: str) -> str:
+    """Ask to confirm a modifier at the price captured with the item"""
+    price = item.get('modifier_prices', {}).get(modifier, DEFAULT_MODIFIER_PRICE)
+    return f"{modifier} costs ${price:.2f} extra. Reply YES to confirm or NO for regular milk."
 
 def get_cart_context(cart: ShoppingCart, order_state: Dict) -> Dict:
     """Get formatted cart context for dialogue manager"""
@@ -96,22 +206,85 @@ def get_cart_context(cart: ShoppingCart, order_state: Dict) -> Dict:
         'pending_items': order_state.get('pending_items', []),
         'pending_item': order_state.get('pending_item')
     }
-    logger.info(f"Cart context: {cart_info}")
+    logger.debug("Cart context: %s", cart_info)
     return cart_info
 
+def settle_payment(handler, phone_number, message, session: PhoneSession) -> str:
+    """Run a PaymentHandler step against the session's order"""
+    # Queue other workers' orders on the kitchen first, so the ETA reflects the whole shop
+    refresh_shared_orders()
+    active_orders = {phone_number: session.order}
+    response = handler(phone_number, message, active_orders, completed_orders)
+    # The handler removes the order once it has been paid for
+    session.order = active_orders.get(phone_number)
+    if session.order is None:
+        completed_order_expiry.touch(phone_number, time.time() + COMPLETED_ORDER_RETENTION * 60)
+    return response
+
+# Order ids are the first 8 hex digits of a uuid4; "status of my latte" asks for the latest order
+ORDER_ID_PATTERN = re.compile(r'#?\b([0-9a-f]{8})\b')
+
+def refresh_shared_orders():
+    """Index and queue on the kitchen the orders any worker has journaled since the last call"""
+    try:
+        for order in order_journal.read_new():
+            order_index.add(order)
+            kitchen.restore(order)
+    except OSError as e:
+        logger.warning("Could not read new orders from %s: %s", ORDER_JOURNAL_PATH, e)
+
+def order_status_message(phone_number: str, order_id: str = '') -> str:
+    """Describe the phone's latest order, or a given one of its orders"""
+    refresh_shared_orders()
+    order = order_index.get(order_id) if order_id else order_index.latest(phone_number)
+    if order is None or order.phone_number != phone_number:
+        if order_id:
+            return f"I couldn't find order #{order_id.lstrip('#')}. Text STATUS for your latest order."
+        return "You don't have any recent orders. Text START to place one!"
+    ready = order.estimated_ready.strftime('%I:%M %p')
+    if order.estimated_ready <= datetime.now():
+        return f"Order #{order.id} is ready for pickup (since {ready}). Total: ${order.total:.2f}"
+    return f"Order #{order.id} is being prepared and will be ready at {ready}. Total: ${order.total:.2f}"
+
 def process_message(phone_number, message):
     """Process incoming messages based on current order state"""
     message = message.lower().strip()
-    logger.info(f"Processing message: {message} from {phone_number}")
+    logger.debug("Processing message: %s from %s", message, phone_number)
     
     # Handle MENU command in any state
     if message == 'menu':
+        metrics.set_stage('menu_command')
         return get_menu_message()
-        
+    
+    # STATUS [order number] is answered from the order index in any state
+    if message == 'status' or message.startswith('status '):
+        metrics.set_stage('status_command')
+        match = ORDER_ID_PATTERN.search(message[len('status'):])
+        return order_status_message(phone_number, match.group(1) if match else '')
+    
+    # Holds the phone's lock for the whole turn, so concurrent messages from one
+    # customer run one at a time and in arrival order
+    with session_store.transaction(phone_number) as session:
+        return handle_session_message(phone_number, message, session)
+
+def respond(stage: OrderStage, kind: ReplyKind, message: str, customer_context: CustomerContext,
+            cart_context: Dict, **kwargs) -> str:
+    """Send a reply verbatim, from a template or rewritten by the LLM, as the response policy says"""
+    mode = response_policy.mode(stage, kind)
+    metrics.observe_reply(kind.value, mode.value)
+    if mode is ReplyMode.LLM:
+        return conversation_handler.get_friendly_response(message, customer_context, cart=cart_context, **kwargs)
+    if mode is ReplyMode.TEMPLATE:
+        return response_policy.render(kind, message, cart_context, menu_publisher.current.modifiers)
+    return message
+
+def handle_session_message(phone_number, message, session: PhoneSession):
+    """Process a message against one phone's loaded session"""
     # Handle START command
     if message == 'start':
-        session = session_manager.create_session(phone_number)
-        active_orders[phone_number] = {
+        metrics.set_stage('start_command')
+        session_manager.create_session(phone_number)
+        session.order = {
             'state': OrderStage.MENU,
             'cart': ShoppingCart(),
             'order_queue': OrderQueue(),
@@ -120,17 +293,18 @@ def process_message(phone_number, message):
         return get_menu_message()
         
     # Check if user has an active order
-    if phone_number not in active_orders:
+    if session.order is None:
         return "Please text 'START' to begin ordering."
         
-    order = active_orders[phone_number]
+    order = session.order
     current_state = order['state']
-    logger.info(f"Current state for {phone_number}: {current_state}")
+    metrics.set_stage(current_state.value)
+    logger.debug("Current state for %s: %s", phone_number, current_state)
     
     # Get or create customer context
-    if phone_number not in customer_contexts:
-        customer_contexts[phone_number] = CustomerContext()
-    customer_context = customer_contexts[phone_number]
+    if session.context is None:
+        session.context = CustomerContext()
+    customer_context = session.context
     
     # Create cart context for responses
     cart_context = get_cart_context(order['cart'], order)
@@ -143,20 +317,27 @@ def process_message(phone_number, message):
                 return "Your cart is empty! Please add items before checking out."
             if order.get('pending_items'):
                 logger.info("Items pending modification during checkout attempt")
-                return conversation_handler.get_friendly_response(
+                return respond(
+                    current_state, ReplyKind.PENDING_ITEMS,
                     "You have items waiting for modification. Please complete those first.",
-                    customer_context,
-                    cart=cart_context
+                    customer_context, cart_context
                 )
             order['state'] = OrderStage.PAYMENT
-            return conversation_handler.get_friendly_response(
+            return respond(
+                current_state, ReplyKind.PAYMENT_PROMPT,
                 "How would you like to pay? Reply with CASH or CARD.",
-                customer_context,
-                cart=cart_context
+                customer_context, cart_context
             )
 
-    # Try handling casual conversation first
-    casual_response = conversation_handler.handle_chat(message, cart=cart_context)
+    # Try handling casual conversation first, unless the message answers the
+    # pending milk question ("no thanks", "yes thanks")
+    answers_prompt = current_state == OrderStage.AWAITING_MOD_CONFIRM and (
+        menu_handler.is_confirmation(message) or menu_handler.is_denial(message))
+    casual_response = None
+    if not answers_prompt:
+        with metrics.span('handle_chat'):
+            casual_response = conversation_handler.handle_chat(message, cart=cart_context,
+                                                               menu_index=menu_publisher.current.index)
     if casual_response and message not in ['menu', 'start']:
         return casual_response
     
@@ -165,10 +346,10 @@ def process_message(phone_number, message):
         has_modifier, modifier = menu_handler.check_for_modification(message)
         if has_modifier:
             order['pending_modifier'] = modifier
-            return conversation_handler.get_friendly_response(
-                f"{modifier} costs $0.75 extra. Reply YES to confirm or NO for regular milk.",
-                customer_context,
-                cart=cart_context
+            return respond(
+                current_state, ReplyKind.MODIFIER_PROMPT,
+                modifier_prompt(order['pending_item'], modifier),
+                customer_context, cart_context
             )
             
         if menu_handler.is_confirmation(message):
@@ -190,26 +371,25 @@ def process_message(phone_number, message):
                 if next_item.get('modifiers'):
                     mod = next_item['modifiers'][0]
                     order['pending_modifier'] = mod
-                    return conversation_handler.get_friendly_response(
-                        f"{mod} costs $0.75 extra. Reply YES to confirm or NO for regular milk.",
-                        customer_context,
-                        cart=cart_context
+                    return respond(
+                        current_state, ReplyKind.MODIFIER_PROMPT,
+                        modifier_prompt(next_item, mod),
+                        customer_context, cart_context
                     )
                 elif next_item['category'] in ['hot', 'cold']:
-                    return conversation_handler.get_friendly_response(
+                    return respond(
+                        current_state, ReplyKind.MILK_QUESTION,
                         "Would you like any milk modifications?",
-                        customer_context,
-                        cart=cart_context
+                        customer_context, cart_context
                     )
             
             # If no more pending items, return to menu state
             order['state'] = OrderStage.MENU
             order['pending_item'] = None
-            return conversation_handler.get_friendly_response(
+            return respond(
+                current_state, ReplyKind.CART_SUMMARY,
                 order['cart'].get_summary(),
-                customer_context,
-                cart=cart_context,
-                item_added=True
+                customer_context, cart_context, item_added=True
             )
             
         if menu_handler.is_denial(message):
@@ -225,36 +405,37 @@ def process_message(phone_number, message):
                 if next_item.get('modifiers'):
                     mod = next_item['modifiers'][0]
                     order['pending_modifier'] = mod
-                    return conversation_handler.get_friendly_response(
-                        f"{mod} costs $0.75 extra. Reply YES to confirm or NO for regular milk.",
-                        customer_context,
-                        cart=cart_context
+                    return respond(
+                        current_state, ReplyKind.MODIFIER_PROMPT,
+                        modifier_prompt(next_item, mod),
+                        customer_context, cart_context
                     )
                 elif next_item['category'] in ['hot', 'cold']:
-                    return conversation_handler.get_friendly_response(
+                    return respond(
+                        current_state, ReplyKind.MILK_QUESTION,
                         "Would you like any milk modifications?",
-                        customer_context,
-                        cart=cart_context
+                        customer_context, cart_context
                     )
                     
             order['state'] = OrderStage.MENU
             order['pending_item'] = None
-            return conversation_handler.get_friendly_response(
+            return respond(
+                current_state, ReplyKind.CART_SUMMARY,
                 order['cart'].get_summary(),
-                customer_context,
-                cart=cart_context
+                customer_context, cart_context
             )
             
-        return conversation_handler.get_friendly_response(
+        return respond(
+            current_state, ReplyKind.MILK_QUESTION,
             "Please choose a milk type or reply NO for regular milk",
-            customer_context,
-            cart=cart_context
+            customer_context, cart_context
         )
     
     # Handle menu state
     if current_state == OrderStage.MENU:
         # Extract menu items and modifiers
-        found_items = menu_handler.extract_menu_items_and_modifiers(message)
+        with metrics.span('parse'):
+            found_items = menu_handler.extract_menu_items_and_modifiers(message)
         if found_items:
             items_needing_mods = []
             non_mod_items = []
@@ -263,15 +444,15 @@ def process_message(phone_number, message):
             for item in found_items:
                 if item.get('modifiers') or item['category'] in ['hot', 'cold']:
                     items_needing_mods.append(item)
-                    logger.info(f"Queuing item for modification: {item['item']}")
+                    logger.debug("Queuing item for modification: %s", item['item'])
                 else:
                     non_mod_items.append(item)
-                    logger.info(f"Adding non-modifiable item: {item['item']}")
+                    logger.debug("Adding non-modifiable item: %s", item['item'])
             
             # Add all non-modifiable items to cart first
-            for item in non_mod_items:
-                order['cart'].add_item(item)
-                logger.info(f"Added to cart: {item['item']}")
+            if non_mod_items:
+                with metrics.span('cart'):
+                    order['cart'].add_items(non_mod_items)
             
             # Update cart context after adding non-modifiable items
             cart_context = get_cart_context(order['cart'], order)
@@ -290,72 +471,65 @@ def process_message(phone_number, message):
                 if item.get('modifiers'):
                     mod = item['modifiers'][0]
                     order['pending_modifier'] = mod
-                    return conversation_handler.get_friendly_response(
-                        f"{mod} costs $0.75 extra. Reply YES to confirm or NO for regular milk.",
-                        customer_context,
-                        cart=cart_context
+                    return respond(
+                        current_state, ReplyKind.MODIFIER_PROMPT,
+                        modifier_prompt(item, mod),
+                        customer_context, cart_context
                     )
                 else:
                     # No specific modifier requested, ask for preferences
                     if customer_context.usual_modifications:
                         usual_mod = customer_context.usual_modifications[-1]
-                        return conversation_handler.get_friendly_response(
+                        return respond(
+                            current_state, ReplyKind.MILK_QUESTION,
                             f"Would you like your usual {usual_mod}?",
-                            customer_context,
-                            cart=cart_context
+                            customer_context, cart_context
                         )
-                    return conversation_handler.get_friendly_response(
+                    return respond(
+                        current_state, ReplyKind.MILK_QUESTION,
                         "Would you like any milk modifications?",
-                        customer_context,
-                        cart=cart_context
+                        customer_context, cart_context
                     )
             
             # If no items need modification, just show cart summary
-            return conversation_handler.get_friendly_response(
+            return respond(
+                current_state, ReplyKind.CART_SUMMARY,
                 order['cart'].get_summary(),
-                customer_context,
-                cart=cart_context,
-                items_added=True
+                customer_context, cart_context, items_added=True
             )
         
-        return conversation_handler.get_friendly_response(
+        return respond(
+            current_state, ReplyKind.UNRECOGNIZED,
             "I didn't recognize those items. Would you like to see our menu?",
-            customer_context,
-            cart=cart_context,
-            menu_prompt=True
+            customer_context, cart_context, menu_prompt=True
         )
     
     # Handle payment state
     if current_state == OrderStage.PAYMENT:
         if message.lower() in ['cash', 'card']:
-            response = payment_handler.handle_payment(phone_number, message, active_orders, completed_orders)
-            return conversation_handler.get_friendly_response(
-                response, 
-                customer_context, 
-                cart=cart_context,
-                payment=True
+            response = settle_payment(payment_handler.handle_payment, phone_number, message, session)
+            return respond(
+                current_state, ReplyKind.PAYMENT_RESULT, response,
+                customer_context, cart_context, payment=True
             )
-        return conversation_handler.get_friendly_response(
+        return respond(
+            current_state, ReplyKind.PAYMENT_PROMPT,
             "Please choose your payment method",
-            customer_context,
-            cart=cart_context
+            customer_context, cart_context
         )
     
     # Handle card payment state
     if current_state == OrderStage.AWAITING_CARD:
-        response = payment_handler.handle_card_payment(phone_number, message, active_orders, completed_orders)
-        return conversation_handler.get_friendly_response(
-            response, 
-            customer_context, 
-            cart=cart_context,
-            payment=True
+        response = settle_payment(payment_handler.handle_card_payment, phone_number, message, session)
+        return respond(
+            current_state, ReplyKind.PAYMENT_RESULT, response,
+            customer_context, cart_context, payment=True
         )
     
-    return conversation_handler.get_friendly_response(
+    return respond(
+        current_state, ReplyKind.CONFUSED,
         "I'm not sure what to do. Would you like to start a new order?",
-        customer_context,
-        cart=cart_context,
-        confused=True
+        customer_context, cart_context, confused=True
     )
 
 @app.route('/sms', methods=['POST'])
@@ -364,33 +538,122 @@ def handle_sms():
     phone_number = request.values.get('From', '')
     message_body = request.values.get('Body', '').strip()
     
-    logger.info(f"\n=== New Message ===")
-    logger.info(f"From: {phone_number}")
-    logger.info(f"Message: {message_body}")
+    logger.info("Message from %s: %s", phone_number, message_body)
     
-    resp = MessagingResponse()
+    if TWILIO_VALIDATE_SIGNATURE and not valid_twilio_signature():
+        logger.warning("Rejected /sms request with a bad signature from %s", phone_number)
+        return Response(status=403)
     
-    try:
-        response_message = process_message(phone_number, message_body)
-        logger.info(f"Generated Response: {response_message}")
-        resp.message(response_message)
-    except Exception as e:
-        logger.error(f"Error processing message: {str(e)}", exc_info=True)
-        resp.message("Sorry, something went wrong. Please text 'START' to try again.")
+    resp = MessagingResponse()
+    if sms_dispatcher is not None:
+        # Acknowledge now; the reply is texted back once a worker has processed the message
+        if not phone_number:
+            return Response(status=400)
+        if not sms_dispatcher.submit(phone_number, message_body):
+            return Response(status=503)
+        return str(resp)
     
-    logger.info(f"Final Response: {str(resp)}")
-    logger.info("=== End Message ===")
-    return str(resp)
+    resp.message(reply_to(phone_number, message_body))
+    twiml = str(resp)
+    logger.debug("TwiML: %s", twiml)
+    # The stage the message was handled in, for load tests and tracing
+    return twiml, 200, {'X-Order-Stage': metrics.current_stage()}
+
+def reply_to(phone_number: str, message_body: str) -> str:
+    """Process one inbound message and return the reply text"""
+    metrics.set_stage('none')
+    llm_usage.set_conversation(phone_number)
+    with metrics.request_span():
+        try:
+            response_message = process_message(phone_number, message_body)
+            logger.info("Response to %s: %s", phone_number, response_message)
+            return response_message
+        except Exception as e:
+            logger.error("Error processing message: %s", e, exc_info=True)
+            return "Sorry, something went wrong. Please text 'START' to try again."
+
+def valid_twilio_signature() -> bool:
+    """Check X-Twilio-Signature against the auth token"""
+    from twilio.request_validator import RequestValidator
+    return RequestValidator(TWILIO_AUTH_TOKEN).validate(
+        request.url, request.form, request.headers.get('X-Twilio-Signature', '')
+    )
+
+def render_home_page(snapshot: MenuSnapshot) -> RenderedPage:
+    """Render the home page once per menu version"""
+    html = render_template('index.html',
+                           twilio_number=TWILIO_PHONE_NUMBER,
+                           menu=snapshot.menu)
+    return render_page(html, snapshot.version)
 
 @app.route('/')
 def home():
-    return render_template('index.html', 
-                         twilio_number=TWILIO_PHONE_NUMBER,
-                         menu=MENU)
+    page = menu_publisher.current.artifact('home_page', render_home_page)
+    if request.if_none_match.contains(page.etag):
+        response = Response(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = Response(page.gzipped, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(page.body, mimetype='text/html')
+    response.set_etag(page.etag)
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/health')
 def health_check():
     return 'OK', 200
 
+@app.route('/orders')
+def list_orders():
+    """Paginated order lookup by id, phone number or creation time"""
+    if not ORDERS_API_TOKEN or request.headers.get('Authorization') != f"Bearer {ORDERS_API_TOKEN}":
+        return jsonify({'error': 'unauthorized'}), 401
+    refresh_shared_orders()
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(100, max(1, int(request.args.get('limit', 20))))
+        if 'id' in request.args:
+            order = order_index.get(request.args['id'])
+            orders, total = ([order], 1) if order else ([], 0)
+        elif 'phone' in request.args:
+            orders, total = order_index.for_phone(request.args['phone'], offset, limit)
+        else:
+            until = float(request.args.get('until', time.time()))
+            since = float(request.args.get('since', until - 3600))
+            if not (math.isfinite(since) and math.isfinite(until)):
+                raise ValueError("since and until must be finite")
+            orders, total = order_index.between(since, until, offset, limit)
+    except ValueError:
+        return jsonify({'error': 'offset, limit, since and until must be numbers'}), 400
+    next_offset = offset + len(orders)
+    return jsonify({
+        'orders': [order.to_dict() for order in orders],
+        'total': total,
+        'next_offset': next_offset if next_offset < total else None
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Per-stage timing histograms for all workers, in Prometheus text format"""
+    return Response(metrics_exporter.collect(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/stats')
+def stats():
+    """Operational counters for this worker"""
+    return jsonify({
+        'sessions': session_sweeper.stats(),
+        'response_cache': response_cache.stats(),
+        'llm': llm_deadline.stats(),
+        'llm_usage': llm_usage.LEDGER.report(),
+        'response_policy': response_policy.name,
+        'prompts': PROMPTS.stats(),
+        'notifications': order_notifier.stats() if order_notifier else None,
+        'sms_replies': sms_dispatcher.stats() if sms_dispatcher else None,
+        'phone_locks': session_store.phone_locks.stats(),
+        'order_journal': order_journal.stats(),
+        'kitchen': kitchen.stats()
+    })
+
 if __name__ == '__main__':
     app.run(host=HOST, port=PORT, debug=True)
\ No newline at end of file
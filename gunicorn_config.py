@@ -1,5 +1,47 @@
 import os
+import sys
+import tempfile
 
 PORT = int(os.getenv('PORT', 10000))  # Same default as app.py
 bind = f"0.0.0.0:{PORT}"
-workers = 2 
\ No newline at end of file
+
+# One worker by default. A shared session store (sqlite:// or redis://) lets
+# WEB_CONCURRENCY go higher; workers see each other's paid orders (STATUS, /orders,
+# kitchen ETAs) through the order journal.
+SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'memory://')  # Same default as src/core/config.py
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+if workers > 1 and SESSION_STORE_URL.startswith('memory'):
+    raise RuntimeError("WEB_CONCURRENCY > 1 needs a shared SESSION_STORE_URL (sqlite:// or redis://)")
+
+# Async /sms keeps each phone's replies in order only within one process (src/core/sms_dispatch.py)
+if workers > 1 and os.getenv('SMS_ASYNC', 'false').lower() == 'true':
+    raise RuntimeError("SMS_ASYNC needs WEB_CONCURRENCY=1")
+
+# Requests mostly wait on the LLM and Twilio, so each worker handles several at once;
+# per-phone locks in the session store keep one customer's messages in order
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Workers share /metrics through snapshot files in one directory (see src/core/metrics.py)
+if workers > 1 and not os.getenv('METRICS_DIR'):
+    os.environ['METRICS_DIR'] = os.path.join(tempfile.gettempdir(), f"coffee-metrics-{os.getpid()}")
+
+# Leave time to answer messages already acknowledged in SMS_ASYNC mode (SMS_ASYNC_DRAIN_TIMEOUT)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+
+def worker_exit(server, worker):
+    """Answer the async /sms queue before the worker goes away"""
+    app = sys.modules.get('app')
+    if app is not None and app.sms_dispatcher is not None:
+        app.sms_dispatcher.stop(app.SMS_ASYNC_DRAIN_TIMEOUT)
+
+
+def pre_fork(server, worker):
+    """Give the new worker the lowest slot no live worker holds (its log file, see LOG_FILE)"""
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    os.environ['WORKER_SLOT'] = str(worker.slot)
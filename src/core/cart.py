@@ -1,74 +1,170 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from decimal import Decimal, ROUND_HALF_UP
 import logging
+from src.core.config import DEFAULT_MODIFIER_PRICE
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+_CENT = Decimal('0.01')
+
+# Carts up to this many lines find a matching line by scanning; larger ones build a dict
+LINE_INDEX_THRESHOLD = 4
+
+
+@lru_cache(maxsize=4096)
+def to_cents(amount) -> int:
+    """Convert a price (Decimal, str, int or float) to integer cents; menus reuse a handful of prices"""
+    return int((Decimal(str(amount)) / _CENT).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents back to a Decimal for display"""
+    return Decimal(cents) * _CENT
+
+
+DEFAULT_MODIFIER_CENTS = to_cents(DEFAULT_MODIFIER_PRICE)
+
+
 class CartItem:
-    name: str
-    price: Decimal
-    quantity: int = 1
-    modifiers: List[str] = field(default_factory=list)
-    category: str = ''
-    description: str = ''
+    """One cart line; prices are kept in integer cents"""
+    __slots__ = ('name', 'price_cents', 'quantity', 'modifiers', 'category', 'description', 'modifier_cents')
+
+    def __init__(self, name: str, price, quantity: int = 1, modifiers: Sequence[str] = (),
+                 category: str = '', description: str = '', modifier_price=None):
+        self.name = name
+        self.price_cents = to_cents(price)
+        self.quantity = quantity
+        self.modifiers = tuple(modifiers)
+        self.category = category
+        self.description = description
+        # Per-unit price of all modifiers, fixed when the item was added
+        self.modifier_cents = (DEFAULT_MODIFIER_CENTS * len(self.modifiers) if modifier_price is None
+                               else to_cents(modifier_price))
+
+    @property
+    def price(self) -> Decimal:
+        return from_cents(self.price_cents)
+
+    @property
+    def modifier_price(self) -> Decimal:
+        return from_cents(self.modifier_cents)
+
+    def unit_cents(self) -> int:
+        return self.price_cents + self.modifier_cents
+
+    def get_total_cents(self) -> int:
+        return self.unit_cents() * self.quantity
 
     def get_total_price(self) -> Decimal:
         """Calculate total price including modifiers"""
-        modifier_price = Decimal('0.75') * len(self.modifiers)
-        return (self.price + modifier_price) * self.quantity
+        return from_cents(self.get_total_cents())
+
+    def to_list(self) -> List:
+        """Compact, JSON-safe representation of the line"""
+        return [self.name, str(self.price), self.quantity, list(self.modifiers), self.category,
+                self.description, str(self.modifier_price)]
+
+    @classmethod
+    def from_list(cls, fields: Sequence) -> 'CartItem':
+        """Rebuild a line from to_list output"""
+        name, price, quantity, modifiers, category, description, modifier_price = fields
+        return cls(name=name, price=price, quantity=quantity, modifiers=modifiers,
+                   category=category, description=description, modifier_price=modifier_price)
+
+    def line_key(self) -> Tuple:
+        """Identity of a cart line: same item at the same prices with the same modifiers"""
+        return (self.name, self.price_cents, self.modifier_cents, tuple(sorted(self.modifiers)))
+
+    def __eq__(self, other):
+        if not isinstance(other, CartItem):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return (f"CartItem(name={self.name!r}, price={self.price}, quantity={self.quantity}, "
+                f"modifiers={list(self.modifiers)}, modifier_price={self.modifier_price})")
 
 class ShoppingCart:
     def __init__(self):
         self.items: List[CartItem] = []
         self.pending_modifier: Optional[str] = None
-        self._total: Decimal = Decimal('0')
-        logger.info("New shopping cart created")
-        
-    def add_item(self, menu_item: Dict, quantity: int = 1, modifiers: List[str] = None):
-        """Add item to cart with modifiers"""
-        modifiers = modifiers or []
-        # Debug logging
-        logger.info(f"Adding to cart: {menu_item['item']} with modifiers: {modifiers}")
-        logger.info(f"Current cart contents before add: {[f'{item.name} (x{item.quantity})' for item in self.items]}")
+        self._total_cents = 0
+        # Cart lines by CartItem.line_key(), built once the cart outgrows a scan. Most carts
+        # hold one to three lines, where a scan is faster and the dict would more than
+        # double the cart's memory.
+        self._lines: Optional[Dict[Tuple, CartItem]] = None
+        logger.debug("New shopping cart created")
+
+    def _find_line(self, key: Tuple) -> Optional[CartItem]:
+        """The cart line with this line_key(), if any"""
+        if self._lines is None:
+            if len(self.items) <= LINE_INDEX_THRESHOLD:
+                # Compare names first so most lines never build a key
+                for item in self.items:
+                    if item.name == key[0] and item.line_key() == key:
+                        return item
+                return None
+            self._lines = {item.line_key(): item for item in self.items}
+        return self._lines.get(key)
         
-        base_price = Decimal(str(menu_item['price']))
+    def _add_line(self, menu_item: Dict, quantity: int, modifiers: List[str]) -> CartItem:
+        """Add one line or merge it into an identical one; returns the cart line"""
+        modifier_prices = menu_item.get('modifier_prices') or {}
         new_item = CartItem(
             name=menu_item['item'],
-            price=base_price,
+            price=menu_item['price'],
             quantity=quantity,
             modifiers=modifiers,
             category=menu_item.get('category', ''),
-            description=menu_item.get('description', '')
+            description=menu_item.get('description', ''),
+            modifier_price=from_cents(sum(
+                to_cents(modifier_prices.get(mod, DEFAULT_MODIFIER_PRICE)) for mod in modifiers
+            ))
         )
-        
-        # Check if identical item exists
-        for item in self.items:
-            if (item.name == new_item.name and
-                sorted(item.modifiers) == sorted(new_item.modifiers)):
-                item.quantity += quantity
-                logger.info(f"Updated existing item quantity. {item.name} now has quantity {item.quantity}")
-                break
-        else:
-            self.items.append(new_item)
-            logger.info(f"Added new item to cart: {new_item.name}")
-        
-        self._update_total()
-        logger.info(f"Cart contents after add: {[f'{item.name} (x{item.quantity})' for item in self.items]}")
-        logger.info(f"Cart total is now: ${self._total}")
+        self._total_cents += new_item.unit_cents() * quantity
+
+        # Identical lines (same item, price and modifiers, in case the menu changed) are merged
+        key = new_item.line_key()
+        item = self._find_line(key)
+        if item is not None:
+            item.quantity += quantity
+            return item
+        if self._lines is not None:
+            self._lines[key] = new_item
+        self.items.append(new_item)
+        return new_item
+
+    def add_item(self, menu_item: Dict, quantity: int = 1, modifiers: List[str] = None):
+        """Add item to cart with modifiers"""
+        item = self._add_line(menu_item, quantity, modifiers or [])
+        logger.info("Added %dx %s %s to cart (now x%d); cart total is now $%s",
+                    quantity, item.name, list(item.modifiers), item.quantity, self.get_total())
+
+    def add_items(self, menu_items: Iterable[Dict]):
+        """Add a whole parsed order; each item may carry 'quantity' and 'modifiers'"""
+        added = 0
+        for menu_item in menu_items:
+            quantity = menu_item.get('quantity', 1)
+            self._add_line(menu_item, quantity, list(menu_item.get('modifiers') or []))
+            added += quantity
+        logger.info("Added %d items to cart; %d lines, total $%s", added, len(self.items), self.get_total())
 
     def remove_item(self, index: int, quantity: int = 1) -> bool:
         """Remove item(s) from cart"""
         if 0 <= index < len(self.items):
-            logger.info(f"Removing {quantity}x {self.items[index].name} from cart")
-            if self.items[index].quantity <= quantity:
+            item = self.items[index]
+            logger.info("Removing %dx %s from cart", quantity, item.name)
+            removed = min(quantity, item.quantity)
+            if item.quantity <= quantity:
                 del self.items[index]
-                logger.info("Item completely removed from cart")
+                if self._lines is not None:
+                    del self._lines[item.line_key()]
+                logger.debug("Item completely removed from cart")
             else:
-                self.items[index].quantity -= quantity
-                logger.info(f"Item quantity reduced to {self.items[index].quantity}")
-            self._update_total()
+                item.quantity -= quantity
+                logger.debug("Item quantity reduced to %d", item.quantity)
+            self._total_cents -= item.unit_cents() * removed
             return True
         logger.info("Remove item failed: invalid index")
         return False
@@ -77,27 +173,31 @@ class ShoppingCart:
         """Clear all items from cart"""
         logger.info("Clearing cart")
         self.items = []
-        self._update_total()
+        self._lines = None
+        self._total_cents = 0
 
     def _update_total(self):
-        """Update cart total"""
-        self._total = sum(item.get_total_price() for item in self.items)
-        logger.info(f"Cart total updated to: ${self._total}")
+        """Recompute the cart total from scratch"""
+        self._total_cents = sum(item.get_total_cents() for item in self.items)
+        logger.debug("Cart total updated to: $%s", self.get_total())
+
+    def get_total_cents(self) -> int:
+        return self._total_cents
 
     def get_total(self) -> Decimal:
         """Get cart total"""
-        return self._total
+        return from_cents(self._total_cents)
 
     def get_summary(self) -> str:
         """Get formatted cart summary"""
         if not self.items:
             return "Your cart is empty!"
         
-        logger.info("Generating cart summary")
+        logger.debug("Generating cart summary")
         summary = ["Your Cart:"]
         for item in self.items:
             mod_text = f" with {', '.join(item.modifiers)}" if item.modifiers else ""
-            item_price = item.get_total_price() / item.quantity
+            item_price = from_cents(item.unit_cents())
             summary.append(f"{item.quantity}x {item.name}{mod_text} (${item_price:.2f} each)")
         summary.append(f"Total: ${self.get_total():.2f}")
         
@@ -112,4 +212,22 @@ class ShoppingCart:
     def is_empty(self) -> bool:
         """Check if cart is empty"""
         return len(self.items) == 0
+
+    def to_dict(self) -> Dict:
+        """Compact, JSON-safe representation of the cart"""
+        return {
+            'items': [item.to_list() for item in self.items],
+            'pending_modifier': self.pending_modifier
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ShoppingCart':
+        """Rebuild a cart from to_dict output"""
+        cart = cls()
+        for fields in data.get('items', []):
+            item = CartItem.from_list(fields)
+            cart.items.append(item)
+        cart.pending_modifier = data.get('pending_modifier')
+        cart._update_total()
+        return cart
     
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Lazily constructed API clients.
+
+Importing openai costs most of a second, so workers only pay for it when
+the first request actually needs the client. Every LLM call site shares one
+OpenAI client per process, backed by a bounded keep-alive httpx pool so
+bursts reuse warm connections instead of opening new TLS sessions. Outbound
+SMS goes through src/core/notifications.py.
+"""
+import importlib.util
+import logging
+import os
+import threading
+
+from src.core.config import (OPENAI_CONNECT_TIMEOUT, OPENAI_HTTP2, OPENAI_KEEPALIVE_EXPIRY,
+                             OPENAI_MAX_CONNECTIONS, OPENAI_READ_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_openai_client = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package; without it connections use HTTP/1.1 keep-alive"""
+    return importlib.util.find_spec('h2') is not None
+
+
+def build_http_client(max_connections: int = OPENAI_MAX_CONNECTIONS,
+                      connect_timeout: float = OPENAI_CONNECT_TIMEOUT,
+                      read_timeout: float = OPENAI_READ_TIMEOUT,
+                      keepalive_expiry: float = OPENAI_KEEPALIVE_EXPIRY,
+                      http2: bool = OPENAI_HTTP2):
+    """httpx client with a bounded keep-alive pool and explicit timeouts"""
+    import httpx
+    return httpx.Client(
+        http2=http2 and http2_available(),
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections,
+                            keepalive_expiry=keepalive_expiry),
+        # A full pool waits at most as long as a connect would
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout)
+    )
+
+
+def get_openai_client():
+    """Get the process-wide OpenAI client, creating it on first use"""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                _openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=build_http_client())
+                logger.info("OpenAI client created (%d pooled connections, http2=%s)",
+                            OPENAI_MAX_CONNECTIONS, OPENAI_HTTP2 and http2_available())
+    return _openai_client
+
+
+def _forget_clients():
+    """Drop clients inherited across fork; their pooled sockets belong to the parent"""
+    global _openai_client, _lock
+    _openai_client = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_clients)
@@ -1,3 +1,5 @@
+import json
+import os
 from decimal import Decimal
 from enum import Enum
 
@@ -9,23 +11,129 @@ class OrderStage(Enum):
     AWAITING_CARD = "awaiting_card"
     COMPLETED = "completed"
 
-MODIFIERS = {
-    'milk': {
-        'almond milk': Decimal('0.75'),
-        'oat milk': Decimal('0.75'),
-        'soy milk': Decimal('0.75')
-    }
+# Extra spellings customers use for modifiers, beyond the name and its short form
+MODIFIER_ALIASES = {
+    'oat milk': ['oatly']
 }
 
-MENU = {
-    1: {'item': 'Espresso', 'price': Decimal('3.50'), 'category': 'hot', 'description': 'Strong, pure coffee shot'},
-    2: {'item': 'Latte', 'price': Decimal('4.50'), 'category': 'hot', 'description': 'latte with steamed milk'},
-    3: {'item': 'Cappuccino', 'price': Decimal('4.50'), 'category': 'hot', 'description': 'Equal parts latte, steamed milk, and foam'},
-    4: {'item': 'Cold Brew', 'price': Decimal('4.50'), 'category': 'cold', 'description': '12-hour steeped coffee'},
-    5: {'item': 'Iced Latte', 'price': Decimal('4.50'), 'category': 'cold', 'description': 'latte over ice with cold milk'},
-    6: {'item': 'Croissant', 'price': Decimal('3.50'), 'category': 'food', 'description': 'Butter croissant'},
-    7: {'item': 'Muffin', 'price': Decimal('3.00'), 'category': 'food', 'description': 'Blueberry muffin'}
-}
+# Charged per modifier when a cart line carries no captured modifier price
+DEFAULT_MODIFIER_PRICE = Decimal('0.75')
+
+MENU_FILE = os.getenv('MENU_FILE', os.path.normpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'menu.json')
+))
+
+# Seconds between checks of MENU_FILE for changes; 0 disables the watcher
+MENU_RELOAD_INTERVAL = float(os.getenv('MENU_RELOAD_INTERVAL', 5))
+
+def load_menu_data(path: str):
+    """Read MENU and MODIFIERS from a JSON menu file"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    modifiers = {
+        mod_type: {name: Decimal(price) for name, price in mods.items()}
+        for mod_type, mods in data['modifiers'].items()
+    }
+    menu = {
+        int(menu_id): dict(item, price=Decimal(item['price']))
+        for menu_id, item in data['menu'].items()
+    }
+    return menu, modifiers
+
+MENU, MODIFIERS = load_menu_data(MENU_FILE)
 
 # Session timeout in minutes
-SESSION_TIMEOUT = 30 
\ No newline at end of file
+SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 30))
+
+# How often idle sessions are swept (seconds) and how long completed orders are kept (minutes)
+SESSION_SWEEP_INTERVAL = int(os.getenv('SESSION_SWEEP_INTERVAL', 60))
+COMPLETED_ORDER_RETENTION = int(os.getenv('COMPLETED_ORDER_RETENTION', 12 * 60)) 
+
+# Cache for LLM-rewritten responses
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 512))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))  # seconds
+
+# Latency budget for a single LLM call; the deterministic message is sent when it runs out
+LLM_TIMEOUT_MS = int(os.getenv('LLM_TIMEOUT_MS', 800))
+LLM_MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', 8))
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 1000))  # per call, before the completion
+
+# How replies are phrased per stage: 'default' or 'latency_critical' (no LLM on the payment path)
+RESPONSE_POLICY = os.getenv('RESPONSE_POLICY', 'default')
+
+# Connection pool under the shared OpenAI client; by default as many connections as LLM workers
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', LLM_MAX_WORKERS))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))  # seconds an idle connection is kept
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 2))
+OPENAI_READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', 10))
+OPENAI_HTTP2 = os.getenv('OPENAI_HTTP2', 'true').lower() == 'true'  # only used when the h2 package is installed
+
+# Where per-phone conversation state lives: memory://, sqlite:///sessions.db or redis://host:6379/0.
+# Only the shared backends are safe with more than one gunicorn worker. Paid orders reach
+# the other workers' STATUS, /orders and kitchen ETAs through ORDER_JOURNAL_PATH.
+SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'memory://')
+# In-process locks that keep each phone's messages in order when a worker runs several threads
+SESSION_LOCK_STRIPES = int(os.getenv('SESSION_LOCK_STRIPES', 64))
+# Logging: records are written by a background thread; files rotate by size and are gzipped.
+# LOG_FILE may contain {worker}, the worker's slot (0 .. WEB_CONCURRENCY-1, set by
+# gunicorn_config.py), or {pid}. The default gives each worker slot its own file, since
+# size-based rotation renames the file out from under any other process writing to it,
+# and a respawned worker reuses its slot's file, so restarts add no new files.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.getenv('LOG_FILE', 'logs/coffee_shop.{worker}.log')
+WORKER_SLOT = int(os.getenv('WORKER_SLOT', 0))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_DEBUG_SAMPLE_RATE = int(os.getenv('LOG_DEBUG_SAMPLE_RATE', 20))  # keep 1 in N DEBUG records
+
+# Outbound "order ready" SMS. TWILIO_API_BASE_URL can point at a local fake for testing.
+TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL', 'https://api.twilio.com')
+NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', 2))
+NOTIFY_MAX_PENDING = int(os.getenv('NOTIFY_MAX_PENDING', 1000))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', 4))
+NOTIFY_RATE_PER_SEC = float(os.getenv('NOTIFY_RATE_PER_SEC', 1))  # Twilio's per-number send rate, async replies included
+NOTIFY_BURST = int(os.getenv('NOTIFY_BURST', 5))
+
+# Acknowledge-then-reply /sms: the webhook only queues the message and returns empty TwiML;
+# workers process it and text the reply through the REST API. Needs the Twilio credentials.
+SMS_ASYNC = os.getenv('SMS_ASYNC', 'false').lower() == 'true'
+SMS_ASYNC_WORKERS = int(os.getenv('SMS_ASYNC_WORKERS', 8))
+SMS_ASYNC_MAX_PENDING = int(os.getenv('SMS_ASYNC_MAX_PENDING', 1000))
+# Acknowledged messages are answered before a worker exits, for at most this long (seconds).
+# Replies are only ordered per phone within one process, so SMS_ASYNC needs a single worker.
+SMS_ASYNC_DRAIN_TIMEOUT = float(os.getenv('SMS_ASYNC_DRAIN_TIMEOUT', 25))
+# Reject /sms requests without a valid X-Twilio-Signature (the public URL must match what Twilio calls)
+TWILIO_VALIDATE_SIGNATURE = os.getenv('TWILIO_VALIDATE_SIGNATURE', 'false').lower() == 'true'
+
+# Paid orders are appended here and replayed into memory at startup
+ORDER_JOURNAL_PATH = os.getenv('ORDER_JOURNAL_PATH', 'data/orders.jsonl')
+ORDER_JOURNAL_DURABLE = os.getenv('ORDER_JOURNAL_DURABLE', 'true').lower() == 'true'  # wait for fsync
+
+# Barista stations working in parallel and estimated prep time per item (seconds)
+KITCHEN_STATIONS = int(os.getenv('KITCHEN_STATIONS', 2))
+PREP_TIME_BY_CATEGORY = {'hot': 180, 'cold': 90, 'food': 45}
+PREP_TIMES = {
+    'Espresso': 60,
+    'Latte': 180,
+    'Cappuccino': 200,
+    'Cold Brew': 30,
+    'Iced Latte': 150,
+    'Croissant': 60,
+    'Muffin': 30
+}
+
+# GET /orders is only served when this bearer token is set
+ORDERS_API_TOKEN = os.getenv('ORDERS_API_TOKEN', '')
+
+# Per-stage timing histograms served on /metrics. With several workers, set METRICS_DIR
+# to a directory they share so every scrape sees all of them (gunicorn_config.py does this).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+# LLM usage accounting: dollars per 1K (prompt, completion) tokens by model
+LLM_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015)
+}
+LLM_USAGE_MAX_CONVERSATIONS = int(os.getenv('LLM_USAGE_MAX_CONVERSATIONS', 10000))
+LLM_USAGE_RECENT_ORDERS = int(os.getenv('LLM_USAGE_RECENT_ORDERS', 100))
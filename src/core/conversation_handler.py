@@ -3,77 +3,147 @@ from datetime import datetime
 import logging
 from typing import Dict, List, Optional
 import random
-from openai import OpenAI
+import re
+from src.core.clients import get_openai_client
+from src.core.response_cache import ResponseCache
+from src.core.llm import LLMDeadline, LLMTimeout, create_completion, record_cache_hit
+from src.core.menu_index import MenuIndex
+from src.core.prompts import PROMPTS, PromptBuilder, customer_lines
 
 logger = logging.getLogger(__name__)
 
+# Casual-chat intents, checked in order. Bare "hot"/"cold" are left out of weather
+# because they name drinks ("hot chocolate", "cold brew").
+CASUAL_PATTERNS = {
+    'greeting': ['hi', 'hiya', 'hello', 'hey', 'good morning', 'morning', 'afternoon', 'evening'],
+    'how_are_you': ['how are you', 'how you doing', "how's it going", 'how is it going'],
+    'thanks': ['thank you', 'thanks', 'thx', 'appreciate it'],
+    'busy': ['busy', 'quiet', 'long wait'],
+    'weather': ['weather', 'rain', 'raining', 'sunny', 'so hot', 'so cold', 'hot out', 'cold out'],
+}
+
+CASUAL_RESPONSES = {
+    'greeting': (
+        "Hey there! ☺️ What can I get started for you?",
+        "Welcome to Coffee S50! ✨ What are you in the mood for?",
+        "Hi! ☕ Text MENU to see what we've got, or just tell me your order."
+    ),
+    'how_are_you': (
+        "Doing great, thanks for asking! How can I help you today? ☺️",
+        "All good here! Ready to make your perfect drink! ✨"
+    ),
+    'thanks': (
+        "You're welcome! Enjoy! ☺️",
+        "My pleasure! Hope to see you again soon! ✨"
+    ),
+    'busy': (
+        "Just the usual rush, but we'll have your order ready in no time! ⚡",
+        "Not too bad! We'll get your order ready quick! ✨"
+    ),
+    'weather': (
+        "Perfect day for a coffee! What can I get you? ☀️",
+        "Great coffee weather! What are you in the mood for? ✨"
+    )
+}
+
+
+class IntentClassifier:
+    """Matches whole words and phrases, so "hi" does not fire inside "chai" or "this" """
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self._intents = [
+            (intent, re.compile(
+                r"\b(?:" + "|".join(
+                    r"\s+".join(re.escape(word) for word in phrase.split())
+                    for phrase in sorted(phrases, key=len, reverse=True)
+                ) + r")\b",
+                re.IGNORECASE
+            ))
+            for intent, phrases in patterns.items()
+        ]
+
+    def classify(self, message: str, menu_index: Optional[MenuIndex] = None) -> Optional[str]:
+        """First intent with a phrase in the message, or None.
+
+        With a menu index, a message that also names a menu item or modifier
+        ("hey can I get a latte", "latte, thanks") is an order, not chat.
+        """
+        if menu_index is not None:
+            items, match = menu_index.find_items(message)
+            if items or match.modifiers:
+                return None
+        for intent, pattern in self._intents:
+            if pattern.search(message):
+                return intent
+        return None
+
+
+INTENT_CLASSIFIER = IntentClassifier(CASUAL_PATTERNS)
+
+
 class ConversationHandler:
-    def __init__(self, openai_client: OpenAI):
-        self.client = openai_client
+    def __init__(self, openai_client=None, cache: Optional[ResponseCache] = None,
+                 deadline: Optional[LLMDeadline] = None, prompts: Optional[PromptBuilder] = None):
+        self._client = openai_client
+        self.cache = cache
+        self.deadline = deadline
+        self.prompts = prompts or PROMPTS
         self.customer_context = {}
         self.greeting_used = set()
         
+    @property
+    def client(self):
+        """OpenAI client, built on first use unless one was injected"""
+        if self._client is None:
+            self._client = get_openai_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        
     def get_friendly_response(self, base_message: str, customer_context: Dict, cart: Optional[Dict] = None, **kwargs) -> str:
         """Make responses more conversational while maintaining necessary info"""
         try:
             time_of_day = self._get_time_greeting()
             
-            # Format cart information if available
-            cart_info = ""
-            if cart:
-                cart_items = cart.get('items', [])
-                if cart_items:
-                    cart_info = "\nCurrent cart:\n"
-                    for item in cart_items:
-                        mods = f" with {', '.join(item.get('modifiers', []))}" if item.get('modifiers') else ""
-                        cart_info += f"- {item.get('quantity', 1)}x {item.get('name')}{mods}\n"
-                    cart_info += f"Total: ${cart.get('total', 0):.2f}"
+            cache_key = None
+            if self.cache is not None:
+                personal = tuple(line for _, line in customer_lines(customer_context))
+                cache_key = ResponseCache.make_key(base_message, time_of_day, cart, personal, **kwargs)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    record_cache_hit('get_friendly_response', "gpt-3.5-turbo")
+                    return cached
             
-            prompt = f"""You are a friendly, helpful barista.
-            Make this response conversational while keeping all important information.
-            Use max 1-2 emojis. Be concise but warm.
-            Time of day: {time_of_day}
-            Customer context: {customer_context}
-            Cart information: {cart_info}
-            Message to convey: {base_message}
-            Additional context: {kwargs}
-            Keep prices and important information clear while being friendly.
-            """
+            prompt = self.prompts.friendly(base_message, time_of_day, customer_context, cart, hints=kwargs)
             
-            response = self.client.chat.completions.create(
+            response = create_completion(
+                self.client,
+                'get_friendly_response',
+                deadline=self.deadline,
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": base_message}
-                ],
+                messages=prompt.messages,
                 temperature=0.7,
                 max_tokens=150
             )
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if cache_key is not None and content:
+                self.cache.set(cache_key, content)
+            return content
+        except LLMTimeout as e:
+            logger.warning("Sending base message: %s", e)
+            return base_message
         except Exception as e:
-            logger.error(f"Error generating friendly response: {e}")
+            logger.error("Error generating friendly response: %s", e)
             return base_message
 
-    def handle_chat(self, message: str, context: Optional[Dict] = None, cart: Optional[Dict] = None) -> Optional[str]:
-        """Handle casual conversation and questions"""
-        casual_patterns = {
-            'greeting': ['hi', 'hello', 'hey', 'good morning', 'morning', 'afternoon', 'evening'],
-            'how_are_you': ['how are you', 'how you doing', "how's it going"],
-            'thanks': ['thank you', 'thanks', 'appreciate it'],
-            'busy': ['busy', 'quiet', 'long wait'],
-            'weather': ['weather', 'hot', 'cold', 'rain', 'sunny'],
-        }
-        
-        message = message.lower()
-        # Check if message is just casual conversation
-        for category, patterns in casual_patterns.items():
-            if any(pattern in message for pattern in patterns):
-                return self.get_friendly_response(
-                    self._get_casual_response(category, context or {}),
-                    context or {},
-                    cart=cart
-                )
-        return None
+    def handle_chat(self, message: str, context: Optional[Dict] = None, cart: Optional[Dict] = None,
+                    menu_index: Optional[MenuIndex] = None) -> Optional[str]:
+        """Answer casual conversation from the canned pool, without an LLM call"""
+        category = INTENT_CLASSIFIER.classify(message, menu_index)
+        if category is None:
+            return None
+        return self._get_casual_response(category, context or {})
 
     def _get_time_greeting(self) -> str:
         """Get appropriate time-based greeting"""
@@ -87,26 +157,4 @@ class ConversationHandler:
 
     def _get_casual_response(self, category: str, context: Dict) -> str:
         """Get contextually appropriate casual response"""
-        responses = {
-            'greeting': [
-                "Hey there! ☺️ What can I get started for you?",
-                "Welcome to Coffee S50! ✨ What are you in the mood for?"
-            ],
-            'how_are_you': [
-                "Doing great, thanks for asking! How can I help you today? ☺️",
-                "All good here! Ready to make your perfect drink! ✨"
-            ],
-            'thanks': [
-                "You're welcome! Enjoy! ☺️",
-                "My pleasure! Hope to see you again soon! ✨"
-            ],
-            'busy': [
-                "Just the usual rush, but we'll have your order ready in no time! ⚡",
-                "Not too bad! We'll get your order ready quick! ✨"
-            ],
-            'weather': [
-                "Perfect day for a coffee! What can I get you? ☀️",
-                "Great coffee weather! What are you in the mood for? ✨"
-            ]
-        }
-        return random.choice(responses[category])
\ No newline at end of file
+        return random.choice(CASUAL_RESPONSES[category])
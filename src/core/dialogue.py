@@ -1,24 +1,47 @@
-from openai import OpenAI
-from decouple import config
 import logging
 import re
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from decimal import Decimal
+from src.core.clients import get_openai_client
+from src.core.llm import LLMDeadline, create_completion
+from src.core.menu_snapshot import MenuPublisher, MenuSnapshot, render_menu_for_ai
+from src.core.prompts import PROMPTS, PromptBuilder
 
 logger = logging.getLogger(__name__)
 
 class DialogueManager:
-    def __init__(self, menu=None, modifiers=None):
+    def __init__(self, menu=None, modifiers=None, deadline: Optional[LLMDeadline] = None,
+                 publisher: Optional[MenuPublisher] = None, openai_client=None,
+                 prompts: Optional[PromptBuilder] = None):
         try:
-            self.client = OpenAI(api_key=config('OPENAI_API_KEY'))
-            self.menu = menu or {}
-            self.modifiers = modifiers or {}
+            self._client = openai_client
+            self.deadline = deadline
+            self.prompts = prompts or PROMPTS
+            self.publisher = publisher or MenuPublisher(MenuSnapshot(menu or {}, modifiers or {}))
             self.conversation_context = {}
         except Exception as e:
-            logger.error(f"Error initializing DialogueManager: {e}")
+            logger.error("Error initializing DialogueManager: %s", e)
             raise
 
+    @property
+    def client(self):
+        """OpenAI client, built on first use unless one was injected"""
+        if self._client is None:
+            self._client = get_openai_client()
+        return self._client
+
+    @property
+    def snapshot(self) -> MenuSnapshot:
+        return self.publisher.current
+
+    @property
+    def menu(self):
+        return self.snapshot.menu
+
+    @property
+    def modifiers(self):
+        return self.snapshot.modifiers
+
     def process_message(self, message: str, phone_number: str, context: Dict, cart: Optional[Dict] = None) -> Tuple[str, Dict]:
         """Process message and maintain conversation context"""
         try:
@@ -41,7 +64,7 @@ class DialogueManager:
             return response, context
             
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            logger.error("Error processing message: %s", e)
             return "I'm having trouble understanding. Could you rephrase that? 😊", context
 
     def _handle_casual_chat(self, message: str) -> Optional[str]:
@@ -61,95 +84,37 @@ class DialogueManager:
     def get_ai_response(self, user_message: str, menu: Dict, context: Dict) -> str:
         """Get AI-generated response based on message and context"""
         try:
-            modifier_text = self._format_modifier_text()
             current_time = datetime.now().strftime("%H:%M")
-            
-            # Format cart information
-            cart_info = context.get('cart', {})
-            cart_items = []
-            if cart_info and 'items' in cart_info:
-                for item in cart_info['items']:
-                    mod_text = f" with {', '.join(item['modifiers'])}" if item.get('modifiers') else ""
-                    cart_items.append(f"- {item.get('quantity', 1)}x {item['name']}{mod_text}")
-            
-            cart_display = "\n".join(cart_items) if cart_items else "Empty"
-            cart_total = Decimal(str(cart_info.get('total', '0')))
-            
-            # Check if we're in modifier confirmation
-            pending_item = context.get('pending_item', {})
-            if pending_item:
-                pending_mod = pending_item.get('modifiers', [])[0] if pending_item.get('modifiers') else None
-                modifier_cost = Decimal('0.75')
-                potential_total = cart_total + pending_item.get('price', Decimal('0')) + modifier_cost
-            
-            system_message = f"""You are a friendly, helpful barista at a coffee shop. Current time: {current_time}
-
-            Current Cart:
-            {cart_display}
-            Current Total: ${cart_total:.2f}
-
-            Menu:
-            {self.format_menu_for_ai(menu)}
-            
-            Modifiers Available:
-            {modifier_text}
-            
-            Customer Context:
-            {context}
-            
-            Guidelines:
-            1. Be warm and friendly but concise (2-3 sentences max)
-            2. Use 1-2 emojis maximum
-            3. Always confirm prices and modifications clearly
-            4. Always acknowledge ALL items currently in cart when responding
-            5. Show running total including any modifiers
-            6. If asking about modifiers, mention current cart contents and potential total
-
-            Example good responses for modifier confirmation:
-            "I see you have a muffin ($3.00) in your cart. For the almond milk latte, there's a $0.75 charge for almond milk. Would you like to add it? Your total would be $8.25. ☕"
-            
-            Example good responses for regular orders:
-            "Added 1 latte ($3.50) to your cart. Your total is $3.50. Would you like to add any milk modifications? ☕"
-            """
-
-            response = self.client.chat.completions.create(
+            snapshot = self.snapshot
+            if menu is not snapshot.menu:
+                snapshot = MenuSnapshot(menu, snapshot.modifiers)
+            prompt = self.prompts.barista(snapshot, user_message, context, current_time)
+
+            response = create_completion(
+                self.client,
+                'get_ai_response',
+                deadline=self.deadline,
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=prompt.messages,
                 temperature=0.7,
                 max_tokens=150
             )
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error("OpenAI API error: %s", e)
             return "I'm having trouble understanding. Could you rephrase that? 😊"
 
     def extract_order_details(self, message: str) -> Dict:
         """Extract order details using AI"""
         try:
-            prompt = f"""Extract order details from this message. Include drink type, size, temperature, and any modifications.
-            
-            Available items: {[item['item'] for item in self.menu.values()]}
-            Available modifiers: {self._format_modifier_text()}
-            
-            Message: "{message}"
+            prompt = self.prompts.extract(self.snapshot, message)
             
-            Format response as JSON:
-            {{
-                "item": "item_name",
-                "modifiers": ["mod1", "mod2"],
-                "temperature": "hot/iced",
-                "special_instructions": "any special notes"
-            }}"""
-            
-            response = self.client.chat.completions.create(
+            response = create_completion(
+                self.client,
+                'extract_order_details',
+                deadline=self.deadline,
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": message}
-                ],
+                messages=prompt.messages,
                 temperature=0.3,
                 max_tokens=150
             )
@@ -160,41 +125,27 @@ class DialogueManager:
                 # Add validation logic here
                 return content
             except Exception as e:
-                logger.error(f"Error parsing order details: {e}")
+                logger.error("Error parsing order details: %s", e)
                 return {"item": None, "modifiers": []}
                 
         except Exception as e:
-            logger.error(f"Error extracting order details: {e}")
+            logger.error("Error extracting order details: %s", e)
             return {"item": None, "modifiers": []}
 
     def format_menu_for_ai(self, menu: Dict) -> str:
         """Format menu for AI prompt"""
+        snapshot = self.snapshot
+        if menu is snapshot.menu:
+            return snapshot.ai_menu_text
         try:
-            menu_text = ""
-            categories = {"hot": "Hot Drinks:", "cold": "Cold Drinks:", "food": "Food Items:"}
-            
-            for category in categories:
-                menu_text += f"\n{categories[category]}\n"
-                for id, item in menu.items():
-                    if item['category'] == category:
-                        menu_text += f"- {item['item']} (${item['price']:.2f}): {item['description']}\n"
-            return menu_text
+            return render_menu_for_ai(menu)
         except Exception as e:
-            logger.error(f"Error formatting menu: {e}")
+            logger.error("Error formatting menu: %s", e)
             return ""
 
     def _format_modifier_text(self) -> str:
         """Format modifier information"""
-        try:
-            modifier_text = ""
-            for mod_type, mods in self.modifiers.items():
-                modifier_text += f"\n{mod_type.title()}:\n"
-                for mod, price in mods.items():
-                    modifier_text += f"- {mod} (+${price:.2f})\n"
-            return modifier_text
-        except Exception as e:
-            logger.error(f"Error formatting modifiers: {e}")
-            return ""
+        return self.snapshot.modifier_text
 
     def _get_casual_response(self, intent: str) -> str:
         """Get appropriate casual response"""
@@ -14,3 +14,18 @@ class OrderStage(Enum):
     AWAITING_PAYMENT_CONFIRMATION = "awaiting_payment_confirmation"
     AWAITING_PAYMENT_RECEIPT = "awaiting_payment_receipt"
     AWAITING_PAYMENT_RECEIPT_CONFIRMATION = "awaiting_payment_receipt_confirmation"
+
+class ReplyKind(Enum):
+    CART_SUMMARY = "cart_summary"
+    MODIFIER_PROMPT = "modifier_prompt"
+    MILK_QUESTION = "milk_question"
+    PENDING_ITEMS = "pending_items"
+    PAYMENT_PROMPT = "payment_prompt"
+    PAYMENT_RESULT = "payment_result"
+    UNRECOGNIZED = "unrecognized"
+    CONFUSED = "confused"
+
+class ReplyMode(Enum):
+    VERBATIM = "verbatim"
+    TEMPLATE = "template"
+    LLM = "llm"
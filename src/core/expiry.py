@@ -0,0 +1,147 @@
+"""Time-ordered expiry for per-phone state"""
+import heapq
+import logging
+import sys
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A purge callback takes the current time and returns (entries evicted, bytes reclaimed)
+PurgeFn = Callable[[float], Tuple[int, int]]
+
+
+class ExpiryIndex:
+    """Min-heap of deadlines with lazy invalidation.
+
+    touch() pushes a fresh heap entry and leaves the old one behind; stale
+    entries are skipped when they surface, so pop_expired() only does work
+    proportional to what has actually expired. Safe to share between request
+    threads and the sweeper.
+    """
+    def __init__(self):
+        self._heap: List[Tuple[float, Hashable]] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, key: Hashable, deadline: float):
+        """Set or move a key's deadline"""
+        with self._lock:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+            # Keep stale entries from outgrowing the live ones
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(d, k) for k, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def discard(self, key: Hashable):
+        """Stop tracking a key"""
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def pop_expired(self, now: float) -> List[Hashable]:
+        """Remove and return every key whose deadline has passed"""
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    expired.append(key)
+        return expired
+
+    def deadline(self, key: Hashable):
+        return self._deadlines.get(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+
+def deep_sizeof(obj: Any, seen=None) -> int:
+    """Approximate bytes held by an object graph"""
+    if seen is None:
+        seen = set()
+    # Classes and enum members are shared singletons, not per-session memory
+    if id(obj) in seen or isinstance(obj, (type, Enum)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, slot), seen)
+                    for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+
+class SessionSweeper:
+    """Background thread that evicts expired per-phone state"""
+    def __init__(self, interval: float = 60.0, clock: Callable[[], float] = time.time):
+        self.interval = interval
+        self._clock = clock
+        self._targets: Dict[str, PurgeFn] = {}
+        self._gauges: Dict[str, Callable[[], int]] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.sweeps = 0
+        self.evicted: Dict[str, int] = {}
+        self.bytes_reclaimed: Dict[str, int] = {}
+
+    def register(self, name: str, purge: PurgeFn, live_count: Callable[[], int]):
+        """Add a structure to sweep and a way to count its live entries"""
+        self._targets[name] = purge
+        self._gauges[name] = live_count
+        self.evicted.setdefault(name, 0)
+        self.bytes_reclaimed.setdefault(name, 0)
+
+    def sweep(self) -> Dict[str, Tuple[int, int]]:
+        """Run one eviction pass over every registered structure"""
+        now = self._clock()
+        results = {}
+        for name, purge in self._targets.items():
+            try:
+                count, reclaimed = purge(now)
+            except Exception as e:
+                logger.error("Error sweeping %s: %s", name, e)
+                continue
+            self.evicted[name] += count
+            self.bytes_reclaimed[name] += reclaimed
+            results[name] = (count, reclaimed)
+        self.sweeps += 1
+        if any(count for count, _ in results.values()):
+            logger.info("Session sweep evicted %s; live: %s", results, self.live_counts())
+        return results
+
+    def live_counts(self) -> Dict[str, int]:
+        return {name: gauge() for name, gauge in self._gauges.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get live-session counts and cumulative eviction totals"""
+        return {
+            'live': self.live_counts(),
+            'evicted': dict(self.evicted),
+            'bytes_reclaimed': dict(self.bytes_reclaimed),
+            'sweeps': self.sweeps
+        }
+
+    def start(self):
+        """Start sweeping in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
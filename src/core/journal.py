@@ -0,0 +1,190 @@
+"""Append-only JSON-lines journal of completed orders"""
+import json
+import logging
+import mmap
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from src.core.order import Order
+
+logger = logging.getLogger(__name__)
+
+# Orders are appended in roughly creation order; how far out of order one can be
+SEEK_SLACK = 300  # seconds
+
+
+class OrderJournal:
+    """Durable log of every paid order, one JSON object per line.
+
+    Appends are group-committed: a single writer thread takes everything
+    queued since its last write, writes it with one write() and one fsync(),
+    then wakes the callers in that batch. A burst of orders therefore costs
+    one fsync instead of one each. With durable=False append() returns as
+    soon as the record is queued.
+    """
+    def __init__(self, path: str, durable: bool = True, max_batch: int = 1024):
+        self.path = path
+        self.durable = durable
+        self.max_batch = max_batch
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if not _ends_with_newline(path):
+            # Finish a line torn by a crash, so the next record does not get glued onto it
+            logger.warning("Journal %s ends in an incomplete record; starting a new line", path)
+            os.write(self._fd, b'\n')
+        # Everything before this offset is for replay(); read_new() picks up from here
+        self._read_offset = os.fstat(self._fd).st_size
+        self._read_lock = threading.Lock()
+        self._pending: List[bytes] = []
+        self._queued = 0    # records handed to append()
+        self._synced = 0    # records written and fsynced
+        self._cond = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._failed: List[range] = []  # sequence numbers whose batch could not be written
+        self._writer = threading.Thread(target=self._run, name='order-journal', daemon=True)
+        self._writer.start()
+
+    def append(self, order: Order, timeout: Optional[float] = 5.0) -> bool:
+        """Journal an order; with durable=True, wait until it is on disk"""
+        record = json.dumps(order.to_dict(), separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._cond:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._pending.append(record)
+            self._queued += 1
+            seq = self._queued
+            self._cond.notify_all()
+            if not self.durable:
+                return True
+            if not self._cond.wait_for(lambda: self._synced >= seq or self._closed, timeout):
+                logger.warning("Order %s not yet synced to journal after %ss", order.id, timeout)
+                return False
+            return not any(seq in failed for failed in self._failed)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            ok = True
+            try:
+                view = memoryview(b''.join(batch))
+                while view:
+                    view = view[os.write(self._fd, view):]
+                os.fsync(self._fd)
+            except OSError as e:
+                ok = False
+                logger.error("Order journal write failed for %d orders: %s", len(batch), e)
+            with self._cond:
+                if not ok:
+                    self._failed.append(range(self._synced + 1, self._synced + len(batch) + 1))
+                self._synced += len(batch)
+                self._batches += 1
+                self._cond.notify_all()
+
+    def replay(self, since: Optional[float] = None) -> Iterator[Order]:
+        """Orders in the journal, oldest first"""
+        return replay_journal(self.path, since)
+
+    def read_new(self) -> List[Order]:
+        """Complete records appended since the last call, by this or any other process"""
+        with self._read_lock:
+            with open(self.path, 'rb') as f:
+                f.seek(self._read_offset)
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            self._read_offset += end
+        orders = []
+        for line in data[:end].splitlines():
+            if not line:
+                continue
+            try:
+                orders.append(Order.from_dict(json.loads(line)))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Skipping bad journal record in %s: %s", self.path, e)
+        return orders
+
+    def close(self):
+        """Flush what is queued and stop the writer"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        os.close(self._fd)
+
+    def stats(self):
+        with self._cond:
+            return {'records': self._synced, 'batches': self._batches, 'pending': len(self._pending),
+                    'failed': sum(len(failed) for failed in self._failed)}
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def _created_at(line: bytes) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(json.loads(line)['created_at']).timestamp()
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _seek(data, since: float) -> int:
+    """Offset of the first line created at or after since, by binary search over line starts"""
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = data.rfind(b'\n', lo, mid) + 1 or lo
+        end = data.find(b'\n', start)
+        created = _created_at(data[start:end]) if end != -1 else None
+        if created is not None and created < since:
+            lo = end + 1
+        else:
+            # Unreadable lines count as new, so nothing recent is skipped
+            hi = start
+    return lo
+
+
+def replay_journal(path: str, since: Optional[float] = None) -> Iterator[Order]:
+    """Read orders back from a memory-mapped journal file.
+
+    With since, the search starts SEEK_SLACK seconds before it, so startup
+    does not parse orders that are long past retention; callers still filter
+    on created_at. A torn last line (from a crash mid-write) or a corrupt
+    line is skipped.
+    """
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start, size = 0, len(data)
+            if since is not None:
+                start = _seek(data, since - SEEK_SLACK)
+            decode, from_dict = json.JSONDecoder().decode, Order.from_dict
+            while start < size:
+                end = data.find(b'\n', start)
+                if end == -1:
+                    logger.warning("Ignoring incomplete last record in %s", path)
+                    return
+                if end == start:
+                    start += 1
+                    continue
+                try:
+                    yield from_dict(decode(data[start:end].decode('utf-8')))
+                except (ValueError, KeyError, TypeError) as e:  # includes JSON and UTF-8 errors
+                    logger.warning("Skipping bad journal record at byte %d of %s: %s", start, path, e)
+                start = end + 1
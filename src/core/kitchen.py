@@ -0,0 +1,112 @@
+"""Barista queue: pickup-time estimates from current load"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.config import KITCHEN_STATIONS, PREP_TIME_BY_CATEGORY, PREP_TIMES
+
+logger = logging.getLogger(__name__)
+
+
+class KitchenScheduler:
+    """Assigns paid orders to barista stations and predicts when each is ready.
+
+    Each station works through its orders one at a time. A new order goes to
+    the station that frees up first (a heap of station free times), starts
+    when that station is free and takes the sum of its items' prep times.
+    Orders waiting for pickup sit in a heap by ready time; ones whose time
+    has passed are dropped lazily, and complete() releases an order early.
+
+    The schedule lives in one process; with several gunicorn workers the app
+    restore()s the orders other workers journaled before scheduling a new one,
+    so every worker's ETAs count the whole shop. Nothing in the app calls
+    complete() yet, so stations are freed by the estimates alone.
+    """
+    def __init__(self, stations: int = KITCHEN_STATIONS, prep_times: Optional[Dict[str, float]] = None,
+                 category_times: Optional[Dict[str, float]] = None, clock: Callable[[], float] = time.time):
+        self.stations = stations
+        self.prep_times = PREP_TIMES if prep_times is None else prep_times
+        self.category_times = PREP_TIME_BY_CATEGORY if category_times is None else category_times
+        self._clock = clock
+        self._free_at: List[Tuple[float, int]] = [(0.0, station) for station in range(stations)]
+        self._station_last: Dict[int, str] = {}  # station -> id of the last order queued on it
+        self._queue: List[Tuple[float, int, str]] = []
+        self._orders: Dict[str, Tuple[float, int]] = {}  # order id -> (ready_at, station)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def prep_seconds(self, order) -> float:
+        """Estimated time for one barista to make everything in the order"""
+        return sum(
+            self.prep_times.get(item.name, self.category_times.get(item.category, 60)) * item.quantity
+            for item in order.items
+        )
+
+    def _drop_finished(self, now: float):
+        while self._queue and self._queue[0][0] <= now:
+            _, _, order_id = heapq.heappop(self._queue)
+            self._orders.pop(order_id, None)
+
+    def _assign(self, order_id: str, start_after: float, duration: float) -> float:
+        free_at, station = heapq.heappop(self._free_at)
+        ready_at = max(free_at, start_after) + duration
+        heapq.heappush(self._free_at, (ready_at, station))
+        self._station_last[station] = order_id
+        self._orders[order_id] = (ready_at, station)
+        heapq.heappush(self._queue, (ready_at, next(self._seq), order_id))
+        return ready_at
+
+    def schedule(self, order) -> datetime:
+        """Queue a paid order and return its estimated ready time"""
+        with self._lock:
+            now = self._clock()
+            self._drop_finished(now)
+            ready_at = self._assign(order.id, now, self.prep_seconds(order))
+            logger.info("Order %s queued; %d in queue, ready in %.0fs", order.id, len(self._orders), ready_at - now)
+        return datetime.fromtimestamp(ready_at)
+
+    def restore(self, order):
+        """Re-queue an order that was already promised a ready time (e.g. replayed after restart)"""
+        ready_at = order.estimated_ready.timestamp()
+        with self._lock:
+            now = self._clock()
+            if ready_at <= now or order.id in self._orders:
+                return
+            free_at, station = heapq.heappop(self._free_at)
+            heapq.heappush(self._free_at, (max(free_at, ready_at), station))
+            self._station_last[station] = order.id
+            self._orders[order.id] = (ready_at, station)
+            heapq.heappush(self._queue, (ready_at, next(self._seq), order.id))
+
+    def complete(self, order_id: str) -> bool:
+        """Mark an order handed over; frees its station if nothing was queued behind it"""
+        with self._lock:
+            entry = self._orders.pop(order_id, None)
+            if entry is None:
+                return False
+            _, station = entry
+            if self._station_last.get(station) == order_id:
+                now = self._clock()
+                self._free_at = [(min(free_at, now) if s == station else free_at, s) for free_at, s in self._free_at]
+                heapq.heapify(self._free_at)
+            return True
+
+    def queue_depth(self) -> int:
+        """Orders not yet ready"""
+        with self._lock:
+            self._drop_finished(self._clock())
+            return len(self._orders)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now = self._clock()
+            self._drop_finished(now)
+            return {
+                'stations': self.stations,
+                'queued': len(self._orders),
+                'next_free_in': max(0.0, self._free_at[0][0] - now) if self._free_at else 0.0
+            }
@@ -0,0 +1,115 @@
+"""Shared plumbing for OpenAI chat completions"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.core import metrics
+from src.core.llm_usage import LEDGER
+
+logger = logging.getLogger(__name__)
+
+
+class LLMTimeout(TimeoutError):
+    """Raised when a completion misses its latency budget"""
+
+
+class LLMDeadline:
+    """Runs LLM calls on a worker pool and stops waiting once the budget is spent.
+
+    A call that overruns is abandoned, not cancelled: when it eventually
+    finishes the result is logged and counted as a late completion, never used,
+    though the tokens it was billed for are still recorded.
+    """
+    def __init__(self, timeout_ms: int = 800, max_workers: int = 8):
+        self.timeout = timeout_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.timeouts = 0
+        self.late_completions = 0
+
+    def call(self, call_site: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn within the budget or raise LLMTimeout"""
+        started = time.monotonic()
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self.calls += 1
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            # Still queued behind other slow calls: drop it outright
+            if not future.cancel():
+                # Run the callback in this message's context so usage goes to its conversation
+                context = contextvars.copy_context()
+                model = kwargs.get('model', '')
+                future.add_done_callback(
+                    lambda done: context.run(self._record_late, call_site, model, started, done)
+                )
+            raise LLMTimeout(f"{call_site} exceeded {self.timeout * 1000:.0f} ms budget")
+
+    def _record_late(self, call_site: str, model: str, started: float, future):
+        """Log a completion that arrived after its caller gave up and record its usage"""
+        with self._lock:
+            self.late_completions += 1
+        elapsed = time.monotonic() - started
+        if future.exception() is not None:
+            logger.warning("Late LLM call from %s failed after %.0f ms: %s", call_site, elapsed * 1000, future.exception())
+            return
+        logger.warning("Late LLM completion from %s discarded after %.0f ms", call_site, elapsed * 1000)
+        prompt_tokens, completion_tokens = response_usage(future.result())
+        record_call(call_site, model, 'late', elapsed, prompt_tokens, completion_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get deadline counters"""
+        return {
+            'timeout_ms': int(self.timeout * 1000),
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'late_completions': self.late_completions
+        }
+
+
+def response_usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens a completion was billed for"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return 0, 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+def record_call(call_site: str, model: str, outcome: str, seconds: float = 0.0,
+                prompt_tokens: int = 0, completion_tokens: int = 0):
+    """Account for one LLM call in the usage ledger and the metrics"""
+    cost = LEDGER.record(call_site, model, outcome, prompt_tokens, completion_tokens, seconds)
+    metrics.observe_llm(call_site, outcome, seconds, prompt_tokens, completion_tokens, cost)
+
+
+def record_cache_hit(call_site: str, model: str):
+    """Account for a response served from cache instead of an LLM call"""
+    record_call(call_site, model, 'cached')
+
+
+def create_completion(client, call_site: str, deadline: Optional[LLMDeadline] = None, **params):
+    """Create a chat completion, bounded by the deadline when one is given"""
+    started = time.perf_counter()
+    outcome = 'error'
+    model = params.get('model', '')
+    prompt_tokens = completion_tokens = 0
+    try:
+        if deadline is None:
+            response = client.chat.completions.create(**params)
+        else:
+            response = deadline.call(call_site, client.chat.completions.create, **params)
+        outcome = 'ok'
+        prompt_tokens, completion_tokens = response_usage(response)
+        return response
+    except LLMTimeout:
+        outcome = 'timeout'
+        raise
+    finally:
+        record_call(call_site, model, outcome, time.perf_counter() - started, prompt_tokens, completion_tokens)
@@ -0,0 +1,161 @@
+"""Token, latency and cost accounting for LLM calls"""
+import contextvars
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from src.core.config import LLM_PRICES, LLM_USAGE_MAX_CONVERSATIONS, LLM_USAGE_RECENT_ORDERS
+
+logger = logging.getLogger(__name__)
+
+# Phone number of the conversation the current message belongs to
+_conversation: contextvars.ContextVar = contextvars.ContextVar('llm_conversation', default='')
+
+
+def set_conversation(phone_number: str):
+    """Charge the rest of this message's LLM calls to a conversation"""
+    _conversation.set(phone_number)
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int,
+              prices: Dict[str, Tuple[float, float]] = LLM_PRICES) -> float:
+    """Dollar cost of one call from per-1K-token (prompt, completion) prices.
+
+    A dated snapshot such as gpt-3.5-turbo-0125 is priced by the longest
+    configured model name it starts with.
+    """
+    price = prices.get(model)
+    if price is None:
+        matches = [name for name in prices if model.startswith(name)]
+        price = prices[max(matches, key=len)] if matches else (0.0, 0.0)
+    prompt_price, completion_price = price
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class Usage:
+    """Running totals for a set of LLM calls"""
+    __slots__ = ('calls', 'cached', 'failed', 'prompt_tokens', 'completion_tokens', 'cost', 'seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.cached = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.seconds = 0.0
+
+    def add(self, outcome: str, prompt_tokens: int, completion_tokens: int, cost: float, seconds: float):
+        # A late completion only adds the tokens of a call already counted as a timeout
+        if outcome != 'late':
+            self.calls += 1
+            if outcome == 'cached':
+                self.cached += 1
+            elif outcome != 'ok':
+                self.failed += 1
+            self.seconds += seconds
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+    def merge(self, other: 'Usage'):
+        for field in self.__slots__:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'cached': self.cached,
+            'failed': self.failed,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.prompt_tokens + self.completion_tokens,
+            'cost': round(self.cost, 6),
+            'seconds': round(self.seconds, 3)
+        }
+
+
+class UsageLedger:
+    """LLM usage per call site, per open conversation and per completed order.
+
+    Calls are charged to the conversation set with set_conversation(). When
+    that customer pays, close_order() (a PaymentHandler order listener) moves
+    the conversation's totals onto the order. Conversations that never order
+    are evicted oldest first beyond max_conversations; only the most recent
+    orders are kept individually, but every order counts towards the averages.
+    """
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_conversations: int = LLM_USAGE_MAX_CONVERSATIONS,
+                 recent_orders: int = LLM_USAGE_RECENT_ORDERS):
+        self.prices = LLM_PRICES if prices is None else prices
+        self.max_conversations = max_conversations
+        self.total = Usage()
+        self._by_call_site: Dict[str, Usage] = {}
+        self._by_model: Dict[str, Usage] = {}
+        self._conversations: 'OrderedDict[str, Usage]' = OrderedDict()
+        self._order_totals = Usage()
+        self._orders = 0
+        self._recent: Deque[Dict] = deque(maxlen=recent_orders)
+        self._lock = threading.Lock()
+
+    def record(self, call_site: str, model: str, outcome: str, prompt_tokens: int = 0,
+               completion_tokens: int = 0, seconds: float = 0.0) -> float:
+        """Account for one call (outcome ok, cached, timeout, error or late); returns its cost"""
+        cost = call_cost(model, prompt_tokens, completion_tokens, self.prices)
+        conversation = _conversation.get()
+        with self._lock:
+            entries = [self.total,
+                       self._by_call_site.setdefault(call_site, Usage()),
+                       self._by_model.setdefault(model, Usage())]
+            if conversation:
+                usage = self._conversations.pop(conversation, None) or Usage()
+                self._conversations[conversation] = usage
+                entries.append(usage)
+                while len(self._conversations) > self.max_conversations:
+                    self._conversations.popitem(last=False)
+            for usage in entries:
+                usage.add(outcome, prompt_tokens, completion_tokens, cost, seconds)
+        return cost
+
+    def conversation(self, phone_number: str) -> Dict:
+        """Totals for a customer's calls since their last order"""
+        with self._lock:
+            usage = self._conversations.get(phone_number)
+            return (usage or Usage()).to_dict()
+
+    def close_order(self, order):
+        """Attribute the customer's conversation so far to a completed order"""
+        with self._lock:
+            usage = self._conversations.pop(order.phone_number, None) or Usage()
+            self._orders += 1
+            self._order_totals.merge(usage)
+            self._recent.append(dict(usage.to_dict(), order_id=order.id))
+        logger.info("Order %s used %d LLM calls, %d tokens, $%.4f", order.id, usage.calls,
+                    usage.prompt_tokens + usage.completion_tokens, usage.cost)
+
+    def report(self) -> Dict:
+        """Usage by call site (most expensive first), by model and per completed order"""
+        with self._lock:
+            orders = self._orders
+            per_order = self._order_totals
+            return {
+                'total': self.total.to_dict(),
+                'by_call_site': {
+                    site: usage.to_dict()
+                    for site, usage in sorted(self._by_call_site.items(), key=lambda kv: -kv[1].cost)
+                },
+                'by_model': {model: usage.to_dict() for model, usage in self._by_model.items()},
+                'open_conversations': len(self._conversations),
+                'orders': {
+                    'completed': orders,
+                    'calls_per_order': per_order.calls / orders if orders else 0.0,
+                    'tokens_per_order': (per_order.prompt_tokens + per_order.completion_tokens) / orders
+                    if orders else 0.0,
+                    'cost_per_order': per_order.cost / orders if orders else 0.0,
+                    'recent': list(self._recent)
+                }
+            }
+
+
+LEDGER = UsageLedger()
@@ -0,0 +1,75 @@
+"""Striped per-key locks for threaded workers.
+
+Keys (phone numbers) hash onto a fixed number of stripes, so memory stays
+flat however many customers text in, while different customers rarely share
+a stripe and run in parallel. Each stripe is a ticket lock: waiters are let
+in strictly in the order they arrived, so two quick messages from one phone
+are handled in the order the worker received them.
+"""
+import logging
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class FairLock:
+    """Non-reentrant lock granted in FIFO order"""
+    __slots__ = ('_cond', '_next_ticket', '_serving')
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._next_ticket = 0
+        self._serving = 0
+
+    def acquire(self) -> bool:
+        """Take the lock; True when it had to wait for another holder"""
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            contended = ticket != self._serving
+            while ticket != self._serving:
+                self._cond.wait()
+        return contended
+
+    def release(self):
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+
+
+class StripedLock:
+    """Maps each key onto one of `stripes` FairLocks"""
+    def __init__(self, stripes: int = 64):
+        self.stripes = max(1, stripes)
+        self._locks: List[FairLock] = [FairLock() for _ in range(self.stripes)]
+        self._lock = threading.Lock()
+        self._counts = {'acquired': 0, 'contended': 0}
+        self._wait_seconds = 0.0
+
+    def stripe(self, key: str) -> int:
+        return zlib.crc32(key.encode('utf-8')) % self.stripes
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        """Hold the key's stripe for the duration of the block"""
+        lock = self._locks[self.stripe(key)]
+        start = time.perf_counter()
+        contended = lock.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._counts['acquired'] += 1
+            if contended:
+                self._counts['contended'] += 1
+                self._wait_seconds += waited
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counts, stripes=self.stripes, wait_seconds=round(self._wait_seconds, 6))
@@ -0,0 +1,129 @@
+"""Precompiled lookup tables for matching menu items in a message"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.config import MODIFIER_ALIASES
+
+# Words are runs of letters/digits; hyphens and apostrophes stay inside a
+# word so "12-hour" is never read as item 12
+_TOKEN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+_ICED_WORDS = frozenset(('iced', 'cold'))
+_END = object()
+
+
+def tokenize(message: str) -> List[str]:
+    """Split a message into lowercase words"""
+    return _TOKEN.findall(message.lower())
+
+
+class MenuMatch:
+    """Everything one scan of a message found"""
+    __slots__ = ('ids', 'name_words', 'modifiers', 'is_iced')
+
+    def __init__(self):
+        self.ids: Set[int] = set()
+        self.name_words: Dict[int, Set[str]] = {}
+        self.modifiers: Set[str] = set()
+        self.is_iced = False
+
+
+class MenuIndex:
+    """Menu and modifier index built once, matched in one pass over the words.
+
+    Numeric IDs only match whole words, item names match when all of their
+    words appear in the message, and modifier phrases (including short forms
+    like "oat" or aliases like "oatly") are found with a word trie.
+    """
+    def __init__(self, menu: Dict[int, Dict[str, Any]], modifiers: Dict[str, Dict[str, Any]],
+                 aliases: Optional[Dict[str, Iterable[str]]] = None):
+        self.menu = menu
+        aliases = MODIFIER_ALIASES if aliases is None else aliases
+
+        self._ids = {str(menu_id): menu_id for menu_id in menu}
+        self._order = {menu_id: rank for rank, menu_id in enumerate(menu)}
+
+        self._item_words: Dict[int, frozenset] = {}
+        self._word_items: Dict[str, List[int]] = {}
+        names = {}
+        for menu_id, item in menu.items():
+            words = frozenset(word for word in tokenize(item['item']) if word != 'with')
+            self._item_words[menu_id] = words
+            for word in words:
+                self._word_items.setdefault(word, []).append(menu_id)
+            names[item['item'].lower()] = menu_id
+
+        # Plain drinks that have an "Iced ..." counterpart on the menu
+        self._iced_variant: Dict[int, int] = {}
+        self._iced_items: Set[int] = set()
+        for name, menu_id in names.items():
+            iced_id = names.get(f"iced {name}")
+            if iced_id is not None:
+                self._iced_variant[menu_id] = iced_id
+                self._iced_items.add(iced_id)
+
+        self._modifier_rank: Dict[str, int] = {}
+        self._trie: Dict = {}
+        self._max_phrase = 0
+        for mod_type, mods in modifiers.items():
+            for mod_name in mods:
+                self._modifier_rank[mod_name] = len(self._modifier_rank)
+                variations = {mod_name, *aliases.get(mod_name, ())}
+                short = mod_name[:-len(mod_type)].strip() if mod_name.endswith(f" {mod_type}") else ''
+                if short:
+                    variations.add(short)
+                for variation in variations:
+                    self._add_phrase(tokenize(variation), mod_name)
+
+    def _add_phrase(self, words: List[str], mod_name: str):
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_END] = mod_name
+        self._max_phrase = max(self._max_phrase, len(words))
+
+    def scan(self, message: str) -> MenuMatch:
+        """Collect IDs, item-name words, modifiers and iced hints in one pass"""
+        match = MenuMatch()
+        words = tokenize(message)
+        for position, word in enumerate(words):
+            menu_id = self._ids.get(word)
+            if menu_id is not None:
+                match.ids.add(menu_id)
+            if word in _ICED_WORDS:
+                match.is_iced = True
+            for item_id in self._word_items.get(word, ()):
+                match.name_words.setdefault(item_id, set()).add(word)
+            node = self._trie
+            for offset in range(self._max_phrase):
+                node = node.get(words[position + offset]) if position + offset < len(words) else None
+                if node is None:
+                    break
+                if _END in node:
+                    match.modifiers.add(node[_END])
+        return match
+
+    def ordered_modifiers(self, modifiers: Set[str]) -> List[str]:
+        """Modifiers in menu-definition order"""
+        return sorted(modifiers, key=self._modifier_rank.__getitem__)
+
+    def find_items(self, message: str) -> Tuple[List[int], MenuMatch]:
+        """Menu IDs referenced by the message; numeric references win over names"""
+        match = self.scan(message)
+        if match.ids:
+            return sorted(match.ids, key=self._order.__getitem__), match
+        found = []
+        for item_id, seen in match.name_words.items():
+            if len(seen) != len(self._item_words[item_id]):
+                continue
+            if match.is_iced and item_id in self._iced_variant:
+                continue
+            if not match.is_iced and item_id in self._iced_items:
+                continue
+            found.append(item_id)
+        return sorted(found, key=self._order.__getitem__), match
+
+    def resolve(self, menu_id: int, is_iced: bool) -> int:
+        """Swap a drink for its iced version when the customer asked for it cold"""
+        if is_iced:
+            return self._iced_variant.get(menu_id, menu_id)
+        return menu_id
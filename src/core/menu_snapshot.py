@@ -0,0 +1,181 @@
+"""Immutable menu snapshots and the text rendered from them"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import signal
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional
+
+from src.core.config import load_menu_data
+from src.core.menu_index import MenuIndex
+
+logger = logging.getLogger(__name__)
+
+MENU_CATEGORIES = {"hot": "Hot Drinks:", "cold": "Cold Drinks:", "food": "Food Items:"}
+
+
+def render_menu_message(menu: Mapping) -> str:
+    """SMS menu listing"""
+    lines = ["Welcome to Coffee S50! Order by number or name:\n"]
+    for key, item in menu.items():
+        lines.append(f"{key}. {item['item']} (${item['price']:.2f})")
+        lines.append(f"   {item['description']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_menu_for_ai(menu: Mapping) -> str:
+    """Menu grouped by category for LLM prompts"""
+    parts = []
+    for category, heading in MENU_CATEGORIES.items():
+        parts.append(f"\n{heading}\n")
+        for item in menu.values():
+            if item['category'] == category:
+                parts.append(f"- {item['item']} (${item['price']:.2f}): {item['description']}\n")
+    return "".join(parts)
+
+
+def render_modifier_text(modifiers: Mapping) -> str:
+    """Modifier price list for LLM prompts"""
+    parts = []
+    for mod_type, mods in modifiers.items():
+        parts.append(f"\n{mod_type.title()}:\n")
+        for mod, price in mods.items():
+            parts.append(f"- {mod} (+${price:.2f})\n")
+    return "".join(parts)
+
+
+def menu_version(menu: Mapping, modifiers: Mapping) -> str:
+    """Content hash that changes whenever any item, price or modifier does"""
+    canonical = json.dumps(
+        {'menu': [[key, dict(item)] for key, item in menu.items()],
+         'modifiers': {mod_type: dict(mods) for mod_type, mods in modifiers.items()}},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+class RenderedPage(NamedTuple):
+    """A page rendered once and served as-is"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+def render_page(html: str, version: str) -> RenderedPage:
+    """Encode, compress and tag a rendered page"""
+    body = html.encode('utf-8')
+    digest = hashlib.sha1(body).hexdigest()[:8]
+    return RenderedPage(body, gzip.compress(body, compresslevel=9), f"{version}-{digest}")
+
+
+class MenuSnapshot:
+    """Read-only copy of the menu with its matcher index and renderings built once per version"""
+    def __init__(self, menu: Mapping, modifiers: Mapping):
+        self.menu = MappingProxyType({key: MappingProxyType(dict(item)) for key, item in menu.items()})
+        self.modifiers = MappingProxyType({
+            mod_type: MappingProxyType(dict(mods)) for mod_type, mods in modifiers.items()
+        })
+        self.version = menu_version(self.menu, self.modifiers)
+        self.menu_message = render_menu_message(self.menu)
+        self.ai_menu_text = render_menu_for_ai(self.menu)
+        self.modifier_text = render_modifier_text(self.modifiers)
+        self.index = MenuIndex(self.menu, self.modifiers)
+        self.modifier_prices = MappingProxyType({
+            name: price for mods in self.modifiers.values() for name, price in mods.items()
+        })
+        self._artifacts: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def artifact(self, name: str, build: Callable[['MenuSnapshot'], Any]) -> Any:
+        """Build an extra rendering on first use and reuse it for this version"""
+        value = self._artifacts.get(name)
+        if value is None:
+            with self._lock:
+                value = self._artifacts.get(name)
+                if value is None:
+                    value = build(self)
+                    self._artifacts[name] = value
+        return value
+
+
+class MenuPublisher:
+    """Holds the current menu snapshot and swaps in new versions atomically.
+
+    Readers take ``publisher.current`` once per request and keep using that
+    snapshot, so a reload never changes the menu halfway through a message.
+    When built from a file, the menu is reloaded when the file changes
+    (see watch()) or when the worker receives SIGHUP.
+    """
+    def __init__(self, snapshot: MenuSnapshot, path: Optional[str] = None):
+        self._current = snapshot
+        self.path = path
+        self._mtime = os.stat(path).st_mtime_ns if path else None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[MenuSnapshot], None]] = []
+        self._watcher = None
+
+    @classmethod
+    def from_file(cls, path: str) -> 'MenuPublisher':
+        menu, modifiers = load_menu_data(path)
+        return cls(MenuSnapshot(menu, modifiers), path=path)
+
+    @property
+    def current(self) -> MenuSnapshot:
+        return self._current
+
+    def subscribe(self, listener: Callable[[MenuSnapshot], None]):
+        """Call listener with every newly published snapshot"""
+        self._listeners.append(listener)
+
+    def publish(self, snapshot: MenuSnapshot) -> bool:
+        """Make a snapshot current; returns False if the version is unchanged"""
+        if snapshot.version == self._current.version:
+            return False
+        previous, self._current = self._current, snapshot
+        logger.info("Published menu version %s (was %s)", snapshot.version, previous.version)
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error("Menu listener failed: %s", e)
+        return True
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild from the menu file if it changed; a bad file keeps the current menu"""
+        if not self.path:
+            return False
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime and not force:
+                    return False
+                menu, modifiers = load_menu_data(self.path)
+                snapshot = MenuSnapshot(menu, modifiers)
+            except Exception as e:
+                logger.error("Error reloading menu from %s: %s", self.path, e)
+                return False
+            self._mtime = mtime
+            return self.publish(snapshot)
+
+    def watch(self, interval: float):
+        """Poll the menu file for changes in a daemon thread"""
+        if not self.path or interval <= 0 or self._watcher is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=run, name='menu-watcher', daemon=True)
+        self._watcher.start()
+
+    def install_signal_handler(self, signum: int = signal.SIGHUP):
+        """Reload on a signal; only possible from the main thread"""
+        try:
+            signal.signal(signum, lambda *_: threading.Thread(target=self.reload, args=(True,)).start())
+        except ValueError:
+            logger.warning("Menu reload signal handler not installed outside the main thread")
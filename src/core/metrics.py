@@ -0,0 +1,286 @@
+"""Request timing histograms exposed in Prometheus text format.
+
+Each worker keeps its own counters. When METRICS_DIR is set, a background
+thread periodically writes the worker's snapshot to METRICS_DIR/<pid>.json
+and /metrics sums every worker's file, so a scrape that lands on any worker
+sees the whole server. Files of exited workers are kept so totals never go
+backwards.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.core.config import METRICS_DIR, METRICS_ENABLED, METRICS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# OrderStage (or command) of the message being handled, used as the default stage label
+_stage: contextvars.ContextVar = contextvars.ContextVar('metrics_stage', default='none')
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            series = [[list(labels), list(counts), total, count]
+                      for labels, (counts, total, count) in self._series.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'buckets': list(self.buckets), 'series': series}
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            series = [[list(labels), value] for labels, value in self._values.items()]
+        return {'type': self.kind, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'series': series}
+
+
+class Registry:
+    """All metrics of one worker"""
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def merge_snapshots(snapshots: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Sum snapshots from several workers"""
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, series={}))
+            for entry in metric['series']:
+                labels = tuple(entry[0])
+                if metric['type'] == 'histogram':
+                    counts, total, count = entry[1:]
+                    current = target['series'].get(labels)
+                    if current is None:
+                        target['series'][labels] = [list(counts), total, count]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], counts)]
+                        current[1] += total
+                        current[2] += count
+                else:
+                    target['series'][labels] = target['series'].get(labels, 0) + entry[1]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def render(merged: Dict[str, Dict]) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric['labelnames']
+        for labels, value in sorted(metric['series'].items()):
+            if metric['type'] == 'histogram':
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(list(metric['buckets']) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {total}")
+                lines.append(f"{name}_count{_labels(names, labels)} {count}")
+            else:
+                lines.append(f"{name}{_labels(names, labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'coffee_sms_request_seconds', "Time to answer one /sms webhook", ['stage']))
+STEP_SECONDS = REGISTRY.register(Histogram(
+    'coffee_sms_step_seconds', "Time spent in one step of handling a message", ['stage', 'step']))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    'coffee_llm_call_seconds', "Latency of LLM calls by call site and outcome", ['call_site', 'outcome']))
+LLM_TOKENS = REGISTRY.register(Counter(
+    'coffee_llm_tokens_total', "Tokens used by LLM calls", ['call_site', 'kind']))
+LLM_COST = REGISTRY.register(Counter(
+    'coffee_llm_cost_dollars_total', "Estimated cost of LLM calls", ['call_site']))
+REPLIES = REGISTRY.register(Counter(
+    'coffee_sms_replies_total', "Replies by stage, kind and how they were phrased", ['stage', 'kind', 'mode']))
+
+
+class _Span:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, _stage.get(), *self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(step: str):
+    """Time a step of the current message, labelled with its stage"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(STEP_SECONDS, (step,))
+
+
+def request_span():
+    """Time a whole /sms request, labelled with the stage it ended up in"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(REQUEST_SECONDS, ())
+
+
+def set_stage(stage: str):
+    """Label the rest of this message's spans with an OrderStage value or command"""
+    _stage.set(stage)
+
+
+def current_stage() -> str:
+    """The stage label set for the message being handled"""
+    return _stage.get()
+
+
+def observe_reply(kind: str, mode: str):
+    if METRICS_ENABLED:
+        REPLIES.inc(1, _stage.get(), kind, mode)
+
+
+def observe_llm(call_site: str, outcome: str, seconds: float, prompt_tokens: int = 0,
+                completion_tokens: int = 0, cost: float = 0.0):
+    if not METRICS_ENABLED:
+        return
+    LLM_SECONDS.observe(seconds, call_site, outcome)
+    if prompt_tokens or completion_tokens:
+        LLM_TOKENS.inc(prompt_tokens, call_site, 'prompt')
+        LLM_TOKENS.inc(completion_tokens, call_site, 'completion')
+        LLM_COST.inc(cost, call_site)
+
+
+class MetricsExporter:
+    """Shares this worker's snapshot through a directory and merges all workers'"""
+    def __init__(self, registry: Registry = REGISTRY, directory: str = METRICS_DIR,
+                 interval: float = METRICS_FLUSH_INTERVAL):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def flush(self):
+        """Write this worker's snapshot atomically"""
+        if not self.directory:
+            return
+        tmp = f"{self._path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.registry.snapshot(), f, separators=(',', ':'))
+        os.replace(tmp, self._path)
+
+    def start(self):
+        if not self.directory or self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning("Could not write metrics snapshot: %s", e)
+
+        self._thread = threading.Thread(target=run, name='metrics-exporter', daemon=True)
+        self._thread.start()
+
+    def collect(self) -> str:
+        """Merged exposition text for every worker"""
+        snapshots = [self.registry.snapshot()]
+        if self.directory:
+            own = os.path.basename(self._path)
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json') or name == own:
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning("Skipping metrics file %s: %s", name, e)
+        return render(merge_snapshots(snapshots))
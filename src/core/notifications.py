@@ -0,0 +1,243 @@
+"""Outbound "order ready" SMS sent from background workers"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationError(Exception):
+    """A send failed; retryable errors are tried again with backoff"""
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TokenBucket:
+    """Allow `rate` sends per second with bursts of up to `burst`"""
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        """Take a token if one is available, otherwise return how long until one is"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a send is allowed"""
+        while True:
+            wait = self._wait_time()
+            if not wait:
+                return
+            self._sleep(wait)
+
+
+class TwilioSender:
+    """Sends SMS through the Twilio REST API over one pooled keep-alive HTTP client"""
+    def __init__(self, account_sid: str, auth_token: str, from_number: str,
+                 base_url: str = 'https://api.twilio.com', timeout: float = 10.0, max_connections: int = 4):
+        self.account_sid = account_sid
+        self.from_number = from_number
+        self._auth = (account_sid, auth_token)
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def http(self):
+        """httpx client, created on the first send"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    self._client = httpx.Client(
+                        base_url=self._base_url, auth=self._auth, timeout=self._timeout,
+                        limits=httpx.Limits(max_connections=self._max_connections,
+                                            max_keepalive_connections=self._max_connections)
+                    )
+        return self._client
+
+    def send(self, to: str, body: str) -> str:
+        """Send one message and return its Twilio SID"""
+        import httpx
+        try:
+            response = self.http.post(
+                f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                data={'To': to, 'From': self.from_number, 'Body': body}
+            )
+        except httpx.HTTPError as e:
+            raise NotificationError(f"Twilio request failed: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise NotificationError(f"Twilio returned {response.status_code}")
+        if response.status_code >= 400:
+            raise NotificationError(f"Twilio rejected message: {response.status_code} {response.text}",
+                                    retryable=False)
+        return response.json().get('sid', '')
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+class _Notification:
+    __slots__ = ('order_id', 'phone', 'body', 'attempts', 'cancelled')
+
+    def __init__(self, order_id: str, phone: str, body: str):
+        self.order_id = order_id
+        self.phone = phone
+        self.body = body
+        self.attempts = 0
+        self.cancelled = False
+
+
+class OrderNotifier:
+    """Queues one "order ready" SMS per order and sends it when the order is due.
+
+    notify_ready() only pushes onto a heap, so the webhook thread never waits
+    on Twilio. A fixed pool of worker threads pops due notifications, waits
+    for the account's rate limiter and sends; retryable failures are put back
+    on the heap with exponential backoff.
+    """
+    def __init__(self, sender: TwilioSender, workers: int = 2, max_pending: int = 1000,
+                 max_attempts: int = 4, backoff: float = 1.0, rate_limiter: Optional[TokenBucket] = None,
+                 clock: Callable[[], float] = time.time):
+        self.sender = sender
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self._clock = clock
+        self._heap: List = []
+        self._pending: Dict[str, _Notification] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._counts = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'dropped': 0}
+
+    @staticmethod
+    def ready_message(order) -> str:
+        return f"Your order #{order.id} is ready for pickup! See you soon ☕"
+
+    def notify_ready(self, order, when: Optional[float] = None) -> bool:
+        """Queue the ready message for an order (once per Order.id); never blocks on sending"""
+        due = when if when is not None else order.estimated_ready.timestamp()
+        with self._cond:
+            if order.id in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._counts['dropped'] += 1
+                logger.warning("Notification queue full; dropping ready message for order %s", order.id)
+                return False
+            notification = _Notification(order.id, order.phone_number, self.ready_message(order))
+            self._pending[order.id] = notification
+            heapq.heappush(self._heap, (due, next(self._seq), notification))
+            self._counts['queued'] += 1
+            self._cond.notify()
+        return True
+
+    def cancel(self, order_id: str) -> bool:
+        """Drop a queued notification that has not been sent yet"""
+        with self._cond:
+            notification = self._pending.pop(order_id, None)
+            if notification is None:
+                return False
+            notification.cancelled = True
+            return True
+
+    def _next_due(self) -> Optional[_Notification]:
+        """Wait for the earliest notification to come due; None once stopped"""
+        with self._cond:
+            while self._running:
+                if self._heap:
+                    due, _, notification = self._heap[0]
+                    if notification.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = due - self._clock()
+                    if delay <= 0:
+                        heapq.heappop(self._heap)
+                        return notification
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+        return None
+
+    def _deliver(self, notification: _Notification):
+        notification.attempts += 1
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        try:
+            sid = self.sender.send(notification.phone, notification.body)
+        except NotificationError as e:
+            with self._cond:
+                if e.retryable and notification.attempts < self.max_attempts and not notification.cancelled:
+                    retry_at = self._clock() + self.backoff * 2 ** (notification.attempts - 1)
+                    heapq.heappush(self._heap, (retry_at, next(self._seq), notification))
+                    self._counts['retried'] += 1
+                    self._cond.notify()
+                    logger.warning("Ready message for order %s failed (%s); retry %d",
+                                   notification.order_id, e, notification.attempts)
+                    return
+                self._pending.pop(notification.order_id, None)
+                self._counts['failed'] += 1
+            logger.error("Giving up on ready message for order %s: %s", notification.order_id, e)
+            return
+        with self._cond:
+            self._pending.pop(notification.order_id, None)
+            self._counts['sent'] += 1
+        logger.info("Sent ready message for order %s (%s)", notification.order_id, sid)
+
+    def _run(self):
+        while True:
+            notification = self._next_due()
+            if notification is None:
+                return
+            try:
+                self._deliver(notification)
+            except Exception as e:
+                logger.error("Notification worker error for order %s: %s", notification.order_id, e)
+
+    def start(self):
+        """Start the worker threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'notifier-{n}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; anything still queued is left unsent"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.sender.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._counts, pending=len(self._pending))
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
+from decimal import Decimal
 import uuid
+from src.core.cart import CartItem
 from src.core.enums import OrderStage
 
 class OrderQueue:
@@ -23,9 +25,21 @@ class OrderQueue:
         """Check if more items need processing"""
         return self.current_index < len(self.items)
 
+    def to_dict(self):
+        """Compact representation of the queue"""
+        return {'items': self.items, 'current_index': self.current_index}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a queue from to_dict output"""
+        queue = cls()
+        queue.items = list(data.get('items', []))
+        queue.current_index = data.get('current_index', 0)
+        return queue
+
 class OrderProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler
 
     def process_next_item(self, phone_number, active_orders):
         """Process next item in the queue"""
@@ -54,7 +68,10 @@ class OrderProcessor:
         """Process a pending order"""
         if order.status == 'pending':
             order.update_status('preparing')
-            order.estimated_ready = datetime.now() + timedelta(minutes=15)
+            if self.scheduler is not None:
+                order.estimated_ready = self.scheduler.schedule(order)
+            else:
+                order.estimated_ready = datetime.now() + timedelta(minutes=15)
             return True
         return False
 
@@ -91,4 +108,31 @@ class Order:
 
     def update_status(self, status):
         """Update order status"""
-        self.status = status
\ No newline at end of file
+        self.status = status
+
+    def to_dict(self):
+        """JSON-safe representation of the order"""
+        return {
+            'id': self.id,
+            'phone_number': self.phone_number,
+            'items': [item.to_list() for item in self.items],
+            'total': str(self.total),
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'estimated_ready': self.estimated_ready.isoformat(),
+            'payment_method': self.payment_method
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an order from to_dict output"""
+        order = cls.__new__(cls)
+        order.id = data['id']
+        order.phone_number = data['phone_number']
+        order.items = [CartItem.from_list(fields) for fields in data['items']]
+        order.total = Decimal(data['total'])
+        order.status = data['status']
+        order.created_at = datetime.fromisoformat(data['created_at'])
+        order.estimated_ready = datetime.fromisoformat(data['estimated_ready'])
+        order.payment_method = data.get('payment_method')
+        return order
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Secondary indexes over completed orders"""
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.core.order import Order
+
+logger = logging.getLogger(__name__)
+
+
+class OrderIndex:
+    """Orders by id, by phone number (newest first) and by creation-time bucket.
+
+    Orders arrive in roughly creation order, so each per-phone list and each
+    bucket is append-only; lookups by id or phone are dict hits and a time
+    range bisects a sorted list of bucket keys, so it only touches buckets
+    that hold orders however wide the range. purge() drops whole buckets.
+    Orders taken by other workers come in late through the journal, so a
+    phone's list or a bucket is re-sorted when one lands out of order.
+    """
+    def __init__(self, bucket_seconds: int = 3600):
+        self.bucket_seconds = bucket_seconds
+        self._by_id: Dict[str, Order] = {}
+        self._by_phone: Dict[str, List[Order]] = {}
+        self._by_bucket: Dict[int, List[Order]] = {}
+        self._buckets: List[int] = []  # keys of _by_bucket, ascending
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def add(self, order: Order):
+        """Index a completed order (usable as a PaymentHandler order listener)"""
+        with self._lock:
+            if order.id in self._by_id:
+                return
+            self._by_id[order.id] = order
+            orders = self._by_phone.setdefault(order.phone_number, [])
+            orders.append(order)
+            if len(orders) > 1 and orders[-2].created_at > order.created_at:
+                orders.sort(key=lambda o: o.created_at)
+            bucket = self._bucket(order.created_at.timestamp())
+            if bucket not in self._by_bucket:
+                bisect.insort(self._buckets, bucket)
+            orders = self._by_bucket.setdefault(bucket, [])
+            orders.append(order)
+            if len(orders) > 1 and orders[-2].created_at > order.created_at:
+                orders.sort(key=lambda o: o.created_at)
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._by_id.get(order_id.lstrip('#').lower())
+
+    def latest(self, phone_number: str) -> Optional[Order]:
+        """Most recent order for a phone"""
+        orders = self._by_phone.get(phone_number)
+        return orders[-1] if orders else None
+
+    def for_phone(self, phone_number: str, offset: int = 0, limit: int = 20) -> Tuple[List[Order], int]:
+        """A page of a phone's orders, newest first, and the total count"""
+        with self._lock:
+            orders = self._by_phone.get(phone_number, [])
+            end = len(orders) - offset
+            return orders[max(0, end - limit):max(0, end)][::-1], len(orders)
+
+    def between(self, start: float, end: float, offset: int = 0, limit: int = 20) -> Tuple[List[Order], int]:
+        """A page of orders created in [start, end), oldest first, and the total count"""
+        with self._lock:
+            first = bisect.bisect_left(self._buckets, self._bucket(start))
+            last = bisect.bisect_right(self._buckets, self._bucket(end))
+            page: List[Order] = []
+            total = 0
+            for bucket in self._buckets[first:last]:
+                orders = self._by_bucket[bucket]
+                if not (start <= bucket * self.bucket_seconds and (bucket + 1) * self.bucket_seconds <= end):
+                    orders = [order for order in orders if start <= order.created_at.timestamp() < end]
+                page.extend(orders[max(0, offset - total):max(0, offset + limit - total)])
+                total += len(orders)
+        return page, total
+
+    def purge(self, cutoff: float) -> int:
+        """Drop orders in buckets that ended before cutoff; returns how many"""
+        with self._lock:
+            count = 0
+            while count < len(self._buckets) and (self._buckets[count] + 1) * self.bucket_seconds <= cutoff:
+                count += 1
+            stale = self._buckets[:count]
+            del self._buckets[:count]
+            removed = 0
+            phones = set()
+            for bucket in stale:
+                for order in self._by_bucket.pop(bucket):
+                    self._by_id.pop(order.id, None)
+                    phones.add(order.phone_number)
+                    removed += 1
+            # One pass per affected phone instead of a list.remove() per order
+            for phone_number in phones:
+                kept = [order for order in self._by_phone.get(phone_number, ()) if order.id in self._by_id]
+                if kept:
+                    self._by_phone[phone_number] = kept
+                else:
+                    self._by_phone.pop(phone_number, None)
+        if removed:
+            logger.info("Dropped %d orders from the order index", removed)
+        return removed
+
+    def __len__(self):
+        return len(self._by_id)
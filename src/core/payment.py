@@ -1,11 +1,17 @@
+import logging
 import uuid
 from datetime import datetime
+from typing import Callable, List
 from src.core.enums import OrderStage
 from src.core.order import Order
-from fuzzywuzzy import fuzz
+
+logger = logging.getLogger(__name__)
 
 class PaymentHandler:
-    def __init__(self):
+    def __init__(self, scheduler=None):
+        # KitchenScheduler that sets each order's ready time from current load
+        self.scheduler = scheduler
+        self.order_listeners: List[Callable[[Order], None]] = []
         self.payment_methods = {
             'credit': self._handle_credit_card,
             'card': self._handle_credit_card,
@@ -14,6 +20,7 @@ class PaymentHandler:
 
     def handle_payment(self, phone_number, message, active_orders, completed_orders):
         """Handle payment method selection"""
+        from fuzzywuzzy import fuzz  # deferred: only needed once a customer reaches payment
         message = message.lower().strip()
         
         # Define base payment methods
@@ -36,20 +43,7 @@ class PaymentHandler:
             if phone_number not in active_orders:
                 return "No active order found. Please start a new order."
             
-            cart = active_orders[phone_number]['cart']
-            
-            # Create Order object
-            new_order = Order(phone_number, cart)
-            new_order.payment_method = 'cash'
-            
-            # Move to completed orders
-            if phone_number not in completed_orders:
-                completed_orders[phone_number] = []
-            
-            completed_orders[phone_number].append(new_order)
-            
-            # Clear from active orders
-            del active_orders[phone_number]
+            new_order = self._complete_order(phone_number, 'cash', active_orders, completed_orders)
             
             return (
                 f"Great choice! 😊 Please pay ${new_order.total:.2f} when you pick up your order. "
@@ -99,10 +93,25 @@ class PaymentHandler:
         if not is_valid:
             return error_message
         
-        # Get the pending order from active orders
+        new_order = self._complete_order(phone_number, 'card', active_orders, completed_orders)
+        
+        return (
+            f"Payment successful! Your total was ${new_order.total:.2f}. "
+            f"Your order number is #{new_order.id}. "
+            f"Your order will be ready at {new_order.estimated_ready.strftime('%I:%M %p')}."
+        )
+
+    def add_order_listener(self, listener: Callable[[Order], None]):
+        """Call listener with every order once it has been paid for"""
+        self.order_listeners.append(listener)
+
+    def _complete_order(self, phone_number, payment_method, active_orders, completed_orders) -> Order:
+        """Turn the active cart into a completed Order"""
         cart = active_orders[phone_number]['cart']
         new_order = Order(phone_number, cart)
-        new_order.payment_method = 'card'
+        new_order.payment_method = payment_method
+        if self.scheduler is not None:
+            new_order.estimated_ready = self.scheduler.schedule(new_order)
         
         # Move to completed orders
         if phone_number not in completed_orders:
@@ -113,11 +122,12 @@ class PaymentHandler:
         # Clear from active orders
         del active_orders[phone_number]
         
-        return (
-            f"Payment successful! Your total was ${new_order.total:.2f}. "
-            f"Your order number is #{new_order.id}. "
-            f"Your order will be ready at {new_order.estimated_ready.strftime('%I:%M %p')}."
-        )
+        for listener in self.order_listeners:
+            try:
+                listener(new_order)
+            except Exception as e:
+                logger.error("Order listener failed for order %s: %s", new_order.id, e)
+        return new_order
 
     def validate_card_details(self, card_number, exp_date, cvv):
         """Simple card validation"""
@@ -0,0 +1,198 @@
+"""Compact, token-budgeted prompts with a byte-stable prefix.
+
+Every prompt starts with a system message that only changes when the menu
+does, so provider-side prompt caching can reuse it across customers. What
+varies per message (time of day, cart, customer preferences, hints) follows
+in a short second system message, serialized field by field instead of as
+object reprs. When a prompt would exceed its token budget, the optional
+lines of that second message are dropped, least important first.
+"""
+import importlib.util
+import logging
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.core.config import PROMPT_TOKEN_BUDGET
+from src.core.menu_snapshot import MenuSnapshot
+
+logger = logging.getLogger(__name__)
+
+FRIENDLY_PREFIX = (
+    "You are a friendly, helpful barista texting a customer.\n"
+    "Rewrite the user's message to be conversational while keeping all of its information.\n"
+    "Keep every price, total and order number exactly as written. Be concise but warm; use 1-2 emojis."
+)
+
+BARISTA_GUIDELINES = (
+    "You are a friendly, helpful barista at a coffee shop.\n"
+    "Guidelines:\n"
+    "1. Be warm and friendly but concise (2-3 sentences max)\n"
+    "2. Use 1-2 emojis maximum\n"
+    "3. Always confirm prices and modifications clearly\n"
+    "4. Always acknowledge ALL items currently in cart when responding\n"
+    "5. Show running total including any modifiers\n"
+    "6. If asking about modifiers, mention current cart contents and potential total\n"
+    "Example: \"I see you have a muffin ($3.00) in your cart. Almond milk is $0.75 extra on the latte. "
+    "Add it? Your total would be $8.25. ☕\""
+)
+
+EXTRACT_INSTRUCTIONS = (
+    "Extract order details from the user's message. Include drink type, size, temperature "
+    "and any modifications.\n"
+    "Respond as JSON: {\"item\": \"item_name\", \"modifiers\": [\"mod1\"], "
+    "\"temperature\": \"hot/iced\", \"special_instructions\": \"any special notes\"}"
+)
+
+# Lower numbers are dropped first when a prompt is over budget
+OPTIONAL, USEFUL, IMPORTANT = 1, 2, 3
+
+
+def _tiktoken_encoder():
+    if importlib.util.find_spec('tiktoken') is None:
+        return None
+    import tiktoken
+    return tiktoken.get_encoding('cl100k_base')
+
+
+_encoder = None
+_encoder_loaded = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else about four characters per token"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder = _tiktoken_encoder()
+        _encoder_loaded = True
+    if _encoder is not None:
+        return len(_encoder.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages: Iterable[Dict]) -> int:
+    """Tokens in a chat request, counting a few per message for the role framing"""
+    return sum(estimate_tokens(message['content']) + 4 for message in messages)
+
+
+def cart_lines(cart: Optional[Dict], max_items: int = 8) -> List[str]:
+    """"2x Latte (oat milk)" per line, then the total"""
+    if not cart or not cart.get('items'):
+        return []
+    items = cart['items']
+    parts = []
+    for item in items[:max_items]:
+        mods = f" ({', '.join(item['modifiers'])})" if item.get('modifiers') else ""
+        parts.append(f"{item.get('quantity', 1)}x {item.get('name')}{mods}")
+    if len(items) > max_items:
+        parts.append(f"+{len(items) - max_items} more")
+    return [f"cart: {'; '.join(parts)}", f"total: ${cart.get('total', 0):.2f}"]
+
+
+def customer_lines(customer_context) -> List[Tuple[int, str]]:
+    """Only the preferences a reply can use, from a CustomerContext or its dict form"""
+    def field(name):
+        if isinstance(customer_context, dict):
+            return customer_context.get(name)
+        return getattr(customer_context, name, None)
+
+    lines = []
+    if field('usual_modifications'):
+        lines.append((USEFUL, f"usually has: {field('usual_modifications')[-1]}"))
+    if field('favorite_items'):
+        lines.append((OPTIONAL, f"favorites: {', '.join(map(str, field('favorite_items')[-3:]))}"))
+    if field('visit_count'):
+        lines.append((OPTIONAL, f"visits: {field('visit_count')}"))
+    return lines
+
+
+class Prompt(NamedTuple):
+    messages: List[Dict]
+    tokens: int
+    dropped: int  # optional context lines left out to fit the budget
+
+
+class PromptBuilder:
+    """Builds the chat messages for each LLM call site within a token budget"""
+    def __init__(self, max_tokens: int = PROMPT_TOKEN_BUDGET):
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self.built = 0
+        self.tokens = 0
+        self.dropped = 0
+        self.over_budget = 0
+
+    def _fit(self, prefix: str, context: List[Tuple[int, str]], user: str) -> Prompt:
+        """Drop the least important context lines until the prompt fits"""
+        lines = list(context)
+        dropped = 0
+        while True:
+            messages = [{"role": "system", "content": prefix}]
+            if lines:
+                messages.append({"role": "system", "content": "\n".join(line for _, line in lines)})
+            messages.append({"role": "user", "content": user})
+            tokens = message_tokens(messages)
+            if tokens <= self.max_tokens or not lines:
+                break
+            lowest = min(range(len(lines)), key=lambda i: (lines[i][0], -i))
+            lines.pop(lowest)
+            dropped += 1
+        with self._lock:
+            self.built += 1
+            self.tokens += tokens
+            self.dropped += dropped
+            if tokens > self.max_tokens:
+                self.over_budget += 1
+        if tokens > self.max_tokens:
+            logger.warning("Prompt of %d tokens exceeds the %d token budget", tokens, self.max_tokens)
+        return Prompt(messages, tokens, dropped)
+
+    def friendly(self, base_message: str, time_of_day: str, customer_context=None,
+                 cart: Optional[Dict] = None, hints: Optional[Dict] = None) -> Prompt:
+        """ConversationHandler.get_friendly_response: rewrite a reply in the barista's voice"""
+        context = [(IMPORTANT, f"time of day: {time_of_day}")]
+        context += [(IMPORTANT, line) for line in cart_lines(cart)]
+        context += customer_lines(customer_context)
+        flags = sorted(name for name, value in (hints or {}).items() if value)
+        if flags:
+            context.append((USEFUL, f"situation: {', '.join(flags)}"))
+        return self._fit(FRIENDLY_PREFIX, context, base_message)
+
+    def barista(self, snapshot: MenuSnapshot, user_message: str, context: Dict, current_time: str) -> Prompt:
+        """DialogueManager.get_ai_response: answer a free-form message about the menu and cart"""
+        lines = [(IMPORTANT, f"time: {current_time}")]
+        cart = context.get('cart') or {}
+        lines += [(IMPORTANT, line) for line in cart_lines(cart)] or [(IMPORTANT, "cart: empty")]
+        pending = context.get('pending_item') or cart.get('pending_item')
+        if pending:
+            mods = ', '.join(pending.get('modifiers') or []) or 'none chosen'
+            lines.append((IMPORTANT, f"waiting on: {pending.get('item')} (milk: {mods})"))
+        if context.get('last_item'):
+            lines.append((USEFUL, f"last item asked about: {context['last_item']}"))
+        return self._fit(snapshot.artifact('barista_prompt', render_barista_prefix), lines, user_message)
+
+    def extract(self, snapshot: MenuSnapshot, message: str) -> Prompt:
+        """DialogueManager.extract_order_details: structured order fields from a message"""
+        return self._fit(snapshot.artifact('extract_prompt', render_extract_prefix), [], message)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'token_budget': self.max_tokens,
+                'prompts': self.built,
+                'avg_tokens': self.tokens / self.built if self.built else 0.0,
+                'lines_dropped': self.dropped,
+                'over_budget': self.over_budget
+            }
+
+
+def render_barista_prefix(snapshot: MenuSnapshot) -> str:
+    """Guidelines, menu and modifiers: identical for every call on one menu version"""
+    return f"{BARISTA_GUIDELINES}\n\nMenu:{snapshot.ai_menu_text}\nModifiers:{snapshot.modifier_text}"
+
+
+def render_extract_prefix(snapshot: MenuSnapshot) -> str:
+    items = ', '.join(item['item'] for item in snapshot.menu.values())
+    return f"{EXTRACT_INSTRUCTIONS}\nAvailable items: {items}\nAvailable modifiers:{snapshot.modifier_text}"
+
+
+PROMPTS = PromptBuilder()
@@ -0,0 +1,97 @@
+"""Bounded cache for LLM-rewritten responses"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class ResponseCache:
+    """LRU cache with a per-entry TTL and hit/miss counters"""
+    def __init__(self, max_size: int = 512, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(base_message: str, time_of_day: str, cart: Optional[Dict] = None,
+                 customer: Tuple[str, ...] = (), **kwargs) -> Tuple:
+        """Build a cache key from everything that shapes the rewritten response.
+
+        customer holds the prompt's per-customer lines, so a reply personalized
+        for one customer is never served to another.
+        """
+        normalized = _WHITESPACE.sub(' ', base_message.strip().lower())
+        flags = tuple(sorted((name, repr(value)) for name, value in kwargs.items()))
+        return normalized, time_of_day, ResponseCache.cart_fingerprint(cart), tuple(customer), flags
+
+    @staticmethod
+    def cart_fingerprint(cart: Optional[Dict]) -> Tuple:
+        """Reduce a cart context to the fields that appear in the prompt"""
+        if not cart:
+            return ()
+        items = tuple(
+            (item.get('name'), item.get('quantity', 1), tuple(item.get('modifiers') or ()))
+            for item in cart.get('items', [])
+        )
+        if not items:
+            return ()
+        return items, round(float(cart.get('total', 0)), 2)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return a cached response, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: str):
+        """Store a response, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,99 @@
+"""Decides how each reply is phrased: verbatim, from a local template, or by the LLM"""
+import logging
+from typing import Dict, Mapping, Optional, Tuple
+
+from src.core.config import RESPONSE_POLICY
+from src.core.enums import OrderStage, ReplyKind, ReplyMode
+
+logger = logging.getLogger(__name__)
+
+Rules = Dict[Tuple[Optional[OrderStage], Optional[ReplyKind]], ReplyMode]
+
+# Local phrasing for TEMPLATE replies; kinds without a template are sent verbatim
+TEMPLATES = {
+    ReplyKind.MILK_QUESTION: "{message} ☕ Reply with {milks}, or NO for regular.",
+    ReplyKind.PENDING_ITEMS: "{message} ✨",
+    ReplyKind.PAYMENT_PROMPT: "Your total is ${total:.2f}. {message}",
+    ReplyKind.UNRECOGNIZED: "{message} Text MENU to see everything we have. ☕",
+    ReplyKind.CONFUSED: "{message} Text START to begin a new order. ☺️",
+}
+
+# Replies carrying prices or order numbers are never rewritten; the LLM only adds warmth to prompts
+DEFAULT_RULES: Rules = {
+    (None, ReplyKind.CART_SUMMARY): ReplyMode.VERBATIM,
+    (None, ReplyKind.MODIFIER_PROMPT): ReplyMode.VERBATIM,
+    (None, ReplyKind.PAYMENT_RESULT): ReplyMode.VERBATIM,
+    (None, ReplyKind.MILK_QUESTION): ReplyMode.LLM,
+    (None, ReplyKind.PENDING_ITEMS): ReplyMode.LLM,
+    (None, ReplyKind.PAYMENT_PROMPT): ReplyMode.LLM,
+    (None, ReplyKind.UNRECOGNIZED): ReplyMode.LLM,
+    (None, ReplyKind.CONFUSED): ReplyMode.LLM,
+}
+
+# No LLM round trip anywhere between checkout and the payment confirmation
+LATENCY_CRITICAL_RULES: Rules = {
+    **DEFAULT_RULES,
+    (None, ReplyKind.PAYMENT_PROMPT): ReplyMode.TEMPLATE,
+    (None, ReplyKind.PENDING_ITEMS): ReplyMode.TEMPLATE,
+    (OrderStage.PAYMENT, None): ReplyMode.TEMPLATE,
+    (OrderStage.AWAITING_CARD, None): ReplyMode.TEMPLATE,
+}
+
+def milk_choices(modifiers: Mapping) -> str:
+    """The menu's milks as "almond, oat or soy milk" """
+    names = list(modifiers.get('milk', ()))
+    if not names:
+        return "your choice of milk"
+    suffix = ' milk' if all(name.endswith(' milk') for name in names) else ''
+    if suffix:
+        names = [name[:-len(suffix)] for name in names]
+    listed = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} or {names[-1]}"
+    return listed + suffix
+
+
+PROFILES: Dict[str, Rules] = {
+    'default': DEFAULT_RULES,
+    'latency_critical': LATENCY_CRITICAL_RULES,
+}
+
+
+class ResponsePolicy:
+    """Reply mode by (OrderStage, ReplyKind).
+
+    Rules are looked up most specific first: (stage, kind), then (stage, None)
+    for every reply in a stage, then (None, kind) for a kind in any stage.
+    """
+    def __init__(self, rules: Rules, name: str = 'custom', templates: Optional[Dict[ReplyKind, str]] = None,
+                 default: ReplyMode = ReplyMode.LLM):
+        self.rules = rules
+        self.name = name
+        self.templates = TEMPLATES if templates is None else templates
+        self.default = default
+
+    @classmethod
+    def profile(cls, name: str = RESPONSE_POLICY) -> 'ResponsePolicy':
+        """One of the shipped PROFILES"""
+        if name not in PROFILES:
+            logger.warning("Unknown response policy %r, using 'default'", name)
+            name = 'default'
+        return cls(PROFILES[name], name=name)
+
+    def mode(self, stage: Optional[OrderStage], kind: ReplyKind) -> ReplyMode:
+        """How a reply of this kind is phrased in this stage"""
+        for key in ((stage, kind), (stage, None), (None, kind)):
+            mode = self.rules.get(key)
+            if mode is not None:
+                return mode
+        return self.default
+
+    def render(self, kind: ReplyKind, message: str, cart: Optional[Dict] = None,
+               modifiers: Optional[Mapping] = None) -> str:
+        """Fill the kind's template, or return the message as is when it has none.
+
+        Milk choices come from the current menu's modifiers, so they follow menu reloads.
+        """
+        template = self.templates.get(kind)
+        if template is None:
+            return message
+        return template.format(message=message, total=(cart or {}).get('total', 0),
+                               milks=milk_choices(modifiers or {}))
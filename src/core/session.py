@@ -1,11 +1,15 @@
+import time
 from datetime import datetime, timedelta
+from typing import Tuple
 from src.core.state import OrderContext
 from src.core.enums import OrderStage
+from src.core.expiry import ExpiryIndex, deep_sizeof
 
 class SessionManager:
     def __init__(self, timeout=timedelta(minutes=30)):
         self.sessions = {}
         self.timeout = timeout
+        self._expiry = ExpiryIndex()
 
     def create_session(self, phone_number):
         """Create a new session"""
@@ -14,8 +18,22 @@ class SessionManager:
             'last_activity': datetime.now(),
             'context': OrderContext()
         }
+        self._touch(phone_number)
         return self.sessions[phone_number]
 
+    def _touch(self, phone_number):
+        self._expiry.touch(phone_number, time.time() + self.timeout.total_seconds())
+
+    def purge_expired(self, now: float) -> Tuple[int, int]:
+        """Drop sessions idle past the timeout; returns (evicted, bytes reclaimed)"""
+        evicted = reclaimed = 0
+        for phone_number in self._expiry.pop_expired(now):
+            session = self.sessions.pop(phone_number, None)
+            if session is not None:
+                evicted += 1
+                reclaimed += deep_sizeof(session)
+        return evicted, reclaimed
+
     def get_session_state(self, phone_number) -> OrderStage:
         """Get current state for a phone number"""
         if phone_number not in self.sessions:
@@ -24,6 +42,7 @@ class SessionManager:
         session = self.sessions[phone_number]
         if (datetime.now() - session['last_activity']) > self.timeout:
             del self.sessions[phone_number]
+            self._expiry.discard(phone_number)
             return OrderStage.MENU
             
         return session['state']
@@ -44,6 +63,7 @@ class SessionManager:
             
         self.sessions[phone_number]['state'] = new_state
         self.sessions[phone_number]['last_activity'] = datetime.now()
+        self._touch(phone_number)
 
     def get_session(self, phone_number):
         """Get or create session"""
@@ -0,0 +1,444 @@
+"""Shared storage for per-phone conversation state.
+
+Every gunicorn worker must see the same cart for a phone number, so the
+state that used to live in module-level dicts in app.py goes through a
+SessionStore. Each message runs inside ``store.transaction(phone)``, which
+loads the phone's state, hands it to the caller and writes it back.
+"""
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from src.core import metrics
+from src.core.cart import ShoppingCart
+from src.core.config import SESSION_LOCK_STRIPES
+from src.core.enums import OrderStage
+from src.core.expiry import ExpiryIndex, deep_sizeof
+from src.core.locks import StripedLock
+from src.core.order import OrderQueue
+from src.core.state import CustomerContext
+
+logger = logging.getLogger(__name__)
+
+
+class PhoneSession:
+    """Conversation state for one phone number"""
+    __slots__ = ('order', 'context')
+
+    def __init__(self, order: Optional[Dict] = None, context: Optional[CustomerContext] = None):
+        self.order = order
+        self.context = context
+
+    def is_empty(self) -> bool:
+        return self.order is None and self.context is None
+
+
+def _encode_item(item: Optional[Dict]) -> Optional[Dict]:
+    if item is None:
+        return None
+    encoded = dict(item)
+    if 'price' in encoded:
+        encoded['price'] = str(encoded['price'])
+    if 'modifier_prices' in encoded:
+        encoded['modifier_prices'] = {mod: str(price) for mod, price in encoded['modifier_prices'].items()}
+    return encoded
+
+
+def _decode_item(item: Optional[Dict]) -> Optional[Dict]:
+    if item is None:
+        return None
+    if 'price' in item:
+        item['price'] = Decimal(item['price'])
+    if 'modifier_prices' in item:
+        item['modifier_prices'] = {mod: Decimal(price) for mod, price in item['modifier_prices'].items()}
+    return item
+
+
+def encode_session(session: PhoneSession) -> bytes:
+    """Serialize a session to compact JSON bytes"""
+    data = {}
+    if session.order is not None:
+        order = session.order
+        encoded = {
+            's': order['state'].value,
+            'c': order['cart'].to_dict(),
+            'p': [_encode_item(item) for item in order.get('pending_items', [])]
+        }
+        if 'order_queue' in order:
+            queue = order['order_queue'].to_dict()
+            queue['items'] = [_encode_item(item) for item in queue['items']]
+            encoded['q'] = queue
+        if order.get('pending_item') is not None:
+            encoded['i'] = _encode_item(order['pending_item'])
+        if 'pending_modifier' in order:
+            encoded['m'] = order['pending_modifier']
+        data['o'] = encoded
+    if session.context is not None:
+        data['x'] = session.context.to_dict()
+    return json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def decode_session(raw: bytes) -> PhoneSession:
+    """Rebuild a session from encode_session output"""
+    data = json.loads(raw)
+    session = PhoneSession()
+    if 'o' in data:
+        encoded = data['o']
+        order = {
+            'state': OrderStage(encoded['s']),
+            'cart': ShoppingCart.from_dict(encoded['c']),
+            'pending_items': [_decode_item(item) for item in encoded.get('p', [])],
+            'pending_item': _decode_item(encoded.get('i'))
+        }
+        if 'q' in encoded:
+            queue = encoded['q']
+            queue['items'] = [_decode_item(item) for item in queue['items']]
+            order['order_queue'] = OrderQueue.from_dict(queue)
+        if 'm' in encoded:
+            order['pending_modifier'] = encoded['m']
+        session.order = order
+    if 'x' in data:
+        session.context = CustomerContext.from_dict(data['x'])
+    return session
+
+
+class SessionStore:
+    """Interface for per-phone session storage.
+
+    Sessions idle for longer than ``ttl`` seconds are reclaimed, either by
+    purge_expired() or by the backend itself. Transactions on one phone are
+    serialized in arrival order within a process by striped locks, and across
+    processes by the backend's own lock.
+    """
+    ttl: Optional[float] = None
+
+    def __init__(self, lock_stripes: int = SESSION_LOCK_STRIPES):
+        self.phone_locks = StripedLock(lock_stripes)
+
+    def load(self, phone_number: str) -> PhoneSession:
+        """Read the session for a phone number (empty if none)"""
+        raise NotImplementedError
+
+    def save(self, phone_number: str, session: PhoneSession):
+        """Write a session back, deleting it when empty"""
+        raise NotImplementedError
+
+    def delete(self, phone_number: str):
+        """Remove a phone number's session"""
+        raise NotImplementedError
+
+    def phones(self) -> List[str]:
+        """List phone numbers with stored sessions"""
+        raise NotImplementedError
+
+    def purge_expired(self, now: float) -> Tuple[int, int]:
+        """Drop idle sessions; returns (sessions evicted, bytes reclaimed)"""
+        return 0, 0
+
+    @contextmanager
+    def _locked(self, phone_number: str) -> Iterator[None]:
+        """Hold whatever lock makes read-modify-write atomic for one phone"""
+        yield
+
+    @contextmanager
+    def transaction(self, phone_number: str) -> Iterator[PhoneSession]:
+        """Load, yield and write back a phone's session atomically.
+
+        Changes are only written when the block exits normally.
+        """
+        with self.phone_locks.hold(phone_number), self._locked(phone_number):
+            with metrics.span('session_load'):
+                session = self.load(phone_number)
+            yield session
+            with metrics.span('session_save'):
+                self.save(phone_number, session)
+
+    def __len__(self) -> int:
+        return len(self.phones())
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store; only correct with a single worker process"""
+    def __init__(self, ttl: Optional[float] = None):
+        super().__init__()
+        self.sessions: Dict[str, PhoneSession] = {}
+        self.ttl = ttl
+        self._expiry = ExpiryIndex()
+
+    def load(self, phone_number: str) -> PhoneSession:
+        return self.sessions.get(phone_number) or PhoneSession()
+
+    def save(self, phone_number: str, session: PhoneSession):
+        if session.is_empty():
+            self.delete(phone_number)
+            return
+        self.sessions[phone_number] = session
+        if self.ttl is not None:
+            self._expiry.touch(phone_number, time.time() + self.ttl)
+
+    def delete(self, phone_number: str):
+        self.sessions.pop(phone_number, None)
+        self._expiry.discard(phone_number)
+
+    def purge_expired(self, now: float) -> Tuple[int, int]:
+        evicted = reclaimed = 0
+        for phone_number in self._expiry.pop_expired(now):
+            session = self.sessions.pop(phone_number, None)
+            if session is not None:
+                evicted += 1
+                reclaimed += deep_sizeof(session)
+        return evicted, reclaimed
+
+    def phones(self) -> List[str]:
+        return list(self.sessions)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite store in WAL mode, shared by every worker on the host.
+
+    A phone is locked through a lease row in session_locks rather than a
+    database transaction, so a turn waiting on the LLM only blocks that
+    phone; load and save are single autocommit statements.
+    """
+    def __init__(self, path: str, ttl: Optional[float] = None, busy_timeout: float = 5.0,
+                 lock_timeout_ms: int = 10000):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self.lock_timeout_ms = lock_timeout_ms
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "phone TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            "phone TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _locked(self, phone_number: str) -> Iterator[None]:
+        # Take (or steal an expired) lease on the phone's lock row; each attempt
+        # holds SQLite's write lock only for that one statement
+        conn = self._connection()
+        token = uuid.uuid4().hex
+        while True:
+            now = time.time()
+            acquired = conn.execute(
+                "INSERT INTO session_locks (phone, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (phone) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE session_locks.expires_at < ?",
+                (phone_number, token, now + self.lock_timeout_ms / 1000, now)
+            ).rowcount
+            if acquired:
+                break
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            conn.execute("DELETE FROM session_locks WHERE phone = ? AND token = ?", (phone_number, token))
+
+    def load(self, phone_number: str) -> PhoneSession:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE phone = ?", (phone_number,)
+        ).fetchone()
+        return decode_session(row[0]) if row else PhoneSession()
+
+    def save(self, phone_number: str, session: PhoneSession):
+        if session.is_empty():
+            self.delete(phone_number)
+            return
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (phone, data, updated_at) VALUES (?, ?, ?)",
+            (phone_number, encode_session(session), time.time())
+        )
+
+    def delete(self, phone_number: str):
+        self._connection().execute("DELETE FROM sessions WHERE phone = ?", (phone_number,))
+
+    def phones(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT phone FROM sessions")]
+
+    def purge_expired(self, now: float) -> Tuple[int, int]:
+        if self.ttl is None:
+            return 0, 0
+        cutoff = now - self.ttl
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # The updated_at index keeps both statements proportional to what expired
+            evicted, reclaimed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions WHERE updated_at < ?",
+                (cutoff,)
+            ).fetchone()
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return evicted, reclaimed
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RespConnection:
+    """Minimal RESP2 client over a plain socket"""
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply"""
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+# Deletes the lock only if it still holds this holder's token, in one server-side step
+RELEASE_LOCK_SCRIPT = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+
+
+class RedisSessionStore(SessionStore):
+    """Store backed by any server that speaks the Redis protocol.
+
+    Idle sessions are reclaimed by the server through key TTLs.
+    """
+    scan_count = 1000  # keys the server examines per SCAN call in phones()
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 ttl: Optional[float] = None, prefix: str = 'coffee:session:',
+                 lock_timeout_ms: int = 10000):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.db = db
+        self.ttl = ttl
+        self.prefix = prefix
+        self.lock_timeout_ms = lock_timeout_ms
+        self._local = threading.local()
+
+    def _connection(self) -> RespConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = RespConnection(self.host, self.port)
+            if self.db:
+                conn.execute('SELECT', self.db)
+            self._local.conn = conn
+        return conn
+
+    def _key(self, phone_number: str) -> str:
+        return f"{self.prefix}{phone_number}"
+
+    @contextmanager
+    def _locked(self, phone_number: str) -> Iterator[None]:
+        conn = self._connection()
+        lock_key = f"{self._key(phone_number)}:lock"
+        token = uuid.uuid4().hex
+        while conn.execute('SET', lock_key, token, 'NX', 'PX', self.lock_timeout_ms) is None:
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            # A GET then DEL could delete a lock another worker took after ours expired
+            conn.execute('EVAL', RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    def load(self, phone_number: str) -> PhoneSession:
+        raw = self._connection().execute('GET', self._key(phone_number))
+        return decode_session(raw) if raw else PhoneSession()
+
+    def save(self, phone_number: str, session: PhoneSession):
+        if session.is_empty():
+            self.delete(phone_number)
+            return
+        args = ['SET', self._key(phone_number), encode_session(session)]
+        if self.ttl is not None:
+            args += ['PX', int(self.ttl * 1000)]
+        self._connection().execute(*args)
+
+    def delete(self, phone_number: str):
+        self._connection().execute('DEL', self._key(phone_number))
+
+    def phones(self) -> List[str]:
+        # SCAN in batches rather than KEYS, which blocks the server while it walks every key
+        conn = self._connection()
+        phones = []
+        cursor = b'0'
+        while True:
+            cursor, keys = conn.execute('SCAN', cursor, 'MATCH', f"{self.prefix}*", 'COUNT', self.scan_count)
+            phones += [key.decode('utf-8')[len(self.prefix):] for key in keys if not key.endswith(b':lock')]
+            if cursor == b'0':
+                return phones
+
+
+def create_session_store(url: str, ttl: Optional[float] = None) -> SessionStore:
+    """Build a store from a URL: memory://, sqlite:///path.db or redis://host:port/db"""
+    parsed = urlparse(url)
+    if parsed.scheme in ('', 'memory'):
+        return MemorySessionStore(ttl=ttl)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteSessionStore(parsed.path[1:], ttl=ttl)
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisSessionStore(parsed.hostname or 'localhost', parsed.port or 6379, db, ttl=ttl)
+    raise ValueError(f"Unsupported session store URL: {url}")
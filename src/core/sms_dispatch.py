@@ -0,0 +1,137 @@
+"""Acknowledge-then-reply handling of inbound SMS"""
+import logging
+import queue
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from src.core.notifications import NotificationError, TokenBucket, TwilioSender
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ReplyDispatcher:
+    """Processes inbound messages off the webhook thread and texts each reply back.
+
+    Every phone number hashes to one of `workers` FIFO queues and each queue
+    is drained by a single thread, so one customer's replies go out in the
+    order their messages arrived while different customers are handled in
+    parallel. Retryable send failures are retried in place with exponential
+    backoff, which holds that phone's later replies back instead of
+    reordering them.
+
+    Ordering only holds within one process: with several gunicorn workers two
+    messages from one phone can be acknowledged by different workers, so
+    async mode runs with a single worker (enforced in gunicorn_config.py).
+    Messages are acknowledged before they are processed, so stop() must run
+    on shutdown to send what is still queued; Twilio will not redeliver them.
+    Pass the OrderNotifier's rate limiter so replies and ready texts together
+    stay within the account's send rate.
+    """
+    def __init__(self, process: Callable[[str, str], str], sender: TwilioSender, workers: int = 8,
+                 max_pending: int = 1000, max_attempts: int = 3, backoff: float = 0.5,
+                 rate_limiter: Optional[TokenBucket] = None):
+        self.process = process
+        self.sender = sender
+        self.rate_limiter = rate_limiter
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._queues: List[queue.Queue] = [queue.Queue(max(1, max_pending // workers)) for _ in range(workers)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._counts = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'dropped': 0}
+
+    def _queue_for(self, phone_number: str) -> queue.Queue:
+        return self._queues[zlib.crc32(phone_number.encode('utf-8')) % self.workers]
+
+    def submit(self, phone_number: str, body: str) -> bool:
+        """Queue a message for processing; False when that phone's queue is full or we are stopping"""
+        with self._lock:
+            if self._stopping:
+                self._counts['dropped'] += 1
+                logger.warning("Shutting down; rejecting message from %s", phone_number)
+                return False
+            try:
+                self._queue_for(phone_number).put_nowait((phone_number, body, time.monotonic()))
+            except queue.Full:
+                self._counts['dropped'] += 1
+                logger.warning("Reply queue full; rejecting message from %s", phone_number)
+                return False
+            self._counts['queued'] += 1
+        return True
+
+    def _send(self, phone_number: str, reply: str):
+        for attempt in range(1, self.max_attempts + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                sid = self.sender.send(phone_number, reply)
+            except NotificationError as e:
+                if e.retryable and attempt < self.max_attempts:
+                    with self._lock:
+                        self._counts['retried'] += 1
+                    logger.warning("Reply to %s failed (%s); retry %d", phone_number, e, attempt)
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                    continue
+                with self._lock:
+                    self._counts['failed'] += 1
+                logger.error("Giving up on reply to %s: %s", phone_number, e)
+                return
+            with self._lock:
+                self._counts['sent'] += 1
+            logger.debug("Sent reply to %s (%s)", phone_number, sid)
+            return
+
+    def _run(self, inbox: queue.Queue):
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            phone_number, body, received = item
+            try:
+                reply = self.process(phone_number, body)
+                logger.debug("Reply to %s ready after %.0f ms", phone_number, (time.monotonic() - received) * 1000)
+                if reply:
+                    self._send(phone_number, reply)
+            except Exception as e:
+                logger.error("Reply worker error for %s: %s", phone_number, e, exc_info=True)
+
+    def start(self):
+        """Start one worker thread per queue"""
+        if self._threads:
+            return
+        for n, inbox in enumerate(self._queues):
+            thread = threading.Thread(target=self._run, args=(inbox,), name=f'sms-reply-{n}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 25.0):
+        """Stop accepting messages, reply to everything already queued, then stop the workers"""
+        with self._lock:
+            if self._stopping or not self._threads:
+                return
+            self._stopping = True
+        deadline = time.monotonic() + timeout
+        try:
+            # Behind every queued message, so each worker drains its queue first
+            for inbox in self._queues:
+                inbox.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            pass
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        busy = sum(thread.is_alive() for thread in self._threads)
+        if busy:
+            logger.error("%d reply workers still had acknowledged messages after %.0fs", busy, timeout)
+        else:
+            logger.info("Reply workers drained and stopped")
+        self._threads = []
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts, pending=sum(inbox.qsize() for inbox in self._queues))
@@ -41,6 +41,38 @@ class CustomerContext:
         })
         self.conversation_history = self.conversation_history[-5:]
 
+    def to_dict(self) -> Dict:
+        """JSON-safe representation of the context"""
+        return {
+            'favorite_items': self.favorite_items,
+            'usual_modifications': self.usual_modifications,
+            'visit_count': self.visit_count,
+            'last_visit': self.last_visit.isoformat() if self.last_visit else None,
+            'last_order': self.last_order,
+            'preferred_payment': self.preferred_payment,
+            'conversation_history': [
+                dict(entry, timestamp=entry['timestamp'].isoformat())
+                for entry in self.conversation_history
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CustomerContext':
+        """Rebuild a context from to_dict output"""
+        context = cls()
+        context.favorite_items = data.get('favorite_items', [])
+        context.usual_modifications = data.get('usual_modifications', [])
+        context.visit_count = data.get('visit_count', 0)
+        if data.get('last_visit'):
+            context.last_visit = datetime.fromisoformat(data['last_visit'])
+        context.last_order = data.get('last_order')
+        context.preferred_payment = data.get('preferred_payment')
+        context.conversation_history = [
+            dict(entry, timestamp=datetime.fromisoformat(entry['timestamp']))
+            for entry in data.get('conversation_history', [])
+        ]
+        return context
+
 class OrderContext:
     """Tracks current order state and details"""
     def __init__(self):
@@ -0,0 +1,83 @@
+"""Queue-based logging: request threads enqueue records, one thread writes them"""
+import atexit
+import gzip
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class SampledDebugFilter(logging.Filter):
+    """Let through only one in every `rate` DEBUG records; other levels always pass"""
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.rate == 1:
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them.
+
+    The stock QueueHandler runs the full formatter on the calling thread. Here
+    only msg % args is resolved (so later changes to the arguments do not leak
+    into the log); timestamps, layout and tracebacks are done by the listener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class GzipRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotated log file whose rotated copies are gzipped"""
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+
+def configure_logging(level: str = 'INFO', log_file: Optional[str] = None, max_bytes: int = 10 * 1024 * 1024,
+                      backup_count: int = 5, debug_sample_rate: int = 1,
+                      worker_slot: int = 0) -> logging.handlers.QueueListener:
+    """Route the root logger through a queue to a file and stdout; returns the started listener"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        log_file = log_file.format(worker=worker_slot, pid=os.getpid())
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        handlers.append(GzipRotatingFileHandler(log_file, max_bytes, backup_count))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SampledDebugFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
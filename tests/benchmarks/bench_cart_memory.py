@@ -0,0 +1,45 @@
+"""Memory held by many live carts.
+
+    python -m tests.benchmarks.bench_cart_memory [carts]
+"""
+import gc
+import logging
+import sys
+import tracemalloc
+
+from src.core.cart import ShoppingCart
+from src.core.config import MENU
+
+ORDERS = [
+    [(2, ['oat milk']), (7, [])],
+    [(1, []), (1, []), (5, ['almond milk'])],
+    [(3, ['soy milk']), (6, [])],
+]
+
+
+def build_carts(count: int):
+    carts = []
+    for n in range(count):
+        cart = ShoppingCart()
+        for menu_id, modifiers in ORDERS[n % len(ORDERS)]:
+            cart.add_item(MENU[menu_id], modifiers=list(modifiers))
+        carts.append(cart)
+    return carts
+
+
+def main(count: int = 100_000):
+    logging.disable(logging.CRITICAL)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    carts = build_carts(count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    lines = sum(len(cart.items) for cart in carts)
+    print(f"{count} carts, {lines} lines: {used / 1024 / 1024:.1f} MiB, "
+          f"{used / count:.0f} bytes/cart, {used / lines:.0f} bytes/line")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
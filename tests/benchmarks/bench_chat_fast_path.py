@@ -0,0 +1,125 @@
+"""LLM calls saved by answering casual chat without the LLM.
+
+Plays the TestScenarios conversations, randomized load-test conversations
+and a set of casual messages through the app with a counting stand-in for
+OpenAI, once with the previous substring matcher (every match rewritten by
+the LLM) and once with the word-boundary classifier and canned replies.
+
+    python -m tests.benchmarks.bench_chat_fast_path [random conversations]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+from types import SimpleNamespace
+
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('ORDER_JOURNAL_PATH', os.path.join(tempfile.mkdtemp(), 'orders.jsonl'))
+
+CHAT_MESSAGES = ["hi", "hello!", "good morning", "how are you?", "thanks so much", "is it busy?",
+                 "lovely weather today", "hey, can I get a latte", "chai please", "this one", "double shot"]
+
+# handle_chat's previous matcher: raw substring tests
+LEGACY_PATTERNS = {
+    'greeting': ['hi', 'hello', 'hey', 'good morning', 'morning', 'afternoon', 'evening'],
+    'how_are_you': ['how are you', 'how you doing', "how's it going"],
+    'thanks': ['thank you', 'thanks', 'appreciate it'],
+    'busy': ['busy', 'quiet', 'long wait'],
+    'weather': ['weather', 'hot', 'cold', 'rain', 'sunny'],
+}
+
+
+class CountingOpenAI:
+    """Stand-in client that counts completions"""
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=kwargs['messages'][-1]['content'])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def legacy_handle_chat(handler):
+    def handle_chat(message, context=None, cart=None, menu_index=None):
+        message = message.lower()
+        for category, patterns in LEGACY_PATTERNS.items():
+            if any(pattern in message for pattern in patterns):
+                return handler.get_friendly_response(
+                    handler._get_casual_response(category, context or {}), context or {}, cart=cart)
+        return None
+    return handle_chat
+
+
+def conversations(random_count: int):
+    from tests.load_test import random_conversation
+    from tests.test_scenarios import TestScenarios
+    rng = random.Random(50)
+    corpus = [list(case.messages) for case in TestScenarios().test_cases]
+    corpus += [random_conversation(rng) for _ in range(random_count)]
+    corpus += [['start'] + CHAT_MESSAGES]
+    return corpus
+
+
+def play(app, corpus, prefix: str):
+    """(LLM calls made from handle_chat, LLM calls in total)"""
+    client = CountingOpenAI()
+    handler = app.conversation_handler
+    handler.client = client
+    app.response_cache.clear()
+    handle_chat = handler.handle_chat
+    chat_calls = 0
+
+    def counted(*args, **kwargs):
+        nonlocal chat_calls
+        before = client.calls
+        try:
+            return handle_chat(*args, **kwargs)
+        finally:
+            chat_calls += client.calls - before
+
+    handler.handle_chat = counted
+    try:
+        for n, messages in enumerate(corpus):
+            phone = f"+1{prefix}{n:08d}"
+            for message in messages:
+                app.process_message(phone, message)
+    finally:
+        handler.handle_chat = handle_chat
+    return chat_calls, client.calls
+
+
+def main(random_count: int = 200):
+    logging.disable(logging.CRITICAL)
+    import app
+    corpus = conversations(random_count)
+    messages = sum(len(conversation) for conversation in corpus)
+
+    handler = app.conversation_handler
+    fast_path = handler.handle_chat
+    handler.handle_chat = legacy_handle_chat(handler)
+    try:
+        legacy_chat, legacy_total = play(app, corpus, '1')
+    finally:
+        handler.handle_chat = fast_path
+    chat, total = play(app, corpus, '2')
+
+    legacy_hits = sum(
+        any(p in message.lower() for patterns in LEGACY_PATTERNS.values() for p in patterns)
+        for conversation in corpus for message in conversation
+    )
+    from src.core.conversation_handler import INTENT_CLASSIFIER
+    index = app.menu_publisher.current.index
+    hits = sum(INTENT_CLASSIFIER.classify(message, index) is not None
+               for conversation in corpus for message in conversation)
+    print(f"{len(corpus)} conversations, {messages} messages")
+    print(f"casual matches: substring {legacy_hits}, word-boundary {hits}")
+    print(f"LLM calls from casual chat: before {legacy_chat}, after {chat}")
+    # Messages the substring matcher hijacked now get their real (sometimes LLM-phrased) reply
+    print(f"LLM calls in total: before {legacy_total}, after {total}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
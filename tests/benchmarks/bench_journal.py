@@ -0,0 +1,74 @@
+"""Order journal throughput: bursty appends and replaying a large journal.
+
+    python -m tests.benchmarks.bench_journal [orders]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from src.core.cart import ShoppingCart
+from src.core.config import MENU
+from src.core.journal import OrderJournal, replay_journal
+from src.core.order import Order
+
+
+def make_order(n: int) -> Order:
+    cart = ShoppingCart()
+    cart.add_item(MENU[1 + n % 7], modifiers=['oat milk'] if n % 3 == 0 else [])
+    cart.add_item(MENU[7], quantity=1 + n % 2)
+    return Order(f"+1555{n % 10_000_000:07d}", cart)
+
+
+def write_journal(path: str, count: int):
+    """Write count orders directly (no fsync) so replay can be measured on its own"""
+    template = make_order(0).to_dict()
+    with open(path, 'w') as f:
+        for n in range(count):
+            f.write(json.dumps(dict(template, id=f"{n:08x}"), separators=(',', ':')) + '\n')
+
+
+def bench_burst(directory: str, threads: int = 32, per_thread: int = 50):
+    journal = OrderJournal(os.path.join(directory, 'burst.jsonl'))
+    orders = [make_order(n) for n in range(threads * per_thread)]
+
+    def worker(chunk):
+        for order in chunk:
+            journal.append(order)
+
+    workers = [threading.Thread(target=worker, args=(orders[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = journal.stats()
+    journal.close()
+    print(f"burst: {len(orders)} durable appends from {threads} threads in {elapsed:.2f}s "
+          f"({len(orders) / elapsed:,.0f}/s, {stats['batches']} fsyncs)")
+
+
+def bench_replay(directory: str, count: int):
+    path = os.path.join(directory, 'replay.jsonl')
+    write_journal(path, count)
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    replayed = sum(1 for _ in replay_journal(path))
+    elapsed = time.perf_counter() - start
+    print(f"replay: {replayed:,} orders ({size / 1024 / 1024:.0f} MiB) in {elapsed:.2f}s "
+          f"({replayed / elapsed:,.0f}/s)")
+
+
+def main(count: int = 1_000_000):
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as directory:
+        bench_burst(directory)
+        bench_replay(directory, count)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,146 @@
+"""Prompt tokens per LLM call site: the previous inline prompts against PromptBuilder.
+
+Builds both versions for the same carts and customer contexts and reports
+the average prompt size, the tokens saved, and how much of each new prompt
+is the byte-stable prefix that provider-side prompt caching can reuse.
+
+    python -m tests.benchmarks.bench_prompts
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+from src.core.config import MENU, MODIFIERS
+from src.core.menu_snapshot import MenuSnapshot
+from src.core.prompts import PromptBuilder, estimate_tokens, message_tokens
+from src.core.state import CustomerContext
+
+BASE_MESSAGES = [
+    "How would you like to pay? Reply with CASH or CARD.",
+    "Would you like any milk modifications?",
+    "I didn't recognize those items. Would you like to see our menu?",
+    "Please choose a milk type or reply NO for regular milk",
+]
+USER_MESSAGES = ["what's good today?", "is the cold brew strong?", "can I get something sweet", "latte please"]
+
+
+def carts() -> List[Dict]:
+    items = [
+        {'name': 'Latte', 'quantity': 1, 'modifiers': ['oat milk'], 'price': 3.5},
+        {'name': 'Muffin', 'quantity': 2, 'modifiers': [], 'price': 3.0},
+        {'name': 'Cold Brew', 'quantity': 1, 'modifiers': [], 'price': 4.0},
+    ]
+    return [
+        {'items': items[:n], 'total': sum(i['price'] * i['quantity'] for i in items[:n]),
+         'pending_items': [], 'pending_item': dict(MENU[1]) if n == 2 else None}
+        for n in range(4)
+    ]
+
+
+def customers() -> List[CustomerContext]:
+    new = CustomerContext()
+    regular = CustomerContext()
+    regular.visit_count = 12
+    regular.usual_modifications = ['oat milk']
+    regular.favorite_items = ['Latte', 'Muffin']
+    regular.add_conversation_entry("latte please", "Added 1 latte ($3.50) to your cart.")
+    return [new, regular]
+
+
+def legacy_friendly(base_message, customer_context, cart, **kwargs) -> List[Dict]:
+    """get_friendly_response's previous prompt"""
+    cart_info = ""
+    if cart and cart.get('items'):
+        cart_info = "\nCurrent cart:\n"
+        for item in cart['items']:
+            mods = f" with {', '.join(item.get('modifiers', []))}" if item.get('modifiers') else ""
+            cart_info += f"- {item.get('quantity', 1)}x {item.get('name')}{mods}\n"
+        cart_info += f"Total: ${cart.get('total', 0):.2f}"
+    prompt = f"""You are a friendly, helpful barista.
+            Make this response conversational while keeping all important information.
+            Use max 1-2 emojis. Be concise but warm.
+            Time of day: morning
+            Customer context: {customer_context}
+            Cart information: {cart_info}
+            Message to convey: {base_message}
+            Additional context: {kwargs}
+            Keep prices and important information clear while being friendly.
+            """
+    return [{"role": "system", "content": prompt}, {"role": "user", "content": base_message}]
+
+
+def legacy_barista(snapshot, user_message, context) -> List[Dict]:
+    """get_ai_response's previous prompt"""
+    cart_info = context.get('cart', {})
+    lines = [f"- {i.get('quantity', 1)}x {i['name']}" for i in cart_info.get('items', [])]
+    system_message = f"""You are a friendly, helpful barista at a coffee shop. Current time: 09:30
+
+            Current Cart:
+            {chr(10).join(lines) or 'Empty'}
+            Current Total: ${Decimal(str(cart_info.get('total', '0'))):.2f}
+
+            Menu:
+            {snapshot.ai_menu_text}
+            
+            Modifiers Available:
+            {snapshot.modifier_text}
+            
+            Customer Context:
+            {context}
+            
+            Guidelines:
+            1. Be warm and friendly but concise (2-3 sentences max)
+            2. Use 1-2 emojis maximum
+            3. Always confirm prices and modifications clearly
+            4. Always acknowledge ALL items currently in cart when responding
+            5. Show running total including any modifiers
+            6. If asking about modifiers, mention current cart contents and potential total
+
+            Example good responses for modifier confirmation:
+            "I see you have a muffin ($3.00) in your cart. For the almond milk latte, there's a $0.75 charge for almond milk. Would you like to add it? Your total would be $8.25. ☕"
+            
+            Example good responses for regular orders:
+            "Added 1 latte ($3.50) to your cart. Your total is $3.50. Would you like to add any milk modifications? ☕"
+            """
+    return [{"role": "system", "content": system_message}, {"role": "user", "content": user_message}]
+
+
+def report(site: str, legacy: List[int], new: List[int], prefix: List[int]):
+    old_avg = sum(legacy) / len(legacy)
+    new_avg = sum(new) / len(new)
+    cached = sum(prefix) / sum(new)
+    print(f"{site:<24}{old_avg:>10.0f}{new_avg:>10.0f}{old_avg - new_avg:>10.0f}{1 - new_avg / old_avg:>9.0%}"
+          f"{cached:>12.0%}")
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+    builder = PromptBuilder()
+    print(f"{'call site':<24}{'before':>10}{'after':>10}{'saved':>10}{'saved %':>9}{'stable pre':>12}")
+
+    legacy, new, prefix = [], [], []
+    for cart in carts():
+        for customer in customers():
+            for message in BASE_MESSAGES:
+                legacy.append(message_tokens(legacy_friendly(message, customer, cart, payment=True)))
+                prompt = builder.friendly(message, 'morning', customer, cart, hints={'payment': True})
+                new.append(prompt.tokens)
+                prefix.append(estimate_tokens(prompt.messages[0]['content']))
+    report('get_friendly_response', legacy, new, prefix)
+
+    legacy, new, prefix = [], [], []
+    for cart in carts():
+        for message in USER_MESSAGES:
+            context = {'cart': cart, 'last_item': 'Latte', 'last_mods': ['oat milk'], 'visits': 3,
+                       'started': datetime.now().isoformat()}
+            legacy.append(message_tokens(legacy_barista(snapshot, message, context)))
+            prompt = builder.barista(snapshot, message, context, '09:30')
+            new.append(prompt.tokens)
+            prefix.append(estimate_tokens(prompt.messages[0]['content']))
+    report('get_ai_response', legacy, new, prefix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Cold-start benchmark: time from `import app` to the first SMS reply.
+
+Each run is a fresh interpreter so nothing is already imported or cached.
+
+    python -m tests.benchmarks.bench_startup [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Log records reach stdout from a background listener and can follow the result
+RESULT_MARKER = 'STARTUP_RESULT '
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+response = client.post('/sms', data={'From': '+15550000000', 'Body': 'menu'})
+assert response.status_code == 200
+first_response = time.perf_counter()
+print('STARTUP_RESULT ' + json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_response_ms': (first_response - imported) * 1000,
+    'total_ms': (first_response - start) * 1000,
+    'openai_loaded': 'openai' in sys.modules,
+    'twilio_rest_loaded': 'twilio.rest' in sys.modules,
+}))
+'''
+
+
+def run_once() -> dict:
+    env = dict(os.environ, LOG_LEVEL='WARNING', LOG_FILE='')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith(RESULT_MARKER))
+    return json.loads(line[len(RESULT_MARKER):])
+
+
+def main(runs: int = 5):
+    results = [run_once() for _ in range(runs)]
+    for key in ('import_ms', 'first_response_ms', 'total_ms'):
+        values = [result[key] for result in results]
+        print(f"{key:>18}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"openai imported before first reply: {results[-1]['openai_loaded']}")
+    print(f"twilio.rest imported before first reply: {results[-1]['twilio_rest_loaded']}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,197 @@
+"""Micro-benchmarks for the non-LLM work done on every message.
+
+Results are compared with tests/benchmarks/baseline.json; a benchmark more
+than --threshold slower than its baseline is reported as a regression and
+the run exits non-zero.
+
+    python -m tests.benchmarks.hot_paths              # compare with the baseline
+    python -m tests.benchmarks.hot_paths --save       # record a new baseline
+    python -m tests.benchmarks.hot_paths -k menu      # only matching benchmarks
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from src.core.cart import ShoppingCart
+from src.core.config import MENU, MODIFIERS
+from src.core.menu_handler import MenuHandler
+from src.core.payment import PaymentHandler
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# What customers actually text at each stage
+ORDER_MESSAGES = [
+    "1", "2", "latte", "Latte please", "can I get a cappuccino", "iced latte with oat milk",
+    "2 iced with almond", "Iced latte with almond milk and a muffin", "cold brew and a croissant",
+    "I'd like a latte with soy milk and 2 muffins", "espresso", "3 and 7", "menu", "what's good?",
+    "a large oat latte, extra hot please", "hey there! just a coffee", "oatly cappuccino",
+    "can I get the 12-hour cold brew", "muffin!", "nothing yet, still looking",
+]
+REPLY_MESSAGES = ["yes", "Yes!", "yeah", "ok", "sure thing", "no", "nope", "regular", "nah", "y", "n",
+                  "no thanks", "maybe", "actually make it oat", "cancel"]
+PAYMENT_MESSAGES = ["cash", "Cash please", "card", "I'll pay by card", "credit", "csah", "crd",
+                    "can I pay later?", "apple pay", "CASH"]
+CARDS = [("1234567890123456", "12/29", "123"), ("4111111111111111", "01/30", "999"),
+         ("12345678", "12/29", "123"), ("1234567890123456", "13/29", "123"), ("abcd", "xx", "1")]
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+
+
+def benchmark(name: str):
+    """Register a setup function returning the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def scaled_menu(size: int) -> Dict[int, Dict]:
+    """The real menu padded with generated drinks and food up to `size` items"""
+    menu = {key: dict(item) for key, item in MENU.items()}
+    flavors = ['vanilla', 'hazelnut', 'caramel', 'mocha', 'maple', 'honey', 'lavender', 'pumpkin', 'cinnamon']
+    bases = [('Latte', 'hot'), ('Cold Brew', 'cold'), ('Tea', 'hot'), ('Frappe', 'cold'), ('Scone', 'food')]
+    n = 0
+    while len(menu) < size:
+        base, category = bases[n % len(bases)]
+        name = f"{flavors[n % len(flavors)].title()} {base} No{n}"
+        menu[len(menu) + 1] = {'item': name, 'price': Decimal('4.25'), 'category': category, 'description': ''}
+        n += 1
+    return menu
+
+
+def each(fn: Callable, inputs: List) -> Callable[[], None]:
+    def run():
+        for value in inputs:
+            fn(value)
+    return run
+
+
+@benchmark('menu.extract[7 items]')
+def bench_extract_small():
+    return each(MenuHandler(menu=MENU, modifiers=MODIFIERS).extract_menu_items_and_modifiers, ORDER_MESSAGES)
+
+
+@benchmark('menu.extract[1000 items]')
+def bench_extract_large():
+    return each(MenuHandler(menu=scaled_menu(1000), modifiers=MODIFIERS).extract_menu_items_and_modifiers,
+                ORDER_MESSAGES)
+
+
+@benchmark('menu.is_confirmation+is_denial')
+def bench_confirmation():
+    handler = MenuHandler(menu=MENU, modifiers=MODIFIERS)
+
+    def run():
+        for message in REPLY_MESSAGES:
+            handler.is_confirmation(message)
+            handler.is_denial(message)
+    return run
+
+
+@benchmark('cart.add_item[10 lines]')
+def bench_cart_add():
+    items = [dict(MENU[key], modifier_prices={}) for key in MENU]
+
+    def run():
+        cart = ShoppingCart()
+        for n in range(10):
+            cart.add_item(items[n % len(items)], modifiers=['oat milk'] if n % 2 else [])
+    return run
+
+
+@benchmark('cart.get_summary[10 lines]')
+def bench_cart_summary():
+    cart = ShoppingCart()
+    for n, key in enumerate(list(MENU) * 2):
+        cart.add_item(MENU[key], modifiers=['oat milk'] if n % 2 else [])
+    return cart.get_summary
+
+
+@benchmark('app.get_cart_context[10 lines]')
+def bench_cart_context():
+    from app import get_cart_context
+    cart = ShoppingCart()
+    for n, key in enumerate(list(MENU) * 2):
+        cart.add_item(MENU[key], modifiers=['almond milk'] if n % 2 else [])
+    order = {'pending_items': [dict(MENU[2])], 'pending_item': dict(MENU[5])}
+    return lambda: get_cart_context(cart, order)
+
+
+@benchmark('payment.handle_payment')
+def bench_handle_payment():
+    handler = PaymentHandler()
+
+    def run():
+        for message in PAYMENT_MESSAGES:
+            # No active order: measures method matching without creating orders
+            handler.handle_payment('+15550000000', message, {}, {})
+    return run
+
+
+@benchmark('payment.validate_card_details')
+def bench_validate_card():
+    handler = PaymentHandler()
+
+    def run():
+        for card in CARDS:
+            handler.validate_card_details(*card)
+    return run
+
+
+def measure(fn: Callable[[], None], repeat: int = 5, min_time: float = 0.2) -> float:
+    """Best per-call time in microseconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-path micro-benchmarks")
+    parser.add_argument('--save', action='store_true', help="write results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument('-k', dest='pattern', default='', help="only run benchmarks containing this text")
+    parser.add_argument('--baseline', default=BASELINE)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results, regressions = {}, []
+    for name, setup in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+        results[name] = round(measure(setup()), 3)
+        base = baseline.get(name)
+        if base:
+            change = results[name] / base - 1
+            flag = 'REGRESSION' if change > args.threshold else ''
+            if flag:
+                regressions.append(name)
+            print(f"{name:<36}{results[name]:>12.1f} us  baseline {base:>10.1f} us  {change:+7.1%} {flag}")
+        else:
+            print(f"{name:<36}{results[name]:>12.1f} us  (no baseline)")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Tests that drive app.py place real CASH orders; keep them out of data/orders.jsonl
+os.environ['ORDER_JOURNAL_PATH'] = os.path.join(tempfile.mkdtemp(prefix='coffee-test-'), 'orders.jsonl')
+# Log to stdout only, so test runs leave no files under logs/
+os.environ['LOG_FILE'] = ''
@@ -0,0 +1,112 @@
+"""Local stand-in that serves the subset of the Redis protocol the app uses"""
+import fnmatch
+import socketserver
+import threading
+import time
+
+from src.core.session_store import RELEASE_LOCK_SCRIPT
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, _RespHandler)
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _expire(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def run_command(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == b'PING':
+                return b'+PONG\r\n'
+            if command == b'SELECT':
+                return b'+OK\r\n'
+            if command == b'GET':
+                self._expire(args[1])
+                return _bulk(self.data.get(args[1]))
+            if command == b'SET':
+                key, value = args[1], args[2]
+                options = [arg.upper() for arg in args[3:]]
+                self._expire(key)
+                if b'NX' in options and key in self.data:
+                    return b'$-1\r\n'
+                self.data[key] = value
+                self.expires.pop(key, None)
+                for flag, scale in ((b'PX', 1000), (b'EX', 1)):
+                    if flag in options:
+                        ttl = int(args[3 + options.index(flag) + 1])
+                        self.expires[key] = time.monotonic() + ttl / scale
+                return b'+OK\r\n'
+            if command == b'DEL':
+                removed = 0
+                for key in args[1:]:
+                    removed += self.data.pop(key, None) is not None
+                    self.expires.pop(key, None)
+                return b':%d\r\n' % removed
+            if command == b'SCAN':
+                # The cursor is an offset into the sorted keys; COUNT keys are examined per call
+                options = [arg.upper() for arg in args[2:]]
+                pattern = args[2 + options.index(b'MATCH') + 1].decode('utf-8') if b'MATCH' in options else '*'
+                count = int(args[2 + options.index(b'COUNT') + 1]) if b'COUNT' in options else 10
+                for key in list(self.data):
+                    self._expire(key)
+                start = int(args[1])
+                batch = sorted(self.data)[start:start + count]
+                cursor = start + count if start + count < len(self.data) else 0
+                keys = [key for key in batch if fnmatch.fnmatchcase(key.decode('utf-8'), pattern)]
+                return (b'*2\r\n' + _bulk(str(cursor).encode('utf-8')) +
+                        b'*%d\r\n' % len(keys) + b''.join(_bulk(key) for key in keys))
+            if command == b'EVAL':
+                # Only the session store's compare-and-delete script is understood
+                if args[1].decode('utf-8') != RELEASE_LOCK_SCRIPT:
+                    return b'-ERR unknown script\r\n'
+                key, token = args[3], args[4]
+                self._expire(key)
+                if self.data.get(key) != token:
+                    return b':0\r\n'
+                del self.data[key]
+                self.expires.pop(key, None)
+                return b':1\r\n'
+        return b'-ERR unknown command\r\n'
+
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.run_command(args))
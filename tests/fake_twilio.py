@@ -0,0 +1,60 @@
+"""Local stand-in for the Twilio Messages endpoint"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, _MessagesHandler)
+        self.messages = []
+        self.connections = set()
+        self.failures = []  # status codes returned, in order, before succeeding
+        self.lock = threading.Lock()
+        self.received = threading.Condition(self.lock)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def wait_for(self, count, timeout=5.0):
+        with self.received:
+            self.received.wait_for(lambda: len(self.messages) >= count, timeout)
+            return list(self.messages)
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            status = server.failures.pop(0) if server.failures else 201
+            if status == 201:
+                form['sid'] = f"SM{len(server.messages):032d}"
+                form['path'] = self.path
+                server.messages.append(form)
+                server.received.notify_all()
+        body = json.dumps({'sid': form.get('sid'), 'status': 'queued'}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,240 @@
+"""Concurrent SMS load test built on the TestScenarios conversations.
+
+Each virtual customer has its own phone number and plays one conversation
+(a TestScenarios case or a randomized order) message by message against
+/sms, either in-process through Flask's test client or over HTTP against a
+running server (e.g. gunicorn). Latency is reported per OrderStage the
+message was actually handled in, read from the X-Order-Stage header of each
+reply, along with throughput, error rate and how many replies diverged from
+the stage the script expected.
+
+    python -m tests.load_test --customers 2000 --concurrency 100
+    python -m tests.load_test --url http://127.0.0.1:10000 --customers 5000 --concurrency 200
+
+Without OPENAI_API_KEY the LLM calls fail fast and the deterministic replies
+are used; with a key, every conversational step makes real API calls.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# In-process runs place real orders; keep them out of data/orders.jsonl
+os.environ.setdefault('ORDER_JOURNAL_PATH', os.path.join(tempfile.mkdtemp(), 'orders.jsonl'))
+
+from src.core.config import MENU, MODIFIERS
+from src.core.enums import OrderStage
+from tests.test_scenarios import TestScenarios
+
+Step = Tuple[str, str]  # (expected stage label, message)
+ERROR_REPLY = "Sorry, something went wrong"
+STAGE_HEADER = 'X-Order-Stage'
+
+
+def stage_for(message: str) -> str:
+    """The OrderStage a scripted message is meant to be answered in.
+
+    Only used to count divergence, and as the label when a server does not
+    send X-Order-Stage (e.g. SMS_ASYNC, where the reply is not in the response).
+    """
+    text = message.strip().lower()
+    if text in ('start', 'status', 'menu'):
+        return f"{text}_command"  # commands answered outside the state machine
+    if text.startswith('card '):
+        return OrderStage.AWAITING_CARD.value
+    if text in ('cash', 'card'):
+        return OrderStage.PAYMENT.value
+    if text in ('yes', 'no'):
+        return OrderStage.AWAITING_MOD_CONFIRM.value
+    return OrderStage.MENU.value
+
+
+def card_message() -> str:
+    return f"CARD 4111111111111111 12/{(datetime.now().year + 2) % 100:02d} 123"
+
+
+def random_conversation(rng: random.Random) -> List[str]:
+    """A plausible order: a few items by number or name, milk choices, then payment"""
+    milks = [mod for mods in MODIFIERS.values() for mod in mods]
+    messages = ['start']
+    for _ in range(rng.randint(1, 3)):
+        menu_id = rng.choice(list(MENU))
+        item = MENU[menu_id]
+        if item['category'] in ('hot', 'cold') and rng.random() < 0.5:
+            messages.append(f"{item['item'].lower()} with {rng.choice(milks)}")
+            messages.append('yes')
+        else:
+            messages.append(str(menu_id) if rng.random() < 0.5 else item['item'].lower())
+            if item['category'] in ('hot', 'cold'):
+                messages.append('no')
+    if rng.random() < 0.2:
+        messages.append('menu')
+    messages.append('done')
+    if rng.random() < 0.5:
+        messages.append('cash')
+    else:
+        messages.extend(['card', card_message()])
+    messages.append('status')
+    return messages
+
+
+def build_scripts(customers: int, random_ratio: float, seed: int) -> List[Tuple[str, List[Step]]]:
+    """One (phone, steps) script per virtual customer"""
+    rng = random.Random(seed)
+    scenarios = TestScenarios().test_cases
+    scripts = []
+    for n in range(customers):
+        if rng.random() < random_ratio:
+            messages = random_conversation(rng)
+        else:
+            messages = list(scenarios[n % len(scenarios)].messages)
+        scripts.append((f"+1555{n:07d}", [(stage_for(message), message) for message in messages]))
+    return scripts
+
+
+class InProcessTransport:
+    """Posts to the Flask app in this process; one test client per thread"""
+    def __init__(self):
+        import app
+        self._app = app.app
+        self._local = threading.local()
+
+    def send(self, phone: str, message: str) -> Tuple[int, str, Optional[str]]:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.post('/sms', data={'From': phone, 'Body': message})
+        return response.status_code, response.get_data(as_text=True), response.headers.get(STAGE_HEADER)
+
+
+class HttpTransport:
+    """Posts to a running server over pooled keep-alive connections"""
+    def __init__(self, base_url: str, connections: int, timeout: float):
+        import httpx
+        self._client = httpx.Client(
+            base_url=base_url.rstrip('/'), timeout=timeout,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        )
+
+    def send(self, phone: str, message: str) -> Tuple[int, str, Optional[str]]:
+        response = self._client.post('/sms', data={'From': phone, 'Body': message})
+        return response.status_code, response.text, response.headers.get(STAGE_HEADER)
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.diverged = 0  # replies handled in a different stage than the script expected
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, ok: bool, expected: Optional[str] = None):
+        with self._lock:
+            self.latencies.setdefault(stage, []).append(seconds)
+            if not ok:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+            if expected is not None and expected != stage:
+                self.diverged += 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_customer(transport, phone: str, steps: List[Step], results: Results, think_time: float):
+    for expected, message in steps:
+        start = time.perf_counter()
+        stage = None
+        try:
+            status, body, stage = transport.send(phone, message)
+            ok = status == 200 and ERROR_REPLY not in body
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if stage:
+            results.record(stage, elapsed, ok, expected)
+        else:
+            results.record(expected, elapsed, ok)
+        if think_time:
+            time.sleep(think_time)
+
+
+def run(transport, scripts, concurrency: int, think_time: float = 0.0) -> Dict:
+    """Play every script with up to `concurrency` customers at once and summarize"""
+    results = Results()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for phone, steps in scripts:
+            pool.submit(run_customer, transport, phone, steps, results, think_time)
+    elapsed = time.perf_counter() - start
+
+    stages = {}
+    for stage, values in sorted(results.latencies.items()):
+        values.sort()
+        stages[stage] = {
+            'requests': len(values),
+            'errors': results.errors.get(stage, 0),
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000
+        }
+    requests = sum(stage['requests'] for stage in stages.values())
+    errors = sum(stage['errors'] for stage in stages.values())
+    return {
+        'customers': len(scripts),
+        'concurrency': concurrency,
+        'requests': requests,
+        'seconds': elapsed,
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        'error_rate': errors / requests if requests else 0.0,
+        'diverged': results.diverged,
+        'stages': stages
+    }
+
+
+def print_report(summary: Dict):
+    print(f"{summary['customers']} customers, concurrency {summary['concurrency']}: "
+          f"{summary['requests']} requests in {summary['seconds']:.1f}s "
+          f"({summary['throughput_rps']:.0f} req/s), error rate {summary['error_rate']:.2%}, "
+          f"{summary['diverged']} replies off script")
+    print(f"{'stage':<22}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in summary['stages'].items():
+        print(f"{stage:<22}{row['requests']:>10}{row['errors']:>8}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--url', help="base URL of a running server; default is in-process")
+    parser.add_argument('--random-ratio', type=float, default=0.7, help="share of randomized conversations")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="pause between a customer's messages")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.ERROR)
+    transport = (HttpTransport(args.url, args.concurrency, args.timeout) if args.url
+                 else InProcessTransport())
+    scripts = build_scripts(args.customers, args.random_ratio, args.seed)
+    summary = run(transport, scripts, args.concurrency, args.think_ms / 1000)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    return summary
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,24 @@
+import logging
+
+import pytest
+from tests.benchmarks import bench_chat_fast_path
+from tests.benchmarks.hot_paths import BENCHMARKS, scaled_menu
+
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_benchmark_runs(name):
+    BENCHMARKS[name]()()
+
+def test_scaled_menu_has_unique_names():
+    menu = scaled_menu(1000)
+    assert len(menu) == 1000
+    assert len({item['item'] for item in menu.values()}) == 1000
+
+def test_chat_fast_path_benchmark_runs(monkeypatch, capsys):
+    import app
+    # main() swaps in a counting client; put the app's own back afterwards
+    monkeypatch.setattr(app.conversation_handler, '_client', app.conversation_handler._client)
+    try:
+        bench_chat_fast_path.main(2)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert "LLM calls from casual chat: before" in capsys.readouterr().out
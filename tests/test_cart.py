@@ -0,0 +1,62 @@
+from decimal import Decimal
+from src.core.cart import LINE_INDEX_THRESHOLD, CartItem, ShoppingCart, to_cents
+
+LATTE = {'item': 'Latte', 'price': Decimal('4.50'), 'category': 'hot', 'description': ''}
+
+def test_prices_are_exact_in_cents():
+    assert to_cents(4.5) == 450
+    assert to_cents('0.1') + to_cents('0.2') == to_cents('0.3')
+    item = CartItem('Latte', Decimal('4.50'), quantity=3, modifiers=['oat milk'])
+    assert item.get_total_price() == Decimal('15.75')
+
+def test_total_tracks_add_remove_and_clear():
+    cart = ShoppingCart()
+    cart.add_item(LATTE, quantity=2, modifiers=['oat milk'])
+    cart.add_item(LATTE)
+    assert cart.get_total() == Decimal('15.00')
+
+    cart.remove_item(0, quantity=5)
+    assert cart.get_total() == Decimal('4.50')
+    cart.clear()
+    assert cart.get_total() == Decimal('0.00')
+
+def test_round_trip_keeps_total():
+    cart = ShoppingCart()
+    cart.add_item(dict(LATTE, modifier_prices={'oat milk': Decimal('0.80')}), modifiers=['oat milk'])
+    restored = ShoppingCart.from_dict(cart.to_dict())
+    assert restored.items == cart.items
+    assert restored.get_total() == Decimal('5.30')
+
+def test_identical_lines_merge_regardless_of_modifier_order():
+    cart = ShoppingCart()
+    cart.add_item(LATTE, modifiers=['oat milk', 'soy milk'])
+    cart.add_item(LATTE, modifiers=['soy milk', 'oat milk'])
+    cart.add_item(LATTE, modifiers=['oat milk'])
+    assert [item.quantity for item in cart.items] == [2, 1]
+
+    cart.remove_item(0, quantity=2)
+    cart.add_item(LATTE, modifiers=['soy milk', 'oat milk'])
+    assert [(item.modifiers, item.quantity) for item in cart.items] == [
+        (('oat milk',), 1), (('soy milk', 'oat milk'), 1)
+    ]
+
+def test_add_items_applies_a_whole_order():
+    cart = ShoppingCart()
+    muffin = {'item': 'Muffin', 'price': Decimal('3.00'), 'category': 'food'}
+    cart.add_items([muffin] * 30 + [dict(LATTE, quantity=10, modifiers=['oat milk'])])
+    assert [(item.name, item.quantity) for item in cart.items] == [('Muffin', 30), ('Latte', 10)]
+    assert cart.get_total() == Decimal('142.50')
+
+def test_large_carts_merge_through_the_line_index():
+    cart = ShoppingCart()
+    names = [f"Item {n}" for n in range(LINE_INDEX_THRESHOLD + 4)]
+    for name in names + names:
+        cart.add_item(dict(LATTE, item=name))
+    assert cart._lines is not None
+    assert [item.quantity for item in cart.items] == [2] * len(names)
+
+    cart.remove_item(0, quantity=2)
+    cart.add_item(dict(LATTE, item=names[0]))
+    cart.add_item(dict(LATTE, item=names[1]))
+    assert [(item.name, item.quantity) for item in cart.items][-2:] == [(names[-1], 2), (names[0], 1)]
+    assert cart.items[0].quantity == 3
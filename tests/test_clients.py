@@ -0,0 +1,32 @@
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from src.core import clients
+from src.core.conversation_handler import ConversationHandler
+from src.core.dialogue import DialogueManager
+
+
+def test_http_client_has_explicit_timeouts():
+    client = clients.build_http_client(max_connections=3, connect_timeout=1.5, read_timeout=7)
+
+    assert client.timeout.connect == 1.5
+    assert client.timeout.read == 7
+    assert client.timeout.pool == 1.5
+    client.close()
+
+
+def test_call_sites_share_one_openai_client(monkeypatch):
+    monkeypatch.setattr(clients, '_openai_client', None)
+
+    shared = clients.get_openai_client()
+
+    assert ConversationHandler().client is shared
+    assert DialogueManager().client is shared
+    assert shared.timeout.connect == clients.OPENAI_CONNECT_TIMEOUT
+
+
+def test_fork_drops_inherited_client(monkeypatch):
+    monkeypatch.setattr(clients, '_openai_client', object())
+    clients._forget_clients()
+    assert clients._openai_client is None
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.config import MENU, MODIFIERS
+from src.core.conversation_handler import CASUAL_RESPONSES, ConversationHandler, INTENT_CLASSIFIER
+from src.core.menu_index import MenuIndex
+
+
+class FailingOpenAI:
+    """Stand-in client that fails the test if a completion is requested"""
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        raise AssertionError("casual chat must not call the LLM")
+
+
+@pytest.mark.parametrize('message, intent', [
+    ("hi", 'greeting'),
+    ("Good  morning!", 'greeting'),
+    ("how's it going", 'how_are_you'),
+    ("thanks!", 'thanks'),
+    ("is it busy right now?", 'busy'),
+    ("it's so hot out", 'weather'),
+])
+def test_classifier_matches_casual_messages(message, intent):
+    assert INTENT_CLASSIFIER.classify(message) == intent
+
+
+@pytest.mark.parametrize('message', ["chai latte", "this one please", "an extra shot", "cold brew", "with oat milk"])
+def test_classifier_ignores_words_inside_orders(message):
+    assert INTENT_CLASSIFIER.classify(message) is None
+
+
+def test_handle_chat_answers_from_canned_pool():
+    handler = ConversationHandler(FailingOpenAI())
+
+    assert handler.handle_chat("hello there") in CASUAL_RESPONSES['greeting']
+    assert handler.handle_chat("a chai latte please") is None
+
+
+@pytest.mark.parametrize('message', ["hey can I get a latte", "latte, thanks", "hi! 2 please",
+                                     "thanks, with oat milk", "good morning, a muffin and a cappuccino"])
+def test_classifier_leaves_chat_with_an_order_to_the_menu_matcher(message):
+    index = MenuIndex(MENU, MODIFIERS)
+    assert INTENT_CLASSIFIER.classify(message, index) is None
+    assert INTENT_CLASSIFIER.classify("hey there", index) == 'greeting'
+
+
+def test_greeting_with_an_order_adds_the_item(monkeypatch):
+    import app
+
+    def offline(**kwargs):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=offline))))
+    phone = '+15550002121'
+    app.process_message(phone, 'start')
+    app.process_message(phone, 'hey can I get a muffin')
+
+    with app.session_store.transaction(phone) as session:
+        assert [item.name for item in session.order['cart'].items] == ['Muffin']
+        session.order = None
+
+
+@pytest.mark.parametrize('reply, modifiers', [("no thanks", []), ("yes thanks", ['oat milk'])])
+def test_milk_question_reply_with_thanks_is_not_chat(monkeypatch, reply, modifiers):
+    import app
+    from src.core.enums import OrderStage
+
+    def offline(**kwargs):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=offline))))
+    phone = '+15550002222'
+    app.process_message(phone, 'start')
+    app.process_message(phone, 'oat milk latte' if modifiers else 'latte')
+    app.process_message(phone, reply)
+
+    with app.session_store.transaction(phone) as session:
+        assert session.order['state'] == OrderStage.MENU
+        assert [(item.name, list(item.modifiers)) for item in session.order['cart'].items] == [('Latte', modifiers)]
+        session.order = None
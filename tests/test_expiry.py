@@ -0,0 +1,56 @@
+import time
+from src.core.expiry import ExpiryIndex, SessionSweeper
+from src.core.session_store import MemorySessionStore, PhoneSession, SQLiteSessionStore
+from src.core.state import CustomerContext
+
+def test_pop_expired_returns_only_due_keys():
+    index = ExpiryIndex()
+    index.touch('a', 10)
+    index.touch('b', 20)
+    index.touch('c', 30)
+
+    assert index.pop_expired(25) == ['a', 'b']
+    assert len(index) == 1
+    assert index.pop_expired(25) == []
+
+def test_touch_moves_deadline_forward():
+    index = ExpiryIndex()
+    index.touch('a', 10)
+    index.touch('a', 50)
+
+    assert index.pop_expired(20) == []
+    assert index.pop_expired(50) == ['a']
+
+def test_stale_heap_entries_are_compacted():
+    index = ExpiryIndex()
+    for deadline in range(1000):
+        index.touch('a', deadline)
+
+    assert len(index) == 1
+    assert len(index._heap) < 100
+
+def test_sweeper_evicts_idle_memory_sessions():
+    store = MemorySessionStore(ttl=60)
+    store.save('+15550001', PhoneSession(context=CustomerContext()))
+    store.save('+15550002', PhoneSession(context=CustomerContext()))
+    sweeper = SessionSweeper()
+    sweeper.register('sessions', store.purge_expired, lambda: len(store))
+
+    assert sweeper.sweep()['sessions'] == (0, 0)
+    sweeper._clock = lambda: time.time() + 61
+    count, reclaimed = sweeper.sweep()['sessions']
+
+    assert count == 2
+    assert reclaimed > 0
+    assert sweeper.stats()['live'] == {'sessions': 0}
+    assert sweeper.stats()['bytes_reclaimed']['sessions'] == reclaimed
+
+def test_sqlite_store_purges_by_last_update(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), ttl=60)
+    store.save('+15550001', PhoneSession(context=CustomerContext()))
+
+    assert store.purge_expired(time.time()) == (0, 0)
+    count, reclaimed = store.purge_expired(time.time() + 61)
+    assert count == 1
+    assert reclaimed > 0
+    assert len(store) == 0
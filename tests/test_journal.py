@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from src.core.cart import ShoppingCart
+from src.core.journal import OrderJournal, replay_journal
+from src.core.order import Order
+
+def make_order(phone, muffins=1):
+    cart = ShoppingCart()
+    cart.add_item({'item': 'Muffin', 'price': '3.00', 'category': 'food'}, quantity=muffins)
+    cart.add_item({'item': 'Latte', 'price': '4.50', 'category': 'hot'}, modifiers=['oat milk'])
+    order = Order(phone, cart)
+    order.payment_method = 'card'
+    return order
+
+def test_orders_survive_reopen(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    journal = OrderJournal(path)
+    orders = [make_order(f"+1555000000{n}", muffins=n + 1) for n in range(3)]
+    for order in orders:
+        assert journal.append(order)
+    journal.close()
+
+    replayed = list(OrderJournal(path).replay())
+    assert [order.id for order in replayed] == [order.id for order in orders]
+    assert replayed[2].total == Decimal('14.25')
+    assert replayed[2].items == orders[2].items
+    assert replayed[0].created_at == orders[0].created_at
+
+def test_burst_of_appends_is_group_committed(tmp_path):
+    journal = OrderJournal(str(tmp_path / 'orders.jsonl'))
+    threads = [threading.Thread(target=journal.append, args=(make_order(f"+1{n}"),)) for n in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = journal.stats()
+    journal.close()
+    assert stats['records'] == 50
+    assert stats['batches'] < 50
+
+def test_replay_skips_torn_and_corrupt_records(tmp_path):
+    path = tmp_path / 'orders.jsonl'
+    journal = OrderJournal(str(path))
+    first = make_order('+1')
+    journal.append(first)
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"not an order":1}\n{"id":"torn')
+
+    assert [order.id for order in replay_journal(str(path))] == [first.id]
+    assert list(replay_journal(str(tmp_path / 'missing.jsonl'))) == []
+
+def test_append_after_torn_record_starts_a_new_line(tmp_path):
+    path = tmp_path / 'orders.jsonl'
+    journal = OrderJournal(str(path))
+    first = make_order('+1')
+    journal.append(first)
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"id":"torn')
+
+    journal = OrderJournal(str(path))
+    second = make_order('+2')
+    journal.append(second)
+    journal.close()
+
+    assert [order.id for order in replay_journal(str(path))] == [first.id, second.id]
+
+def test_replay_since_seeks_past_old_orders(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    journal = OrderJournal(path)
+    orders = []
+    for hours in range(48):
+        order = make_order(f"+1{hours}")
+        order.created_at = datetime(2024, 5, 1) + timedelta(hours=hours)
+        journal.append(order, timeout=None)
+        orders.append(order)
+    journal.close()
+
+    since = (datetime(2024, 5, 2, 12) - timedelta(seconds=1)).timestamp()
+    replayed = [order.id for order in replay_journal(path, since)]
+    # Orders before the cutoff are skipped by the seek, not replayed and filtered
+    assert replayed == [order.id for order in orders[36:]]
+    assert [order.id for order in replay_journal(path, 0)] == [order.id for order in orders]
+
+def test_read_new_returns_records_appended_since_last_call(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    journal = OrderJournal(path)
+    first = make_order('+1')
+    journal.append(first)
+    assert [order.id for order in journal.read_new()] == [first.id]
+    assert journal.read_new() == []
+
+    other = OrderJournal(path)
+    second = make_order('+2')
+    other.append(second)
+    other.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"id":"half-written')
+
+    assert [order.id for order in journal.read_new()] == [second.id]
+    journal.close()
@@ -0,0 +1,81 @@
+from datetime import datetime
+from types import SimpleNamespace
+from src.core.cart import ShoppingCart
+from src.core.kitchen import KitchenScheduler
+from src.core.order import Order
+
+PREP = {'Latte': 180, 'Muffin': 30}
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def make_order(*names):
+    cart = ShoppingCart()
+    for name in names:
+        cart.add_item({'item': name, 'price': 4, 'category': 'hot'})
+    return Order('+1', cart)
+
+def wait_seconds(clock, ready):
+    return ready.timestamp() - clock.now
+
+def test_eta_grows_with_queue_depth():
+    clock = FakeClock()
+    kitchen = KitchenScheduler(stations=2, prep_times=PREP, clock=clock)
+    waits = [wait_seconds(clock, kitchen.schedule(make_order('Latte'))) for _ in range(5)]
+    assert waits == [180, 180, 360, 360, 540]
+    assert kitchen.queue_depth() == 5
+
+def test_prep_time_depends_on_items():
+    clock = FakeClock()
+    kitchen = KitchenScheduler(stations=1, prep_times=PREP, category_times={'hot': 100}, clock=clock)
+    assert wait_seconds(clock, kitchen.schedule(make_order('Muffin', 'Muffin', 'Espresso'))) == 160
+
+def test_finished_and_completed_orders_free_stations():
+    clock = FakeClock()
+    kitchen = KitchenScheduler(stations=1, prep_times=PREP, clock=clock)
+    first = make_order('Latte')
+    kitchen.schedule(first)
+    clock.now += 60
+    assert kitchen.complete(first.id)
+    assert wait_seconds(clock, kitchen.schedule(make_order('Muffin'))) == 30
+
+    clock.now += 31
+    assert kitchen.queue_depth() == 0
+
+def test_restored_orders_keep_their_promised_time():
+    clock = FakeClock()
+    kitchen = KitchenScheduler(stations=1, prep_times=PREP, clock=clock)
+    order = make_order('Latte')
+    order.estimated_ready = datetime.fromtimestamp(clock.now + 300)
+    kitchen.restore(order)
+    assert wait_seconds(clock, kitchen.schedule(make_order('Muffin'))) == 330
+
+def test_eta_counts_orders_other_workers_took(monkeypatch):
+    import app
+    from src.core.journal import OrderJournal
+    from src.core.session_store import MemorySessionStore
+
+    monkeypatch.setattr(app, 'kitchen', KitchenScheduler(stations=1))
+    monkeypatch.setattr(app.payment_handler, 'scheduler', app.kitchen)
+    monkeypatch.setattr(app, 'session_store', MemorySessionStore())
+
+    def offline(**kwargs):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=offline))))
+    # A second journal on the same file stands in for another gunicorn worker
+    other_worker = OrderJournal(app.ORDER_JOURNAL_PATH)
+    busy = make_order('Latte')
+    busy.estimated_ready = datetime.fromtimestamp(datetime.now().timestamp() + 600)
+    other_worker.append(busy)
+    other_worker.close()
+
+    phone = '+15550006060'
+    for message in ('start', 'muffin', 'done', 'cash'):
+        app.process_message(phone, message)
+    assert app.completed_orders[phone][-1].estimated_ready >= busy.estimated_ready
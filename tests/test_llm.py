@@ -0,0 +1,53 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from src.core.llm import LLMDeadline, LLMTimeout
+from src.core.conversation_handler import ConversationHandler
+
+class SlowOpenAI:
+    """Stand-in client whose completions take longer than the budget"""
+    def __init__(self, delay):
+        self.delay = delay
+        self.finished = threading.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        time.sleep(self.delay)
+        self.finished.set()
+        message = SimpleNamespace(content="too late")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def test_deadline_returns_fast_results():
+    deadline = LLMDeadline(timeout_ms=500)
+    assert deadline.call('test', lambda: 'ok') == 'ok'
+    assert deadline.stats()['timeouts'] == 0
+
+def test_deadline_raises_and_counts_late_completion():
+    deadline = LLMDeadline(timeout_ms=20)
+    done = threading.Event()
+
+    def slow():
+        time.sleep(0.1)
+        done.set()
+        return 'late'
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        deadline.call('test', slow)
+    assert time.monotonic() - started < 0.09
+
+    done.wait(1)
+    time.sleep(0.02)
+    assert deadline.timeouts == 1
+    assert deadline.late_completions == 1
+
+def test_friendly_response_falls_back_to_base_message():
+    client = SlowOpenAI(delay=0.2)
+    handler = ConversationHandler(client, deadline=LLMDeadline(timeout_ms=20))
+
+    started = time.monotonic()
+    response = handler.get_friendly_response("Please choose your payment method", {})
+
+    assert response == "Please choose your payment method"
+    assert time.monotonic() - started < 0.15
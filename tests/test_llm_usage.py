@@ -0,0 +1,101 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import llm_usage
+from src.core.conversation_handler import ConversationHandler
+from src.core.llm import LLMDeadline
+from src.core.llm_usage import UsageLedger, call_cost
+from src.core.response_cache import ResponseCache
+
+PRICES = {'gpt-test': (1.0, 2.0)}
+
+
+class CountingOpenAI:
+    """Stand-in client that reports token usage like the OpenAI API"""
+    def __init__(self, prompt_tokens=100, completion_tokens=20):
+        self.usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content="Hi there!")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage,
+                               model=kwargs['model'])
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    ledger = UsageLedger(prices=PRICES, max_conversations=2)
+    monkeypatch.setattr(llm_usage, 'LEDGER', ledger)
+    monkeypatch.setattr('src.core.llm.LEDGER', ledger)
+    return ledger
+
+
+def test_call_cost_uses_per_thousand_token_prices():
+    assert call_cost('gpt-test', 1000, 500, PRICES) == pytest.approx(2.0)
+    assert call_cost('unknown', 1000, 500, PRICES) == 0.0
+
+
+def test_dated_snapshots_are_priced_by_longest_prefix():
+    prices = {'gpt-test': (1.0, 2.0), 'gpt-test-large': (10.0, 20.0)}
+    assert call_cost('gpt-test-0125', 1000, 0, prices) == pytest.approx(1.0)
+    assert call_cost('gpt-test-large-0125', 1000, 0, prices) == pytest.approx(10.0)
+
+
+def test_late_completion_tokens_are_charged_to_the_conversation(ledger):
+    client = CountingOpenAI()
+    finished = threading.Event()
+
+    def slow_create(**kwargs):
+        time.sleep(0.1)
+        response = client.create(**kwargs)
+        finished.set()
+        return response
+
+    client.chat.completions.create = slow_create
+    handler = ConversationHandler(client, deadline=LLMDeadline(timeout_ms=20))
+    ledger.prices = {'gpt-3.5': (1.0, 2.0)}
+    llm_usage.set_conversation('+15550002020')
+
+    assert handler.get_friendly_response("Hello", {}) == "Hello"
+    finished.wait(1)
+    time.sleep(0.05)
+
+    conversation = ledger.conversation('+15550002020')
+    assert conversation['calls'] == 1
+    assert conversation['failed'] == 1
+    assert conversation['total_tokens'] == 120
+    assert conversation['cost'] == pytest.approx((100 * 1.0 + 20 * 2.0) / 1000)
+
+
+def test_completion_usage_is_charged_to_conversation_and_order(ledger):
+    handler = ConversationHandler(CountingOpenAI(), cache=ResponseCache(max_size=8, ttl=60))
+    llm_usage.set_conversation('+15550001919')
+
+    handler.get_friendly_response("Hello", {})
+    handler.get_friendly_response("Hello", {})  # served from cache
+
+    conversation = ledger.conversation('+15550001919')
+    assert conversation['calls'] == 2
+    assert conversation['cached'] == 1
+    assert conversation['total_tokens'] == 120
+
+    ledger.close_order(SimpleNamespace(id='abc123', phone_number='+15550001919'))
+    report = ledger.report()
+    assert report['orders']['completed'] == 1
+    assert report['orders']['tokens_per_order'] == 120
+    assert report['orders']['recent'][0]['order_id'] == 'abc123'
+    assert report['by_call_site']['get_friendly_response']['calls'] == 2
+    assert ledger.conversation('+15550001919')['calls'] == 0
+
+
+def test_oldest_conversations_are_evicted(ledger):
+    for phone in ('+1', '+2', '+3'):
+        llm_usage.set_conversation(phone)
+        ledger.record('site', 'gpt-test', 'ok', 10, 10)
+
+    assert ledger.report()['open_conversations'] == 2
+    assert ledger.conversation('+1')['calls'] == 0
+    assert ledger.total.calls == 3
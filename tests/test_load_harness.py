@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from src.core.enums import OrderStage
+from tests.load_test import InProcessTransport, build_scripts, run, stage_for
+
+class EchoTransport:
+    def __init__(self):
+        self.phones = set()
+
+    def send(self, phone, message):
+        self.phones.add(phone)
+        if message == 'done':
+            return 500, '', None
+        return 200, '<Response><Message>ok</Message></Response>', None
+
+def test_scripts_cover_scenarios_and_random_orders():
+    scripts = build_scripts(50, random_ratio=0.5, seed=1)
+    assert len({phone for phone, _ in scripts}) == 50
+    assert all(steps[0] == ('start_command', 'start') for _, steps in scripts)
+    assert stage_for('CARD 4111111111111111 12/30 123') == OrderStage.AWAITING_CARD.value
+
+def test_run_reports_per_stage_latency_and_errors():
+    transport = EchoTransport()
+    summary = run(transport, build_scripts(20, random_ratio=1.0, seed=2), concurrency=5)
+    assert len(transport.phones) == 20
+    assert summary['stages']['menu']['errors'] == 20
+    assert 0 < summary['error_rate'] < 1
+    assert summary['stages']['start_command']['p99_ms'] >= summary['stages']['start_command']['p50_ms']
+
+def test_latency_is_attributed_to_the_stage_the_app_reports(monkeypatch):
+    import app
+
+    def offline(**kwargs):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=offline))))
+    transport = InProcessTransport()
+    script = [('+15550005555', [(stage_for(m), m) for m in ['start', 'muffin', 'yes', 'done', 'cash']])]
+    summary = run(transport, script, concurrency=1)
+    # 'yes' with nothing awaiting confirmation is handled in the menu stage, not awaiting_mod_confirm
+    assert OrderStage.AWAITING_MOD_CONFIRM.value not in summary['stages']
+    assert summary['stages'][OrderStage.MENU.value]['requests'] == 3
+    assert summary['stages'][OrderStage.PAYMENT.value]['requests'] == 1
+    assert summary['diverged'] == 1
@@ -0,0 +1,99 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from src.core.config import MENU
+from src.core.locks import FairLock, StripedLock
+from src.core.response_policy import ResponsePolicy
+from src.core.session_store import MemorySessionStore
+
+
+def test_fair_lock_admits_waiters_in_arrival_order():
+    lock = FairLock()
+    lock.acquire()
+    order = []
+
+    def worker(n):
+        lock.acquire()
+        order.append(n)
+        lock.release()
+
+    threads = []
+    for n in range(8):
+        thread = threading.Thread(target=worker, args=(n,))
+        thread.start()
+        threads.append(thread)
+        # Wait until this thread holds its ticket before starting the next one
+        while lock._next_ticket != n + 2:
+            time.sleep(0.001)
+    lock.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == list(range(8))
+
+
+def test_different_stripes_do_not_block_each_other():
+    locks = StripedLock(16)
+    first = '+15550000001'
+    second = next(f'+1555000{n:04d}' for n in range(100) if locks.stripe(f'+1555000{n:04d}') != locks.stripe(first))
+    entered = threading.Event()
+
+    def other():
+        with locks.hold(second):
+            entered.set()
+
+    with locks.hold(first):
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert entered.wait(1)
+    thread.join()
+    assert locks.stats()['contended'] == 0
+
+
+def test_concurrent_messages_from_one_phone(monkeypatch):
+    import app
+
+    # Recorded rather than raised: get_friendly_response would swallow an exception
+    llm_calls = []
+
+    def create(**kwargs):
+        llm_calls.append(kwargs)
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app, 'session_store', MemorySessionStore())
+    monkeypatch.setattr(app, 'completed_orders', {})
+    monkeypatch.setattr(app, 'response_policy', ResponsePolicy.profile('latency_critical'))
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(app.conversation_handler, 'cache', None)  # a cached rewrite would hide a call
+    phone = '+15550003333'
+    app.process_message(phone, 'start')
+
+    def burst(message, count=16):
+        barrier = threading.Barrier(count)
+        replies = []
+
+        def send():
+            barrier.wait()
+            replies.append(app.process_message(phone, message))
+
+        threads = [threading.Thread(target=send) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return replies
+
+    burst('muffin')
+    with app.session_store.transaction(phone) as session:
+        assert session.order['cart'].items[0].quantity == 16
+
+    app.process_message(phone, 'done')
+    replies = burst('cash')
+
+    # Only the first payment creates an order; the rest find no active order
+    assert len(app.completed_orders[phone]) == 1
+    assert sum("order number" in reply for reply in replies) == 1
+    assert app.completed_orders[phone][0].total == 16 * MENU[7]['price']
+    assert llm_calls == []
@@ -0,0 +1,50 @@
+import gzip
+import logging
+import queue
+from types import SimpleNamespace
+from src.utils.log import GzipRotatingFileHandler, LazyQueueHandler, SampledDebugFilter
+
+def make_record(level, msg, *args):
+    return logging.LogRecord('test', level, __file__, 1, msg, args, None)
+
+def test_debug_records_are_sampled():
+    sampler = SampledDebugFilter(rate=10)
+    kept = [sampler.filter(make_record(logging.DEBUG, "cart")) for _ in range(100)]
+    assert sum(kept) == 10
+    assert sampler.filter(make_record(logging.INFO, "order placed"))
+
+def test_queue_handler_resolves_arguments_only():
+    log_queue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    cart = ['Latte']
+    handler.handle(make_record(logging.INFO, "Cart: %s", cart))
+    cart.append('Muffin')
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "Cart: ['Latte']"
+    assert not hasattr(record, 'asctime')
+
+def test_rotated_files_are_gzipped(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = GzipRotatingFileHandler(str(path), max_bytes=200, backup_count=2)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for n in range(100):
+        handler.emit(make_record(logging.INFO, "line %d", n))
+    handler.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['app.log', 'app.log.1.gz', 'app.log.2.gz']
+    assert gzip.decompress((tmp_path / 'app.log.1.gz').read_bytes()).startswith(b'line ')
+
+def test_respawned_worker_reuses_its_log_slot():
+    import gunicorn_config
+    server = SimpleNamespace(WORKERS={})
+    for pid in (101, 102, 103):
+        worker = SimpleNamespace()
+        gunicorn_config.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    assert [worker.slot for worker in server.WORKERS.values()] == [0, 1, 2]
+
+    del server.WORKERS[102]
+    respawned = SimpleNamespace()
+    gunicorn_config.pre_fork(server, respawned)
+    assert respawned.slot == 1
@@ -0,0 +1,42 @@
+from src.core.menu_handler import MenuHandler
+from src.core.menu_index import MenuIndex, tokenize
+from src.core.config import MENU, MODIFIERS
+
+def extract(message):
+    handler = MenuHandler(menu=MENU, modifiers=MODIFIERS)
+    return [(item['item'], item['modifiers']) for item in handler.extract_menu_items_and_modifiers(message)]
+
+def test_multiple_items_with_modifier():
+    assert extract("Iced latte with almond milk and a muffin") == [
+        ('Iced Latte', ['almond milk']),
+        ('Muffin', [])
+    ]
+
+def test_numeric_ids_match_whole_words_only():
+    assert extract("3 and 7") == [('Cappuccino', []), ('Muffin', [])]
+    assert extract("10") == []
+    assert extract("the 12-hour one") == []
+
+def test_iced_request_swaps_to_iced_drink():
+    assert extract("2 iced with oat milk") == [('Iced Latte', ['oat milk'])]
+    assert extract("latte") == [('Latte', [])]
+
+def test_modifier_short_forms_and_aliases():
+    assert extract("oatly latte") == [('Latte', ['oat milk'])]
+    assert extract("a cappuccino with soy, please") == [('Cappuccino', ['soy milk'])]
+    assert extract("goat cheese croissant") == [('Croissant', [])]
+
+def test_check_for_modification():
+    handler = MenuHandler(menu=MENU, modifiers=MODIFIERS)
+    assert handler.check_for_modification("almond please") == (True, 'almond milk')
+    assert handler.check_for_modification("boat") == (False, "")
+
+def test_index_scales_to_large_menus():
+    menu = {i: {'item': f"Drink {i}", 'price': 4, 'category': 'hot', 'description': ''} for i in range(1, 501)}
+    index = MenuIndex(menu, MODIFIERS)
+    ids, match = index.find_items("I'll take 250 and 499 with oat")
+    assert ids == [250, 499]
+    assert match.modifiers == {'oat milk'}
+
+def test_tokenize_keeps_hyphenated_words_together():
+    assert tokenize("12-hour Cold-Brew, #2!") == ['12-hour', 'cold-brew', '2']
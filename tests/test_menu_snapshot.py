@@ -0,0 +1,89 @@
+import gzip
+import json
+from decimal import Decimal
+import pytest
+from src.core.cart import ShoppingCart
+from src.core.menu_handler import MenuHandler
+from src.core.menu_snapshot import MenuPublisher, MenuSnapshot, render_page
+from src.core.config import MENU, MODIFIERS
+
+def test_renderings_match_menu():
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+
+    assert snapshot.menu_message.startswith("Welcome to Coffee S50! Order by number or name:\n\n1. Espresso ($3.50)\n")
+    assert "- Cold Brew ($4.50): 12-hour steeped coffee\n" in snapshot.ai_menu_text
+    assert snapshot.modifier_text == "\nMilk:\n- almond milk (+$0.75)\n- oat milk (+$0.75)\n- soy milk (+$0.75)\n"
+
+def test_menu_change_produces_new_version():
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+    changed = dict(MENU)
+    changed[7] = dict(MENU[7], price=Decimal('3.25'))
+
+    assert MenuSnapshot(MENU, MODIFIERS).version == snapshot.version
+    assert MenuSnapshot(changed, MODIFIERS).version != snapshot.version
+
+def test_snapshot_is_read_only():
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+    with pytest.raises(TypeError):
+        snapshot.menu[1]['price'] = Decimal('0')
+
+def test_artifacts_are_built_once():
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+    builds = []
+
+    def build(snap):
+        builds.append(snap.version)
+        return render_page("<h1>menu</h1>", snap.version)
+
+    page = snapshot.artifact('home_page', build)
+    assert snapshot.artifact('home_page', build) is page
+    assert builds == [snapshot.version]
+    assert gzip.decompress(page.gzipped) == page.body
+    assert page.etag.startswith(snapshot.version)
+
+def write_menu(path, muffin_price, milk_price='0.75'):
+    path.write_text(json.dumps({
+        'modifiers': {'milk': {'oat milk': milk_price}},
+        'menu': {
+            '1': {'item': 'Latte', 'price': '4.50', 'category': 'hot', 'description': ''},
+            '2': {'item': 'Muffin', 'price': muffin_price, 'category': 'food', 'description': ''}
+        }
+    }))
+
+def test_publisher_swaps_in_changed_menu_file(tmp_path):
+    path = tmp_path / 'menu.json'
+    write_menu(path, '3.00')
+    publisher = MenuPublisher.from_file(str(path))
+    handler = MenuHandler(publisher=publisher)
+    first = publisher.current
+
+    write_menu(path, '3.25', milk_price='0.80')
+    assert publisher.reload(force=True)
+
+    assert publisher.current.version != first.version
+    assert handler.extract_menu_items_and_modifiers("muffin")[0]['price'] == Decimal('3.25')
+    assert first.menu[2]['price'] == Decimal('3.00')
+
+def test_bad_menu_file_keeps_current_snapshot(tmp_path):
+    path = tmp_path / 'menu.json'
+    write_menu(path, '3.00')
+    publisher = MenuPublisher.from_file(str(path))
+    current = publisher.current
+
+    path.write_text('{not json')
+    assert not publisher.reload(force=True)
+    assert publisher.current is current
+
+def test_cart_keeps_price_captured_before_reload(tmp_path):
+    path = tmp_path / 'menu.json'
+    write_menu(path, '3.00')
+    publisher = MenuPublisher.from_file(str(path))
+    handler = MenuHandler(publisher=publisher)
+    cart = ShoppingCart()
+    cart.add_item(handler.extract_menu_items_and_modifiers("latte with oat milk")[0], modifiers=['oat milk'])
+
+    write_menu(path, '3.00', milk_price='1.00')
+    publisher.reload(force=True)
+    cart.add_item(handler.extract_menu_items_and_modifiers("latte with oat milk")[0], modifiers=['oat milk'])
+
+    assert [item.get_total_price() for item in cart.items] == [Decimal('5.25'), Decimal('5.50')]
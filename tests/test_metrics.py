@@ -0,0 +1,56 @@
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from src.core import metrics
+from src.core.metrics import Histogram, MetricsExporter, Registry, merge_snapshots, render
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram('demo_seconds', "Demo", ['stage'], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, 'menu')
+    histogram.observe(0.5, 'menu')
+    histogram.observe(5.0, 'menu')
+
+    text = render(merge_snapshots([registry.snapshot()]))
+
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="menu",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="menu",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="menu",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="menu"} 3' in text
+
+
+def test_exporter_merges_other_workers_snapshots(tmp_path):
+    other = Registry()
+    other.register(Histogram('demo_seconds', "Demo", ['stage'], buckets=(1.0,))).observe(0.5, 'payment')
+    MetricsExporter(other, str(tmp_path)).flush()
+    # Pretend the flushed file belongs to another worker
+    os.rename(tmp_path / f"{os.getpid()}.json", tmp_path / "1.json")
+
+    own = Registry()
+    own.register(Histogram('demo_seconds', "Demo", ['stage'], buckets=(1.0,))).observe(2.0, 'payment')
+    text = MetricsExporter(own, str(tmp_path)).collect()
+
+    assert 'demo_seconds_bucket{stage="payment",le="1.0"} 1' in text
+    assert 'demo_seconds_count{stage="payment"} 2' in text
+
+
+def test_span_uses_current_stage():
+    metrics.set_stage('test_stage')
+    with metrics.span('unit'):
+        pass
+    labels = [entry[0] for entry in metrics.STEP_SECONDS.snapshot()['series']]
+    assert ['test_stage', 'unit'] in labels
+
+
+def test_metrics_endpoint_reports_sms_requests():
+    from app import app
+    client = app.test_client()
+    client.post('/sms', data={'From': '+15550001818', 'Body': 'menu'})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert 'coffee_sms_request_seconds_count{stage="menu_command"}' in response.get_data(as_text=True)
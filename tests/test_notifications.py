@@ -0,0 +1,88 @@
+import time
+from datetime import datetime
+import pytest
+from src.core.cart import ShoppingCart
+from src.core.enums import OrderStage
+from src.core.notifications import OrderNotifier, TokenBucket, TwilioSender
+from src.core.order import Order
+from src.core.payment import PaymentHandler
+from tests.fake_twilio import FakeTwilioServer
+
+@pytest.fixture
+def twilio():
+    server = FakeTwilioServer().start()
+    yield server
+    server.stop()
+
+def make_notifier(server, **kwargs):
+    sender = TwilioSender('AC123', 'token', '+15550001111', base_url=server.url)
+    return OrderNotifier(sender, backoff=0.01, **kwargs)
+
+def make_order(phone):
+    order = Order(phone, ShoppingCart())
+    order.estimated_ready = datetime.now()
+    return order
+
+def test_ready_message_is_sent_once_per_order(twilio):
+    notifier = make_notifier(twilio)
+    notifier.start()
+    order = make_order('+15557770000')
+    assert notifier.notify_ready(order)
+    assert not notifier.notify_ready(order)
+
+    messages = twilio.wait_for(1)
+    notifier.stop()
+    assert messages[0]['To'] == '+15557770000'
+    assert messages[0]['From'] == '+15550001111'
+    assert order.id in messages[0]['Body']
+    assert messages[0]['path'] == '/2010-04-01/Accounts/AC123/Messages.json'
+    assert notifier.stats()['sent'] == 1
+
+def test_server_errors_are_retried_and_client_errors_are_not(twilio):
+    twilio.failures = [503, 500]
+    notifier = make_notifier(twilio)
+    notifier.start()
+    notifier.notify_ready(make_order('+15557770001'))
+    assert len(twilio.wait_for(1)) == 1
+
+    twilio.failures = [400]
+    notifier.notify_ready(make_order('+15557770002'))
+    time.sleep(0.2)
+    notifier.stop()
+    assert notifier.stats() == {'queued': 2, 'sent': 1, 'retried': 2, 'failed': 1, 'dropped': 0, 'pending': 0}
+
+def test_messages_wait_until_order_is_due(twilio):
+    notifier = make_notifier(twilio)
+    notifier.start()
+    early, late = make_order('+15557770003'), make_order('+15557770004')
+    notifier.notify_ready(late, when=time.time() + 60)
+    notifier.notify_ready(early)
+    twilio.wait_for(1)
+    notifier.cancel(late.id)
+    notifier.stop()
+    assert [m['To'] for m in twilio.messages] == ['+15557770003']
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert sleeps == [0.5, 0.5]
+
+def test_paid_orders_reach_listeners():
+    handler = PaymentHandler()
+    paid = []
+    handler.add_order_listener(paid.append)
+    cart = ShoppingCart()
+    cart.add_item({'item': 'Muffin', 'price': 3})
+    active = {'+1': {'cart': cart, 'state': OrderStage.PAYMENT}}
+    completed = {}
+
+    handler.handle_payment('+1', 'cash', active, completed)
+    assert paid == completed['+1']
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from src.core.cart import ShoppingCart
+from src.core.order import Order
+from src.core.order_index import OrderIndex
+
+START = datetime(2024, 5, 1, 8, 0)
+
+def make_order(phone, minutes):
+    order = Order(phone, ShoppingCart())
+    order.created_at = START + timedelta(minutes=minutes)
+    return order
+
+@pytest.fixture
+def index():
+    index = OrderIndex(bucket_seconds=3600)
+    for minutes in range(0, 240, 10):
+        index.add(make_order('+1' if minutes % 20 else '+2', minutes))
+    return index
+
+def test_lookup_by_id_and_latest_for_phone(index):
+    latest = index.latest('+1')
+    assert latest.created_at == START + timedelta(minutes=230)
+    assert index.get(f"#{latest.id.upper()}") is latest
+    assert index.latest('+3') is None
+
+def test_phone_pages_are_newest_first(index):
+    page, total = index.for_phone('+2', offset=0, limit=5)
+    assert total == 12
+    assert [o.created_at.minute for o in page] == [40, 20, 0, 40, 20]
+    page, _ = index.for_phone('+2', offset=10, limit=5)
+    assert len(page) == 2
+
+def test_time_range_and_purge(index):
+    start = (START + timedelta(minutes=55)).timestamp()
+    page, total = index.between(start, start + 3600, offset=0, limit=3)
+    assert total == 6
+    assert [o.created_at.minute for o in page] == [0, 10, 20]
+
+    assert index.purge((START + timedelta(hours=2)).timestamp()) == 12
+    assert len(index) == 12
+    assert index.for_phone('+1')[1] == 6
+
+def test_late_orders_keep_phone_lists_in_creation_order(index):
+    late = make_order('+2', 5)
+    index.add(late)
+    assert index.latest('+2').created_at == START + timedelta(minutes=220)
+    page, total = index.for_phone('+2', offset=11, limit=2)
+    assert [o.created_at.minute for o in page] == [5, 0]
+
+def test_wide_time_range_only_visits_occupied_buckets(index):
+    start = time.time()
+    page, total = index.between(0, 1e13, offset=16, limit=4)
+    assert time.time() - start < 0.5
+    assert total == 24
+    assert [o.created_at.minute for o in page] == [40, 50, 0, 10]
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from src.core.config import MENU, MODIFIERS
+from src.core.conversation_handler import ConversationHandler
+from src.core.menu_snapshot import MenuSnapshot
+from src.core.prompts import PromptBuilder
+from src.core.state import CustomerContext
+
+CART = {'items': [{'name': 'Latte', 'quantity': 2, 'modifiers': ['oat milk']}], 'total': 8.5}
+
+
+def regular_customer():
+    context = CustomerContext()
+    context.visit_count = 7
+    context.usual_modifications = ['oat milk']
+    context.favorite_items = ['Latte']
+    return context
+
+
+def test_prefix_is_byte_stable_across_customers_and_carts():
+    builder = PromptBuilder()
+    snapshot = MenuSnapshot(MENU, MODIFIERS)
+
+    first = builder.barista(snapshot, "what's good?", {'cart': CART}, '09:00')
+    second = builder.barista(snapshot, "is it sweet?", {'cart': {}, 'last_item': 'Muffin'}, '17:45')
+
+    assert first.messages[0] == second.messages[0]
+    assert "cart: 2x Latte (oat milk)" in first.messages[1]['content']
+    assert "cart: empty" in second.messages[1]['content']
+
+
+def test_friendly_prompt_serializes_only_useful_fields():
+    prompt = PromptBuilder().friendly("Pay with CASH or CARD.", 'morning', regular_customer(), CART,
+                                      hints={'payment': True, 'confused': False})
+    context = prompt.messages[1]['content']
+
+    assert "usually has: oat milk" in context
+    assert "situation: payment" in context
+    assert "object at" not in context and "confused" not in context
+    assert prompt.messages[-1] == {"role": "user", "content": "Pay with CASH or CARD."}
+
+
+def test_budget_drops_least_important_lines_first():
+    full = PromptBuilder().friendly("Hello", 'morning', regular_customer(), CART)
+    builder = PromptBuilder(max_tokens=full.tokens - 1)
+
+    prompt = builder.friendly("Hello", 'morning', regular_customer(), CART)
+
+    context = prompt.messages[1]['content']
+    assert prompt.tokens <= builder.max_tokens
+    assert prompt.dropped >= 1
+    assert "cart: 2x Latte" in context and "usually has" in context
+    assert builder.stats()['lines_dropped'] == prompt.dropped
+
+
+def test_friendly_response_sends_built_messages():
+    sent = {}
+
+    def create(**kwargs):
+        sent.update(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Hi!"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    ConversationHandler(client).get_friendly_response("Hello", regular_customer(), cart=CART)
+
+    assert sent['messages'] == PromptBuilder().friendly(
+        "Hello", ConversationHandler()._get_time_greeting(), regular_customer(), CART).messages
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from src.core.response_cache import ResponseCache
+from src.core.conversation_handler import ConversationHandler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeOpenAI:
+    """Stand-in client that counts completions"""
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"rewritten #{self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def test_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(max_size=4, ttl=10, clock=clock)
+    cache.set('key', 'value')
+
+    assert cache.get('key') == 'value'
+    clock.now = 10
+    assert cache.get('key') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    assert cache.get('c') == '3'
+    assert cache.evictions == 1
+
+def test_key_normalizes_message_and_ignores_cart_prices():
+    cart = {'items': [{'name': 'Latte', 'quantity': 1, 'modifiers': [], 'price': 4.5}], 'total': 4.5}
+    same_cart = {'items': [{'name': 'Latte', 'quantity': 1, 'modifiers': [], 'price': 4.50}], 'total': 4.50}
+
+    key = ResponseCache.make_key("Please choose  your payment method", "morning", cart)
+    assert key == ResponseCache.make_key(" please choose your payment method", "morning", same_cart)
+    assert key != ResponseCache.make_key("Please choose your payment method", "evening", cart)
+    assert key != ResponseCache.make_key("Please choose your payment method", "morning", cart, payment=True)
+
+def test_friendly_response_served_from_cache():
+    client = FakeOpenAI()
+    handler = ConversationHandler(client, cache=ResponseCache())
+
+    first = handler.get_friendly_response("Please choose your payment method", {})
+    second = handler.get_friendly_response("Please choose your payment method", {})
+
+    assert first == second
+    assert client.calls == 1
+
+def test_personalized_replies_are_not_shared_between_customers():
+    client = FakeOpenAI()
+    handler = ConversationHandler(client, cache=ResponseCache())
+    regular = {'usual_modifications': ['oat milk'], 'visit_count': 12}
+
+    handler.get_friendly_response("Please choose your payment method", regular)
+    handler.get_friendly_response("Please choose your payment method", {})
+    handler.get_friendly_response("Please choose your payment method", dict(regular))
+
+    assert client.calls == 2
@@ -0,0 +1,75 @@
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from src.core.enums import OrderStage, ReplyKind, ReplyMode
+from src.core.response_policy import ResponsePolicy, milk_choices
+
+PAYMENT_PATH = (OrderStage.PAYMENT, OrderStage.AWAITING_CARD)
+
+
+def test_most_specific_rule_wins():
+    policy = ResponsePolicy({
+        (OrderStage.PAYMENT, ReplyKind.PAYMENT_RESULT): ReplyMode.VERBATIM,
+        (OrderStage.PAYMENT, None): ReplyMode.TEMPLATE,
+        (None, ReplyKind.PAYMENT_RESULT): ReplyMode.LLM,
+    })
+
+    assert policy.mode(OrderStage.PAYMENT, ReplyKind.PAYMENT_RESULT) is ReplyMode.VERBATIM
+    assert policy.mode(OrderStage.PAYMENT, ReplyKind.CONFUSED) is ReplyMode.TEMPLATE
+    assert policy.mode(OrderStage.AWAITING_CARD, ReplyKind.PAYMENT_RESULT) is ReplyMode.LLM
+    assert policy.mode(OrderStage.MENU, ReplyKind.CONFUSED) is ReplyMode.LLM
+
+
+def test_prices_and_order_numbers_are_never_rewritten():
+    for name in ('default', 'latency_critical'):
+        policy = ResponsePolicy.profile(name)
+        for stage in OrderStage:
+            for kind in (ReplyKind.CART_SUMMARY, ReplyKind.MODIFIER_PROMPT, ReplyKind.PAYMENT_RESULT):
+                assert policy.mode(stage, kind) is not ReplyMode.LLM
+
+
+def test_latency_critical_keeps_llm_off_payment_path():
+    policy = ResponsePolicy.profile('latency_critical')
+    for kind in ReplyKind:
+        for stage in PAYMENT_PATH:
+            assert policy.mode(stage, kind) is not ReplyMode.LLM
+    assert policy.mode(OrderStage.MENU, ReplyKind.PAYMENT_PROMPT) is not ReplyMode.LLM
+
+
+def test_template_fills_cart_total():
+    policy = ResponsePolicy.profile('latency_critical')
+    reply = policy.render(ReplyKind.PAYMENT_PROMPT, "Reply with CASH or CARD.", {'total': 8.25})
+    assert reply == "Your total is $8.25. Reply with CASH or CARD."
+
+
+def test_milk_question_lists_the_menus_milks():
+    policy = ResponsePolicy.profile('latency_critical')
+    modifiers = {'milk': {'oat milk': '0.75', 'coconut milk': '0.75', 'whole milk': '0'}}
+    reply = policy.render(ReplyKind.MILK_QUESTION, "Any milk?", modifiers=modifiers)
+    assert reply == "Any milk? ☕ Reply with oat, coconut or whole milk, or NO for regular."
+    assert milk_choices({'milk': {'soy milk': '0.75'}}) == "soy milk"
+
+
+def test_checkout_and_payment_make_no_llm_calls(monkeypatch):
+    import app
+
+    # Recorded rather than raised: get_friendly_response would swallow an exception
+    llm_calls = []
+
+    def create(**kwargs):
+        llm_calls.append(kwargs)
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(app, 'response_policy', ResponsePolicy.profile('latency_critical'))
+    monkeypatch.setattr(app.conversation_handler, '_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(app.conversation_handler, 'cache', None)  # a cached rewrite would hide a call
+    phone = '+15550002222'
+    app.process_message(phone, 'start')
+    app.process_message(phone, 'muffin')
+
+    assert app.process_message(phone, 'done').startswith("Your total is $3.00.")
+    assert "order number" in app.process_message(phone, 'cash')
+    assert llm_calls == []
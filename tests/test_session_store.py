@@ -0,0 +1,138 @@
+import threading
+import time
+import pytest
+from src.core.cart import ShoppingCart
+from src.core.enums import OrderStage
+from src.core.order import OrderQueue
+from src.core.state import CustomerContext
+from src.core.session_store import (
+    MemorySessionStore, PhoneSession, RedisSessionStore, SQLiteSessionStore, create_session_store,
+    decode_session, encode_session
+)
+from src.core.config import MENU
+from tests.fake_redis import FakeRedisServer
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemorySessionStore()
+    elif request.param == 'sqlite':
+        yield SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    else:
+        server = FakeRedisServer().start()
+        yield RedisSessionStore('127.0.0.1', server.port)
+        server.stop()
+
+def new_order():
+    return {
+        'state': OrderStage.MENU,
+        'cart': ShoppingCart(),
+        'order_queue': OrderQueue(),
+        'pending_items': []
+    }
+
+def test_session_round_trips_through_encoding():
+    order = new_order()
+    order['cart'].add_item(MENU[7])
+    order['cart'].add_item(MENU[5], modifiers=['almond milk'])
+    order['state'] = OrderStage.AWAITING_MOD_CONFIRM
+    order['pending_item'] = dict(MENU[2], modifiers=['oat milk'])
+    order['pending_items'] = [dict(MENU[3], modifiers=[])]
+    order['pending_modifier'] = 'oat milk'
+    context = CustomerContext()
+    context.usual_modifications.append('almond milk')
+    context.add_conversation_entry('hi', 'hello')
+
+    decoded = decode_session(encode_session(PhoneSession(order, context)))
+
+    assert decoded.order['state'] == OrderStage.AWAITING_MOD_CONFIRM
+    assert decoded.order['cart'].get_total() == order['cart'].get_total()
+    assert decoded.order['pending_item']['price'] == MENU[2]['price']
+    assert decoded.order['pending_items'][0]['item'] == 'Cappuccino'
+    assert decoded.order['pending_modifier'] == 'oat milk'
+    assert decoded.context.usual_modifications == ['almond milk']
+    assert decoded.context.conversation_history[0]['message'] == 'hi'
+
+def test_transaction_persists_changes(store):
+    with store.transaction('+15550001') as session:
+        session.order = new_order()
+        session.order['cart'].add_item(MENU[6])
+
+    with store.transaction('+15550001') as session:
+        assert [item.name for item in session.order['cart'].items] == ['Croissant']
+        session.order = None
+
+    assert store.phones() == []
+
+def test_transaction_serializes_read_modify_write(store):
+    with store.transaction('+15550002') as session:
+        session.order = new_order()
+
+    def add_muffins():
+        for _ in range(10):
+            with store.transaction('+15550002') as session:
+                session.order['cart'].add_item(MENU[7])
+
+    threads = [threading.Thread(target=add_muffins) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with store.transaction('+15550002') as session:
+        assert session.order['cart'].items[0].quantity == 20
+
+def test_sqlite_turn_only_locks_its_own_phone(tmp_path):
+    # Two stores on one file stand in for two gunicorn workers
+    path = str(tmp_path / 'sessions.db')
+    first, second = SQLiteSessionStore(path, busy_timeout=0.5), SQLiteSessionStore(path, busy_timeout=0.5)
+    waited = []
+
+    with first.transaction('+15550003') as session:
+        session.order = new_order()
+        # Another phone is not held up by a turn in progress, e.g. one waiting on the LLM
+        with second.transaction('+15550004') as other:
+            other.order = new_order()
+
+        def same_phone():
+            with second.transaction('+15550003') as session:
+                waited.append(session.order['cart'].items[0].name)
+
+        thread = threading.Thread(target=same_phone)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+        session.order['cart'].add_item(MENU[7])
+    thread.join()
+
+    assert waited == ['Muffin']
+    assert sorted(first.phones()) == ['+15550003', '+15550004']
+
+def test_redis_lock_release_keeps_a_lock_another_worker_took():
+    server = FakeRedisServer().start()
+    store = RedisSessionStore('127.0.0.1', server.port, lock_timeout_ms=50)
+    store.scan_count = 2  # phones() has to follow the SCAN cursor
+    other_worker = RedisSessionStore('127.0.0.1', server.port)
+    lock_key = f"{store.prefix}+15550005:lock".encode('utf-8')
+    try:
+        with store.transaction('+15550005') as session:
+            session.order = new_order()
+            time.sleep(0.1)  # the lease runs out mid-turn...
+            assert other_worker._connection().execute('SET', lock_key, 'theirs', 'NX', 'PX', 10000) == 'OK'
+        assert server.data[lock_key] == b'theirs'
+
+        for n in range(5):
+            with store.transaction(f'+1555000{n}') as session:
+                session.order = new_order()
+        assert sorted(store.phones()) == ['+15550000', '+15550001', '+15550002', '+15550003',
+                                          '+15550004', '+15550005']
+    finally:
+        server.stop()
+
+def test_create_session_store_from_url(tmp_path):
+    assert isinstance(create_session_store('memory://'), MemorySessionStore)
+    sqlite_store = create_session_store(f"sqlite:///{tmp_path / 'x.db'}")
+    assert isinstance(sqlite_store, SQLiteSessionStore)
+    assert sqlite_store.path == str(tmp_path / 'x.db')
+    redis_store = create_session_store('redis://cache:6380/2')
+    assert (redis_store.host, redis_store.port, redis_store.db) == ('cache', 6380, 2)
@@ -0,0 +1,112 @@
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+import pytest
+
+from src.core.notifications import TwilioSender
+from src.core.sms_dispatch import ReplyDispatcher
+from tests.fake_twilio import FakeTwilioServer
+
+
+@pytest.fixture
+def twilio():
+    server = FakeTwilioServer().start()
+    yield server
+    server.stop()
+
+
+def make_sender(server):
+    return TwilioSender('AC123', 'token', '+15550001111', base_url=server.url)
+
+
+def test_replies_stay_in_order_per_phone(twilio):
+    rng = random.Random(7)
+
+    def process(phone, body):
+        time.sleep(rng.random() / 200)  # uneven processing times
+        return f"re: {body}"
+
+    dispatcher = ReplyDispatcher(process, make_sender(twilio), workers=3, backoff=0.01)
+    dispatcher.start()
+    phones = [f"+1555000{n:04d}" for n in range(4)]
+    for n in range(6):
+        for phone in phones:
+            assert dispatcher.submit(phone, f"message {n}")
+
+    messages = twilio.wait_for(24)
+    dispatcher.stop()
+    for phone in phones:
+        bodies = [message['Body'] for message in messages if message['To'] == phone]
+        assert bodies == [f"re: message {n}" for n in range(6)]
+    assert dispatcher.stats()['sent'] == 24
+
+
+def test_retryable_failures_hold_back_later_replies(twilio):
+    twilio.failures = [503]
+    dispatcher = ReplyDispatcher(lambda phone, body: body, make_sender(twilio), workers=1, backoff=0.01)
+    dispatcher.start()
+    dispatcher.submit('+15550009999', 'first')
+    dispatcher.submit('+15550009999', 'second')
+
+    messages = twilio.wait_for(2)
+    dispatcher.stop()
+    assert [message['Body'] for message in messages] == ['first', 'second']
+    assert dispatcher.stats()['retried'] == 1
+
+
+def test_every_send_attempt_takes_a_token_from_the_rate_limiter(twilio):
+    acquired = []
+    twilio.failures = [503]
+    dispatcher = ReplyDispatcher(lambda phone, body: body, make_sender(twilio), workers=1, backoff=0.01,
+                                 rate_limiter=SimpleNamespace(acquire=lambda: acquired.append(1)))
+    dispatcher.start()
+    dispatcher.submit('+15550007777', 'hello')
+
+    twilio.wait_for(1)
+    dispatcher.stop()
+    assert len(acquired) == 2
+
+
+def test_full_queue_rejects_message(twilio):
+    dispatcher = ReplyDispatcher(lambda phone, body: body, make_sender(twilio), workers=1, max_pending=1)
+    assert dispatcher.submit('+15550008888', 'one')
+    assert not dispatcher.submit('+15550008888', 'two')
+    assert dispatcher.stats()['dropped'] == 1
+
+
+def test_stop_answers_acknowledged_messages_first(twilio):
+    def process(phone, body):
+        time.sleep(0.01)
+        return body
+
+    dispatcher = ReplyDispatcher(process, make_sender(twilio), workers=2)
+    dispatcher.start()
+    for n in range(10):
+        assert dispatcher.submit(f"+1555000{n % 3:04d}", f"message {n}")
+
+    dispatcher.stop()
+
+    assert len(twilio.wait_for(10)) == 10
+    assert not dispatcher.submit('+15550000001', 'too late')
+    assert dispatcher.stats()['sent'] == 10
+
+
+def test_webhook_acknowledges_and_texts_reply(twilio, monkeypatch):
+    import app
+    dispatcher = ReplyDispatcher(app.reply_to, make_sender(twilio), workers=2)
+    dispatcher.start()
+    monkeypatch.setattr(app, 'sms_dispatcher', dispatcher)
+    client = app.app.test_client()
+
+    response = client.post('/sms', data={'From': '+15550007777', 'Body': 'menu'})
+
+    assert response.status_code == 200
+    assert '<Message>' not in response.get_data(as_text=True)
+    messages = twilio.wait_for(1)
+    dispatcher.stop()
+    assert messages[0]['To'] == '+15550007777'
+    assert messages[0]['Body'] == app.get_menu_message()
@@ -0,0 +1,45 @@
+from datetime import datetime
+import app
+from src.core.cart import ShoppingCart
+from src.core.journal import OrderJournal
+from src.core.order import Order
+from src.core.order_index import OrderIndex
+
+def test_status_and_orders_endpoint(monkeypatch):
+    index = OrderIndex()
+    monkeypatch.setattr(app, 'order_index', index)
+    monkeypatch.setattr(app, 'ORDERS_API_TOKEN', 'secret')
+    order = Order('+15550001234', ShoppingCart())
+    index.add(order)
+
+    assert f"#{order.id} is being prepared" in app.process_message('+15550001234', 'STATUS')
+    assert "couldn't find" in app.process_message('+15550009999', f"status #{order.id}")
+    assert "don't have any recent orders" in app.process_message('+15550009999', 'status')
+
+    client = app.app.test_client()
+    assert client.get('/orders?phone=%2B15550001234').status_code == 401
+    body = client.get('/orders?phone=%2B15550001234', headers={'Authorization': 'Bearer secret'}).get_json()
+    assert [o['id'] for o in body['orders']] == [order.id]
+    assert body['next_offset'] is None
+
+    # Oldest first, so an old order leads a range wide enough to cover every bucket
+    old = Order('+15550001234', ShoppingCart())
+    old.created_at = datetime(2001, 1, 1)
+    index.add(old)
+    headers = {'Authorization': 'Bearer secret'}
+    body = client.get('/orders?since=0&until=1e13&limit=1', headers=headers).get_json()
+    assert [o['id'] for o in body['orders']] == [old.id]
+    assert client.get('/orders?since=-inf&until=inf', headers=headers).status_code == 400
+
+def test_status_sees_orders_taken_by_other_workers(monkeypatch):
+    monkeypatch.setattr(app, 'order_index', OrderIndex())
+    phone = '+15550004321'
+    # A second journal on the same file stands in for another gunicorn worker
+    other_worker = OrderJournal(app.ORDER_JOURNAL_PATH)
+    order = Order(phone, ShoppingCart())
+    other_worker.append(order)
+    other_worker.close()
+
+    assert f"#{order.id} is being prepared" in app.process_message(phone, 'status')
+    # Words after STATUS are not mistaken for an order number
+    assert f"#{order.id} is being prepared" in app.process_message(phone, 'status of my latte')